@@ -33,6 +33,9 @@ from app.models import user_models
 from app.models import news_models
 from app.models import preference_models
 from app.models import predefined_category_models
+from app.models import usage_models
+from app.models import job_models
+from app.models import schedule_models
 
 target_metadata = Base.metadata
 
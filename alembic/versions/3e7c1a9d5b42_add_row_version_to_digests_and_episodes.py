@@ -0,0 +1,34 @@
+"""add_row_version_to_digests_and_episodes
+
+Revision ID: 3e7c1a9d5b42
+Revises: f7b2d9e4a168
+Create Date: 2026-10-21 09:42:18.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7c1a9d5b42'
+down_revision: Union[str, None] = 'f7b2d9e4a168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_version', sa.Integer(), server_default='0', nullable=False))
+    with op.batch_alter_table('podcast_episodes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcast_episodes', schema=None) as batch_op:
+        batch_op.drop_column('row_version')
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.drop_column('row_version')
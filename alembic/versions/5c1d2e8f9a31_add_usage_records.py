@@ -0,0 +1,61 @@
+"""add_usage_records
+
+Revision ID: 5c1d2e8f9a31
+Revises: 208986ebad35
+Create Date: 2026-10-18 09:12:44.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d2e8f9a31'
+down_revision: Union[str, None] = '208986ebad35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('usage_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('news_digest_id', sa.Integer(), nullable=True),
+    sa.Column('predefined_category_id', sa.Integer(), nullable=True),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=True),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('output_tokens', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tokens_estimated', sa.Boolean(), server_default='false', nullable=False),
+    sa.Column('characters', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('chunks', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['news_digest_id'], ['news_digests.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('usage_records', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_usage_records_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_usage_records_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_usage_records_news_digest_id'), ['news_digest_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_usage_records_predefined_category_id'), ['predefined_category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_usage_records_kind'), ['kind'], unique=False)
+        batch_op.create_index(batch_op.f('ix_usage_records_created_at'), ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('usage_records', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_usage_records_created_at'))
+        batch_op.drop_index(batch_op.f('ix_usage_records_kind'))
+        batch_op.drop_index(batch_op.f('ix_usage_records_predefined_category_id'))
+        batch_op.drop_index(batch_op.f('ix_usage_records_news_digest_id'))
+        batch_op.drop_index(batch_op.f('ix_usage_records_user_id'))
+        batch_op.drop_index(batch_op.f('ix_usage_records_id'))
+
+    op.drop_table('usage_records')
@@ -0,0 +1,29 @@
+"""add_playlist_url_to_news_digests
+
+Revision ID: 7a4e3b9c2d10
+Revises: 5c1d2e8f9a31
+Create Date: 2026-10-19 08:41:27.530981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e3b9c2d10'
+down_revision: Union[str, None] = '5c1d2e8f9a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('news_digests', sa.Column('playlist_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.drop_column('playlist_url')
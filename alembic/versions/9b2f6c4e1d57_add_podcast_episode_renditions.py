@@ -0,0 +1,55 @@
+"""add_podcast_episode_renditions
+
+Revision ID: 9b2f6c4e1d57
+Revises: 7a4e3b9c2d10
+Create Date: 2026-10-19 10:02:15.804412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f6c4e1d57'
+down_revision: Union[str, None] = '7a4e3b9c2d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcast_episodes', sa.Column('audio_format', sa.String(length=10), server_default='mp3', nullable=False))
+    op.create_table('podcast_episode_renditions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('podcast_episode_id', sa.Integer(), nullable=False),
+    sa.Column('audio_format', sa.String(length=10), nullable=False),
+    sa.Column('audio_url', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('transcoded', sa.Boolean(), server_default='false', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['podcast_episode_id'], ['podcast_episodes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('podcast_episode_id', 'audio_format', name='uq_rendition_episode_format')
+    )
+    with op.batch_alter_table('podcast_episode_renditions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_podcast_episode_renditions_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_podcast_episode_renditions_podcast_episode_id'), ['podcast_episode_id'], unique=False)
+
+    # Existing episodes are MP3; record their file as the single rendition.
+    op.execute(
+        "INSERT INTO podcast_episode_renditions (podcast_episode_id, audio_format, audio_url, file_path, transcoded) "
+        "SELECT id, 'mp3', audio_url, file_path, false FROM podcast_episodes WHERE audio_url IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcast_episode_renditions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_podcast_episode_renditions_podcast_episode_id'))
+        batch_op.drop_index(batch_op.f('ix_podcast_episode_renditions_id'))
+    op.drop_table('podcast_episode_renditions')
+    with op.batch_alter_table('podcast_episodes', schema=None) as batch_op:
+        batch_op.drop_column('audio_format')
@@ -0,0 +1,34 @@
+"""add_criteria_fingerprint_to_news_digests
+
+Revision ID: a4c6e1f9b285
+Revises: f2b7d4e8a193
+Create Date: 2026-10-19 17:12:36.804152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c6e1f9b285'
+down_revision: Union[str, None] = 'f2b7d4e8a193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing digests keep a NULL fingerprint: their stored source info does not hold the resolved
+    # generation criteria, so they are not reused by the cache.
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('criteria_fingerprint', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_news_digests_cache_lookup', ['criteria_fingerprint', 'status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.drop_index('ix_news_digests_cache_lookup')
+        batch_op.drop_column('criteria_fingerprint')
@@ -0,0 +1,30 @@
+"""add_progress_to_news_digests
+
+Revision ID: b8e3f5a2c617
+Revises: a4c6e1f9b285
+Create Date: 2026-10-19 18:03:51.220947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f5a2c617'
+down_revision: Union[str, None] = 'a4c6e1f9b285'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('progress', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.drop_column('progress')
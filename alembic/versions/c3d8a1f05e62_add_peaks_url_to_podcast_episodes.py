@@ -0,0 +1,29 @@
+"""add_peaks_url_to_podcast_episodes
+
+Revision ID: c3d8a1f05e62
+Revises: 9b2f6c4e1d57
+Create Date: 2026-10-19 11:37:50.126093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8a1f05e62'
+down_revision: Union[str, None] = '9b2f6c4e1d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('podcast_episodes', sa.Column('peaks_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcast_episodes', schema=None) as batch_op:
+        batch_op.drop_column('peaks_url')
@@ -0,0 +1,33 @@
+"""add_deadline_to_generation_jobs
+
+Revision ID: c6d9a2e4f731
+Revises: b8e3f5a2c617
+Create Date: 2026-10-19 19:12:37.604182
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6d9a2e4f731'
+down_revision: Union[str, None] = 'b8e3f5a2c617'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Jobs queued before this have no deadline; only their stage timeouts apply
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deadline_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_generation_jobs_deadline_at'), ['deadline_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_deadline_at'))
+        batch_op.drop_column('deadline_at')
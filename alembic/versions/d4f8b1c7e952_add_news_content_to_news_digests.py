@@ -0,0 +1,30 @@
+"""add_news_content_to_news_digests
+
+Revision ID: d4f8b1c7e952
+Revises: c6d9a2e4f731
+Create Date: 2026-10-19 20:31:05.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f8b1c7e952'
+down_revision: Union[str, None] = 'c6d9a2e4f731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('news_content', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('news_digests', schema=None) as batch_op:
+        batch_op.drop_column('news_content')
@@ -0,0 +1,63 @@
+"""add_generation_jobs
+
+Revision ID: d7e4f2a9b831
+Revises: c3d8a1f05e62
+Create Date: 2026-10-19 13:05:41.552170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e4f2a9b831'
+down_revision: Union[str, None] = 'c3d8a1f05e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('generation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('news_digest_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('encrypted_secrets', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('priority', sa.Integer(), server_default='100', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False),
+    sa.Column('run_after', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('lease_owner', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['news_digest_id'], ['news_digests.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_generation_jobs_claim', ['status', 'priority', 'run_after'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_lease_expires_at'), ['lease_expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_news_digest_id'), ['news_digest_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_user_id'))
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_news_digest_id'))
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_lease_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_id'))
+        batch_op.drop_index('ix_generation_jobs_claim')
+    op.drop_table('generation_jobs')
@@ -0,0 +1,60 @@
+"""add_job_stages_and_stage_runs
+
+Revision ID: e5a1c9d3f720
+Revises: d7e4f2a9b831
+Create Date: 2026-10-19 14:22:09.318645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9d3f720'
+down_revision: Union[str, None] = 'd7e4f2a9b831'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stage', sa.String(length=20), server_default='FETCH', nullable=False))
+        batch_op.drop_index('ix_generation_jobs_claim')
+        batch_op.create_index('ix_generation_jobs_claim', ['status', 'stage', 'priority', 'run_after'], unique=False)
+
+    op.create_table('generation_stage_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sa.String(length=20), nullable=False),
+    sa.Column('attempt', sa.Integer(), nullable=False),
+    sa.Column('worker_id', sa.String(length=100), nullable=True),
+    sa.Column('outcome', sa.String(length=20), nullable=False),
+    sa.Column('wait_seconds', sa.Float(), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['generation_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('generation_stage_runs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_generation_stage_runs_finished_at'), ['finished_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_stage_runs_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_stage_runs_job_id'), ['job_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_stage_runs_stage'), ['stage'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('generation_stage_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_generation_stage_runs_stage'))
+        batch_op.drop_index(batch_op.f('ix_generation_stage_runs_job_id'))
+        batch_op.drop_index(batch_op.f('ix_generation_stage_runs_id'))
+        batch_op.drop_index(batch_op.f('ix_generation_stage_runs_finished_at'))
+    op.drop_table('generation_stage_runs')
+
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_generation_jobs_claim')
+        batch_op.create_index('ix_generation_jobs_claim', ['status', 'priority', 'run_after'], unique=False)
+        batch_op.drop_column('stage')
@@ -0,0 +1,59 @@
+"""add_podcast_schedules
+
+Revision ID: e9a3c7f1b246
+Revises: d4f8b1c7e952
+Create Date: 2026-10-19 22:47:13.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a3c7f1b246'
+down_revision: Union[str, None] = 'd4f8b1c7e952'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('podcast_schedules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('time_of_day', sa.String(length=5), nullable=False),
+    sa.Column('timezone', sa.String(length=64), nullable=False),
+    sa.Column('predefined_category_id', sa.Integer(), nullable=True),
+    sa.Column('language', sa.String(length=10), nullable=True),
+    sa.Column('audio_style', sa.String(length=50), nullable=True),
+    sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('next_delivery_at', sa.DateTime(), nullable=True),
+    sa.Column('next_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_news_digest_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['last_news_digest_id'], ['news_digests.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['predefined_category_id'], ['predefined_categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('podcast_schedules', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_podcast_schedules_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_podcast_schedules_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_podcast_schedules_predefined_category_id'), ['predefined_category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_podcast_schedules_next_run_at'), ['next_run_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('podcast_schedules', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_podcast_schedules_next_run_at'))
+        batch_op.drop_index(batch_op.f('ix_podcast_schedules_predefined_category_id'))
+        batch_op.drop_index(batch_op.f('ix_podcast_schedules_user_id'))
+        batch_op.drop_index(batch_op.f('ix_podcast_schedules_id'))
+
+    op.drop_table('podcast_schedules')
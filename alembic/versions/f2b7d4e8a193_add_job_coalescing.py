@@ -0,0 +1,38 @@
+"""add_job_coalescing
+
+Revision ID: f2b7d4e8a193
+Revises: e5a1c9d3f720
+Create Date: 2026-10-19 16:05:41.527310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d4e8a193'
+down_revision: Union[str, None] = 'e5a1c9d3f720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('coalesce_key', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('leader_job_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_generation_jobs_coalesce_key'), ['coalesce_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_jobs_leader_job_id'), ['leader_job_id'], unique=False)
+        batch_op.create_foreign_key('fk_generation_jobs_leader_job_id', 'generation_jobs', ['leader_job_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_generation_jobs_leader_job_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_leader_job_id'))
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_coalesce_key'))
+        batch_op.drop_column('leader_job_id')
+        batch_op.drop_column('coalesce_key')
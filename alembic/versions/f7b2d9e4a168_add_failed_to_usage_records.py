@@ -0,0 +1,30 @@
+"""add_failed_to_usage_records
+
+Revision ID: f7b2d9e4a168
+Revises: e9a3c7f1b246
+Create Date: 2026-10-20 10:14:37.218604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d9e4a168'
+down_revision: Union[str, None] = 'e9a3c7f1b246'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('usage_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('failed', sa.Boolean(), server_default='false', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('usage_records', schema=None) as batch_op:
+        batch_op.drop_column('failed')
@@ -67,16 +67,16 @@ async def get_current_active_user(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
-# Optional: for superuser-only endpoints
-# async def get_current_active_superuser(
-#     current_user: User = Depends(get_current_active_user),
-# ) -> User:
-#     if not current_user.is_superuser:
-#         raise HTTPException(
-#             status_code=status.HTTP_403_FORBIDDEN,
-#             detail="The user doesn't have enough privileges"
-#         )
-#     return current_user
+# For superuser-only endpoints
+async def get_current_active_superuser(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
 
 # --- Placeholder for future authentication dependency ---
 # async def get_current_user(
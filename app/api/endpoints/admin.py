@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Any, Optional
+
+from app.api import deps
+from app.models.user_models import User
+from app.schemas import usage_schemas
+from app.services import key_provider, usage_service, tts_cache, job_queue
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/key-pools")
+async def read_key_pool_usage(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Per-key usage and health of the server API key pools in this process.
+    Keys are identified by a masked id; the keys themselves are never returned.
+    """
+    logger.info(f"Superuser {current_user.id} requested key pool usage.")
+    return key_provider.get_key_pool_usage()
+
+@router.get("/tts-cache")
+async def read_tts_cache_stats(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Size, hit/miss counts and evictions of the on-disk TTS chunk cache.
+    """
+    return tts_cache.get_tts_cache_stats()
+
+@router.get("/jobs")
+async def read_job_queue_stats(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_superuser),
+    window_minutes: int = Query(15, ge=1, le=1440, description="Window for throughput and timing figures."),
+) -> Any:
+    """
+    Generation jobs per status and, per pipeline stage, queue depth, oldest due job's wait,
+    throughput, mean run time and mean queue wait.
+    """
+    return job_queue.queue_stats(db, window_minutes=window_minutes)
+
+@router.get("/usage/by-user", response_model=usage_schemas.UsageAggregateResponse)
+async def read_usage_by_user(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_superuser),
+    since: Optional[datetime] = Query(None, description="Only count usage recorded at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only count usage recorded before this time (UTC)."),
+) -> Any:
+    """
+    LLM token and TTS character totals per user and usage kind.
+    """
+    items = usage_service.aggregate_usage(db, group_by="user", since=since, until=until)
+    return usage_schemas.UsageAggregateResponse(items=items)
+
+@router.get("/usage/by-category", response_model=usage_schemas.UsageAggregateResponse)
+async def read_usage_by_category(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_superuser),
+    since: Optional[datetime] = Query(None, description="Only count usage recorded at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only count usage recorded before this time (UTC)."),
+) -> Any:
+    """
+    LLM token and TTS character totals per predefined category and usage kind, across all users.
+    """
+    items = usage_service.aggregate_usage(db, group_by="category", since=since, until=until)
+    return usage_schemas.UsageAggregateResponse(items=items)
@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import cast, TEXT, desc, func as sql_func
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import desc, func
 from typing import Any, Optional, Dict, List
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from app.api import deps
 from app.schemas import podcast_schemas
-from app.services import news_processing_service, llm_service, podcast_service
-from app.models.news_models import NewsDigest, NewsDigestStatus, PodcastEpisode
+from app.services import audio_formats, job_queue, coalescing, progress_events, podcast_pipeline
+from app.services.progress_events import ProgressEvent
+from app.db.database import SessionLocal
+from app.models.job_models import GenerationJob, JobStage, JobStatus
+from app.services.generation_criteria import criteria_fingerprint
+from app.models.news_models import NewsDigest, NewsDigestStatus, PodcastEpisode, FINAL_DIGEST_STATUSES
 from app.models.user_models import User
 from app.models.preference_models import UserPreference
 from app.models.predefined_category_models import PredefinedCategory as PredefinedCategoryModel
@@ -62,84 +71,6 @@ def _generate_request_summary(original_info: Optional[Dict[str, Any]]) -> Option
     
     return ", ".join(filter(None, summary_parts)) if summary_parts else "General podcast criteria"
 
-# --- Background Task for Full Podcast Generation --- #
-async def background_generate_full_podcast(
-    db: Session,
-    news_digest_id: int,
-    user_id: int, 
-    generation_criteria: Dict[str, Any],
-    force_regenerate: bool,
-    user_openai_api_key: Optional[str] = None,
-    user_google_api_key: Optional[str] = None
-):
-    """
-    The complete background task using consolidated generation criteria.
-    """
-    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
-    if not news_digest:
-        logger.error(f"[BG_TASK] NewsDigest {news_digest_id} not found at start of background task.")
-        return
-
-    try:
-        logger.info(f"[BG_TASK] NewsDigest {news_digest_id}: Processing with criteria: {generation_criteria}")
-        
-        # 1. Get News Content
-        news_processor = news_processing_service.NewsProcessingService()
-        processed_news_content = await news_processor.get_content_for_news_digest(
-            criteria=generation_criteria,
-            user_id=user_id
-        )
-
-        if not processed_news_content or processed_news_content.strip().startswith("No news content") or processed_news_content.strip().startswith("This is placeholder news content") :
-            logger.error(f"[BG_TASK] NewsDigest {news_digest_id}: News processing returned no or placeholder content. Content: {processed_news_content[:200]}")
-            news_digest.status = NewsDigestStatus.FAILED
-            news_digest.error_message = "Failed to process news content or no content found for criteria."
-            if processed_news_content and len(processed_news_content) < 255 and (processed_news_content.strip().startswith("No news content") or processed_news_content.strip().startswith("This is placeholder news content")):
-                 news_digest.error_message = processed_news_content.strip()
-            db.commit()
-            return
-        
-        logger.info(f"[BG_TASK] NewsDigest {news_digest_id}: News content processed. Length: {len(processed_news_content)}")
-
-        news_digest.status = NewsDigestStatus.PENDING_AUDIO
-        db.commit()
-
-        language = generation_criteria.get("language", "en")
-        audio_style = generation_criteria.get("audio_style", "standard")
-
-        generated_script = await llm_service.generate_news_podcast_script(
-            news_items_content=processed_news_content,
-            language_iso_code=language,
-            audio_style_key=audio_style,
-            user_google_api_key=user_google_api_key
-        )
-        news_digest.generated_script_text = generated_script
-        logger.info(f"[BG_TASK] NewsDigest {news_digest_id}: Script generated. Length: {len(generated_script)}")
-        db.commit()
-
-        audio_url, error_msg = await podcast_service.generate_podcast_audio_for_digest(
-            db=db,
-            news_digest_id=news_digest_id,
-            language=language,
-            audio_style=audio_style,
-            force_regenerate=force_regenerate,
-            user_openai_api_key=user_openai_api_key
-        )
-
-        if error_msg:
-            logger.error(f"[BG_TASK] NewsDigest {news_digest_id}: Audio generation failed: {error_msg}")
-        else:
-            logger.info(f"[BG_TASK] NewsDigest {news_digest_id}: Audio generation successful. URL: {audio_url}")
-
-    except Exception as e:
-        logger.exception(f"[BG_TASK] NewsDigest {news_digest_id}: Unhandled exception: {e}")
-        if news_digest:
-            news_digest.status = NewsDigestStatus.FAILED
-            news_digest.error_message = f"Background task failed: {str(e)[:200]}"
-            db.commit()
-    finally:
-        pass
-
 @router.post("/generate-podcast", 
               response_model=podcast_schemas.PodcastGenerationResponse, 
               status_code=status.HTTP_202_ACCEPTED)
@@ -147,13 +78,21 @@ async def generate_podcast_endpoint(
     *,
     db: Session = Depends(deps.get_db_session),
     request: podcast_schemas.PodcastGenerationRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     logger.info(f"User {current_user.id} requested podcast generation with payload: {request.model_dump(exclude_none=True, exclude={'user_openai_api_key', 'user_google_api_key'})}")
 
     generation_criteria: Dict[str, Any] = {} 
     source_info_for_digest: Dict[str, Any] = {}
+    shared_category_edition = False # Predefined category with no request_* overrides
+
+    output_formats: Optional[List[str]] = None
+    if request.output_formats:
+        try:
+            output_formats = audio_formats.parse_formats(request.output_formats)
+            audio_formats.check_formats_producible(output_formats)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # Mode 1: Specific Article URLs (Highest Priority)
     if request.specific_article_urls and str(request.specific_article_urls[0]).strip() != "": # Check if not just empty strings
@@ -196,6 +135,11 @@ async def generate_podcast_endpoint(
         
         generation_criteria["source_type"] = "direct_input" 
 
+        shared_category_edition = all(override is None for override in (
+            request.request_topics, request.request_keywords, request.request_rss_urls,
+            request.request_exclude_keywords, request.request_exclude_source_domains
+        ))
+
         source_info_for_digest = {
             "source_type": "predefined_category_resolved",
             "predefined_category_id": category.id,
@@ -316,22 +260,14 @@ async def generate_podcast_endpoint(
     logger.info(f"User {current_user.id}: Final source_info_for_digest for caching: {source_info_for_digest}")
 
     # --- Cache Check Logic ---
+    fingerprint = criteria_fingerprint(generation_criteria)
     if not request.force_regenerate:
-        logger.info(f"User {current_user.id}: Checking cache for podcast. Effective lang={effective_language}, style={effective_audio_style}, source_info_keys={list(source_info_for_digest.keys()) if source_info_for_digest else 'N/A'}")
-        
-        cached_digest = db.query(NewsDigest) \
-            .join(NewsDigest.podcast_episode) \
-            .filter(
-                NewsDigest.user_id == current_user.id,
-                cast(NewsDigest.original_articles_info, TEXT) == str(source_info_for_digest), # Cast DB JSON to TEXT and compare with stringified dict
-                NewsDigest.status == NewsDigestStatus.COMPLETED,
-                PodcastEpisode.language == effective_language,
-                PodcastEpisode.audio_style == effective_audio_style,
-                PodcastEpisode.audio_url.isnot(None)
-            ) \
-            .order_by(NewsDigest.created_at.desc()) \
-            .first()
+        logger.info(f"User {current_user.id}: Checking cache for podcast. Effective lang={effective_language}, style={effective_audio_style}, fingerprint={fingerprint[:12]}")
 
+        cached_digest = coalescing.find_completed_podcast(
+            db, fingerprint, effective_language, effective_audio_style,
+            max_age_minutes=settings.PODCAST_CACHE_MAX_AGE_MINUTES, user_id=current_user.id
+        )
         if cached_digest and cached_digest.podcast_episode:
             logger.info(f"User {current_user.id}: Cache hit. Reusing NewsDigest ID {cached_digest.id} (Episode ID {cached_digest.podcast_episode.id})")
             return podcast_schemas.PodcastGenerationResponse(
@@ -339,62 +275,72 @@ async def generate_podcast_endpoint(
                 initial_status=str(cached_digest.status), # status is already a string
                 message="Podcast retrieved from cache. Audio is available."
             )
-        else:
-            logger.info(f"User {current_user.id}: No suitable completed podcast found in cache. Proceeding with new generation.")
+
+        # A predefined category without overrides is the same podcast for every subscriber: the current
+        # edition, generated for whoever asked first, is shared instead of generated again.
+        if shared_category_edition and settings.CATEGORY_PODCAST_SHARE_MINUTES > 0:
+            edition = coalescing.find_completed_podcast(
+                db, fingerprint, effective_language, effective_audio_style,
+                max_age_minutes=settings.CATEGORY_PODCAST_SHARE_MINUTES
+            )
+            if edition and edition.podcast_episode:
+                news_digest = coalescing.copy_completed_digest(db, edition, current_user.id, original_articles_info=source_info_for_digest)
+                logger.info(f"User {current_user.id}: Shared category edition NewsDigest ID {edition.id} as NewsDigest ID {news_digest.id}")
+                return podcast_schemas.PodcastGenerationResponse(
+                    news_digest_id=news_digest.id,
+                    initial_status=str(news_digest.status),
+                    message="Podcast retrieved from this category's current edition. Audio is available.",
+                    podcast_episode_id=news_digest.podcast_episode.id
+                )
+        logger.info(f"User {current_user.id}: No suitable completed podcast found in cache. Proceeding with new generation.")
     else:
         logger.info(f"User {current_user.id}: force_regenerate is True. Skipping cache check.")
     # --- End Cache Check Logic ---
 
     news_digest = NewsDigest(
         user_id=current_user.id,
-        original_articles_info=source_info_for_digest, # This is crucial for caching
-        status=NewsDigestStatus.PENDING_SCRIPT
+        original_articles_info=source_info_for_digest,
+        criteria_fingerprint=fingerprint, # This is crucial for caching
+        status=NewsDigestStatus.PENDING_SCRIPT,
+        progress={"event": ProgressEvent.QUEUED, "at": datetime.utcnow().isoformat()}
     )
     db.add(news_digest)
+    db.flush() # Assigns news_digest.id for the job
+
+    # Generation runs in a worker process (app/worker.py). The digest and its job are committed together,
+    # so an accepted request is never lost, even if the API restarts right after responding.
+    # A request identical to one in flight (from any user) waits for that job's result instead of running again.
+    user_api_keys = {"openai": request.user_openai_api_key, "google": request.user_google_api_key}
+    job = job_queue.enqueue_generation_job(
+        db,
+        news_digest=news_digest,
+        generation_criteria=generation_criteria, # Pass the fully resolved criteria
+        force_regenerate=request.force_regenerate,
+        output_formats=output_formats,
+        user_api_keys=user_api_keys,
+        coalesce_key=job_queue.coalesce_key(
+            criteria_fingerprint(generation_criteria, output_formats or audio_formats.default_formats()), # Same podcast and renditions
+            user_api_keys
+        ),
+    )
     db.commit()
+    job_queue.coalesce_with_earlier_leader(db, job) # Identical requests committed at the same moment
     db.refresh(news_digest)
-    logger.info(f"Created NewsDigest record ID: {news_digest.id} for user {current_user.id}")
+    logger.info(f"Created NewsDigest record ID: {news_digest.id} for user {current_user.id} and queued job {job.id}")
 
-    # Try to get podcast_episode_id if it was created synchronously (not typical with background tasks)
-    # However, the PodcastEpisode is typically created *within* the background task.
-    # So, this might be None here.
+    # The PodcastEpisode is created by the worker, so this is None unless an episode already exists.
     podcast_episode_id: Optional[int] = None
     if news_digest.podcast_episode:
         podcast_episode_id = news_digest.podcast_episode.id
 
-    background_tasks.add_task(
-        background_generate_full_podcast,
-        db=db,
-        news_digest_id=news_digest.id,
-        user_id=current_user.id,
-        generation_criteria=generation_criteria, # Pass the fully resolved criteria
-        force_regenerate=request.force_regenerate,
-        user_openai_api_key=request.user_openai_api_key,
-        user_google_api_key=request.user_google_api_key
-    )
-
     return podcast_schemas.PodcastGenerationResponse(
         news_digest_id=news_digest.id,
         initial_status=str(news_digest.status), # status is already a string
-        message="Podcast generation process started.", # Updated message for clarity
+        message="Joined an identical podcast generation already in progress." if job.leader_job_id else "Podcast generation queued.",
         podcast_episode_id=podcast_episode_id # May be None
     )
 
-@router.get("/podcast-status/{news_digest_id}", response_model=podcast_schemas.PodcastEpisodeStatusResponse)
-async def get_podcast_status_endpoint(
-    news_digest_id: int,
-    db: Session = Depends(deps.get_db_session),
-    current_user: User = Depends(deps.get_current_active_user)
-) -> Any:
-    logger.info(f"User {current_user.id} fetching status for NewsDigest ID: {news_digest_id}")
-    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
-
-    if not news_digest:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NewsDigest not found")
-
-    if news_digest.user_id != current_user.id and not current_user.is_superuser:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this digest status")
-
+def _build_status_response(news_digest: NewsDigest) -> podcast_schemas.PodcastEpisodeStatusResponse:
     # Initialize PodcastEpisode specific fields to None
     podcast_episode_id: Optional[int] = None
     user_given_name: Optional[str] = None
@@ -404,6 +350,10 @@ async def get_podcast_status_endpoint(
     episode_updated_at_iso: Optional[str] = None
     episode_expires_at_iso: Optional[str] = None
     audio_url: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    audio_format: Optional[str] = None
+    peaks_url: Optional[str] = None
+    renditions: List[podcast_schemas.AudioRendition] = []
 
     if news_digest.podcast_episode:
         episode = news_digest.podcast_episode
@@ -412,6 +362,10 @@ async def get_podcast_status_endpoint(
         episode_language = episode.language
         episode_audio_style = episode.audio_style
         audio_url = episode.audio_url # Keep this for direct audio_url access
+        duration_seconds = episode.duration_seconds
+        audio_format = episode.audio_format
+        peaks_url = episode.peaks_url
+        renditions = [podcast_schemas.AudioRendition.model_validate(rendition) for rendition in episode.renditions]
         if episode.created_at: episode_created_at_iso = episode.created_at.isoformat()
         if episode.updated_at: episode_updated_at_iso = episode.updated_at.isoformat()
         if episode.expires_at: episode_expires_at_iso = episode.expires_at.isoformat()
@@ -425,8 +379,10 @@ async def get_podcast_status_endpoint(
         news_digest_id=news_digest.id,
         status=str(news_digest.status),
         audio_url=audio_url, # This is the direct audio_url from podcast_episode
+        playlist_url=news_digest.playlist_url,
         script_preview=script_preview,
         error_message=news_digest.error_message,
+        progress=news_digest.progress,
         created_at=news_digest.created_at.isoformat(),
         updated_at=news_digest.updated_at.isoformat(),
         
@@ -437,6 +393,257 @@ async def get_podcast_status_endpoint(
         episode_created_at=episode_created_at_iso,
         episode_updated_at=episode_updated_at_iso,
         episode_expires_at=episode_expires_at_iso,
+        duration_seconds=duration_seconds,
+        audio_format=audio_format,
+        peaks_url=peaks_url,
+        renditions=renditions,
+    )
+
+@router.get("/podcast-status/{news_digest_id}", response_model=podcast_schemas.PodcastEpisodeStatusResponse)
+async def get_podcast_status_endpoint(
+    news_digest_id: int,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    logger.info(f"User {current_user.id} fetching status for NewsDigest ID: {news_digest_id}")
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+
+    if not news_digest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NewsDigest not found")
+
+    if news_digest.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this digest status")
+
+    return _build_status_response(news_digest)
+
+@router.post("/status:batch", response_model=podcast_schemas.PodcastStatusBatchResponse)
+async def get_podcast_statuses_endpoint(
+    request: podcast_schemas.PodcastStatusBatchRequest,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user),
+    if_none_match: Optional[str] = Header(None)
+) -> Any:
+    """
+    Statuses of several digests, loaded with their episodes and renditions in one joined query.
+    The ETag comes from one aggregate query over the visible digests and their episodes (see
+    _statuses_etag): sent back as If-None-Match, it gets an empty 304 response before any row is loaded,
+    until anything in them changes (however soon after the last poll).
+    """
+    digest_ids = list(dict.fromkeys(request.news_digest_ids)) # Without repeats, in request order
+    visible = [NewsDigest.id.in_(digest_ids)]
+    if not current_user.is_superuser:
+        visible.append(NewsDigest.user_id == current_user.id)
+
+    # Taken before the rows are loaded, so a change in between only makes the next poll load them again
+    etag = _statuses_etag(db, digest_ids, visible)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    news_digests = db.query(NewsDigest) \
+        .options(joinedload(NewsDigest.podcast_episode).joinedload(PodcastEpisode.renditions)) \
+        .filter(*visible) \
+        .all()
+    by_id = {news_digest.id: news_digest for news_digest in news_digests}
+    batch = podcast_schemas.PodcastStatusBatchResponse(
+        items=[_build_status_response(by_id[digest_id]) for digest_id in digest_ids if digest_id in by_id]
+    )
+    return Response(content=batch.model_dump_json(), media_type="application/json", headers=headers)
+
+def _statuses_etag(db: Session, digest_ids: List[int], visible: List[Any]) -> str:
+    """
+    Weak validator of the batch statuses. Every field of a status comes from the digest or its episode row
+    (progress included; renditions are written with their episode), and each UPDATE bumps that row's
+    row_version. Summed ids catch a row replaced by another (e.g. a regenerated episode starting at 0).
+    """
+    aggregate = db.query(
+        func.count(NewsDigest.id),
+        func.sum(NewsDigest.id),
+        func.sum(NewsDigest.row_version),
+        func.max(NewsDigest.updated_at),
+        func.count(PodcastEpisode.id),
+        func.sum(PodcastEpisode.id),
+        func.sum(PodcastEpisode.row_version),
+        func.max(PodcastEpisode.updated_at),
+    ).select_from(NewsDigest) \
+        .outerjoin(PodcastEpisode, PodcastEpisode.news_digest_id == NewsDigest.id) \
+        .filter(*visible) \
+        .one()
+    validator = json.dumps([digest_ids, [str(value) for value in aggregate]]) # Items follow the requested order
+    return f'W/"{hashlib.sha256(validator.encode("utf-8")).hexdigest()[:32]}"'
+
+# --- Status stream (Server-Sent Events) ---
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _followed_progress(db: Session, news_digest: NewsDigest) -> Optional[Dict[str, Any]]:
+    """Progress of the digest, or of the identical generation it waits on (see app/services/coalescing.py)."""
+    waiting_job = db.query(GenerationJob).filter(
+        GenerationJob.news_digest_id == news_digest.id,
+        GenerationJob.status == JobStatus.WAITING,
+        GenerationJob.leader_job_id.isnot(None)
+    ).first()
+    if waiting_job:
+        leader_job = db.get(GenerationJob, waiting_job.leader_job_id)
+        leader_digest = db.get(NewsDigest, leader_job.news_digest_id) if leader_job and leader_job.news_digest_id else None
+        if leader_digest and leader_digest.progress:
+            return leader_digest.progress
+    return news_digest.progress
+
+async def _status_events(news_digest_id: int, request: Request):
+    """
+    Sends the full status first and whenever it changes, and each new progress event, until the digest is
+    COMPLETED or FAILED. Progress published in this process wakes the stream at once; progress from workers
+    is read back from the digest every STATUS_STREAM_POLL_SECONDS.
+    """
+    wakeups = progress_events.subscribers.subscribe(news_digest_id)
+    closes_at = time.monotonic() + settings.STATUS_STREAM_MAX_SECONDS
+    last_status: Optional[str] = None
+    last_progress: Optional[Dict[str, Any]] = None
+    try:
+        while True:
+            db = SessionLocal() # Per read: the request's session would stay open for the stream's lifetime
+            try:
+                news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+                if not news_digest:
+                    yield _sse("error", {"detail": "NewsDigest not found"})
+                    return
+                if news_digest.status != last_status:
+                    last_status = news_digest.status
+                    yield _sse("status", _build_status_response(news_digest).model_dump(mode="json"))
+                progress = _followed_progress(db, news_digest)
+                if progress and progress != last_progress:
+                    last_progress = progress
+                    yield _sse("progress", progress)
+                if news_digest.status in FINAL_DIGEST_STATUSES:
+                    return
+            finally:
+                db.close()
+            if time.monotonic() >= closes_at or await request.is_disconnected():
+                return
+            try:
+                await asyncio.wait_for(wakeups.get(), timeout=settings.STATUS_STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        progress_events.subscribers.unsubscribe(news_digest_id, wakeups)
+
+@router.get("/podcast-status/{news_digest_id}/events")
+async def stream_podcast_status_endpoint(
+    news_digest_id: int,
+    request: Request,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Server-Sent Events replacing polling of /podcast-status: a `status` event (PodcastEpisodeStatusResponse)
+    first and on every status change, `progress` events (fetching, articles_fetched, script_ready, chunk_ready
+    with chunks_done/chunks_total, audio_ready, ...) in between. Authenticated once, when opened. The stream
+    ends once generation ended (COMPLETED, FAILED, CANCELLED or TIMED_OUT), or after STATUS_STREAM_MAX_SECONDS (reconnect to continue).
+    """
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+    if not news_digest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NewsDigest not found")
+    if news_digest.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this digest status")
+    logger.info(f"User {current_user.id} streaming status of NewsDigest ID: {news_digest_id}")
+    return StreamingResponse(
+        _status_events(news_digest_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"} # No proxy buffering of events
+    )
+
+@router.post("/{news_digest_id}/cancel", response_model=podcast_schemas.PodcastEpisodeStatusResponse)
+async def cancel_podcast_generation_endpoint(
+    news_digest_id: int,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Cancels the digest's generation, wherever it is: a queued job is never run, and a worker running it
+    stops at its next lease renewal and removes partial audio. Identical requests that were waiting on it
+    carry on without it. Returns the digest's status (CANCELLED); 409 if generation already ended.
+    """
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+    if not news_digest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NewsDigest not found")
+    if news_digest.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to cancel this podcast generation")
+    if news_digest.status in FINAL_DIGEST_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Podcast generation already ended ({news_digest.status}).")
+
+    job = job_queue.get_unfinished_job(db, news_digest_id)
+    if job is not None and job_queue.cancel_job(db, job.id):
+        try:
+            coalescing.promote_follower(db, job)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Job {job.id}: handing over to the jobs waiting on it failed: {e}", exc_info=True)
+
+    error_message = "Generation cancelled by its owner."
+    news_digest.status = NewsDigestStatus.CANCELLED
+    news_digest.error_message = error_message
+    db.commit()
+    progress_events.publish(news_digest_id, ProgressEvent.CANCELLED, message=error_message)
+    db.refresh(news_digest)
+    logger.info(f"User {current_user.id} cancelled generation of NewsDigest {news_digest_id}.")
+    return _build_status_response(news_digest)
+
+@router.post("/{news_digest_id}/resume", response_model=podcast_schemas.PodcastGenerationResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_podcast_generation_endpoint(
+    news_digest_id: int,
+    request: Optional[podcast_schemas.PodcastResumeRequest] = None,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Queues a failed, cancelled or timed-out generation again from its first incomplete stage, reusing what
+    earlier attempts produced: the fetched news, the script and every synthesized audio chunk. With
+    force_regenerate, a COMPLETED podcast gets new audio from its existing script.
+    """
+    request = request or podcast_schemas.PodcastResumeRequest()
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+    if not news_digest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NewsDigest not found")
+    if news_digest.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to resume this podcast generation")
+    resumable = [NewsDigestStatus.FAILED, NewsDigestStatus.CANCELLED, NewsDigestStatus.TIMED_OUT]
+    if request.force_regenerate:
+        resumable.append(NewsDigestStatus.COMPLETED)
+    if news_digest.status not in resumable or job_queue.get_unfinished_job(db, news_digest_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Podcast generation cannot be resumed while {news_digest.status}.")
+    previous_job = job_queue.get_latest_job(db, news_digest_id)
+    if previous_job is None or not (previous_job.payload or {}).get("generation_criteria"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The criteria of this podcast's generation are no longer known; request a new podcast.")
+
+    output_formats: Optional[List[str]] = previous_job.payload.get("output_formats")
+    if request.output_formats:
+        try:
+            output_formats = audio_formats.parse_formats(request.output_formats)
+            audio_formats.check_formats_producible(output_formats)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    stage = podcast_pipeline.first_incomplete_stage(news_digest)
+    job = job_queue.enqueue_generation_job(
+        db,
+        news_digest=news_digest,
+        generation_criteria=previous_job.payload["generation_criteria"],
+        force_regenerate=request.force_regenerate,
+        output_formats=output_formats,
+        user_api_keys={"openai": request.user_openai_api_key, "google": request.user_google_api_key},
+        stage=stage,
+    )
+    news_digest.status = NewsDigestStatus.PENDING_AUDIO if stage == JobStage.AUDIO else NewsDigestStatus.PENDING_SCRIPT
+    news_digest.error_message = None
+    news_digest.progress = {"event": ProgressEvent.QUEUED, "at": datetime.utcnow().isoformat()}
+    db.commit()
+    logger.info(f"User {current_user.id} resumed generation of NewsDigest {news_digest_id} at stage {stage} (job {job.id}).")
+    return podcast_schemas.PodcastGenerationResponse(
+        news_digest_id=news_digest.id,
+        initial_status=str(news_digest.status),
+        message=f"Podcast generation resumed at the {stage.lower()} stage.",
+        podcast_episode_id=news_digest.podcast_episode.id if news_digest.podcast_episode else None
     )
 
 @router.get("/my-podcasts", response_model=podcast_schemas.UserPodcastsListResponse)
@@ -459,7 +666,8 @@ async def list_my_podcasts(
         .join(PodcastEpisode, NewsDigest.id == PodcastEpisode.news_digest_id) \
         .filter(NewsDigest.user_id == current_user.id) \
         .filter(NewsDigest.status == NewsDigestStatus.COMPLETED) \
-        .filter(PodcastEpisode.audio_url.isnot(None))
+        .filter(PodcastEpisode.audio_url.isnot(None)) \
+        .options(selectinload(PodcastEpisode.renditions))
         # Optionally, filter out expired podcasts strictly at DB level:
         # .filter(PodcastEpisode.expires_at > datetime.utcnow())
 
@@ -489,6 +697,10 @@ async def list_my_podcasts(
                 digest_created_at=news_digest.created_at.isoformat(),
                 episode_created_at=podcast_episode.created_at.isoformat(),
                 episode_expires_at=podcast_episode.expires_at.isoformat() if podcast_episode.expires_at else None,
+                duration_seconds=podcast_episode.duration_seconds,
+                audio_format=podcast_episode.audio_format,
+                peaks_url=podcast_episode.peaks_url,
+                renditions=[podcast_schemas.AudioRendition.model_validate(rendition) for rendition in podcast_episode.renditions],
             )
         )
     
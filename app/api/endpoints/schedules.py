@@ -0,0 +1,117 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+
+from app.api import deps
+from app.core.config import settings
+from app.models.user_models import User
+from app.models.schedule_models import PodcastSchedule
+from app.models.predefined_category_models import PredefinedCategory
+from app.schemas import schedule_schemas
+from app.services import podcast_scheduler
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def _get_own_schedule(db: Session, schedule_id: int, user: User) -> PodcastSchedule:
+    schedule = db.query(PodcastSchedule).filter(PodcastSchedule.id == schedule_id, PodcastSchedule.user_id == user.id).first()
+    if not schedule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Podcast schedule not found.")
+    return schedule
+
+def _validate(db: Session, data: Dict[str, Any]) -> None:
+    """Rejects times, time zones and categories a schedule could not run with."""
+    try:
+        if "time_of_day" in data:
+            podcast_scheduler.parse_time_of_day(data["time_of_day"] or "")
+        if "timezone" in data:
+            podcast_scheduler.get_timezone(data["timezone"] or "")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if data.get("predefined_category_id") is not None:
+        category = db.query(PredefinedCategory).filter(
+            PredefinedCategory.id == data["predefined_category_id"],
+            PredefinedCategory.is_active == True
+        ).first()
+        if not category:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Predefined category ID {data['predefined_category_id']} not found or not active.")
+
+@router.get("/", response_model=List[schedule_schemas.PodcastScheduleInDB])
+async def list_podcast_schedules(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the current user's podcast schedules, by listening time.
+    """
+    return db.query(PodcastSchedule) \
+        .filter(PodcastSchedule.user_id == current_user.id) \
+        .order_by(PodcastSchedule.time_of_day, PodcastSchedule.id) \
+        .all()
+
+@router.post("/", response_model=schedule_schemas.PodcastScheduleInDB, status_code=status.HTTP_201_CREATED)
+async def create_podcast_schedule(
+    *,
+    db: Session = Depends(deps.get_db_session),
+    schedule_in: schedule_schemas.PodcastScheduleCreate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Schedule a daily podcast, generated ahead of its listening time so it is ready to play then.
+    """
+    data = schedule_in.model_dump()
+    _validate(db, data)
+    count = db.query(PodcastSchedule).filter(PodcastSchedule.user_id == current_user.id).count()
+    if count >= settings.SCHEDULE_MAX_PER_USER:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"At most {settings.SCHEDULE_MAX_PER_USER} podcast schedules per user.")
+
+    schedule = PodcastSchedule(user_id=current_user.id, **data)
+    db.add(schedule)
+    db.flush() # The schedule's id places it in the spread window
+    podcast_scheduler.reschedule(schedule)
+    db.commit()
+    db.refresh(schedule)
+    logger.info(f"User {current_user.id} created PodcastSchedule {schedule.id} at {schedule.time_of_day} {schedule.timezone}; first run at {schedule.next_run_at} UTC.")
+    return schedule
+
+@router.put("/{schedule_id}", response_model=schedule_schemas.PodcastScheduleInDB)
+async def update_podcast_schedule(
+    *,
+    schedule_id: int,
+    db: Session = Depends(deps.get_db_session),
+    schedule_in: schedule_schemas.PodcastScheduleUpdate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Update one of the current user's podcast schedules. Its next run is recomputed.
+    """
+    schedule = _get_own_schedule(db, schedule_id, current_user)
+    update_data = schedule_in.model_dump(exclude_unset=True)
+    for field in ("time_of_day", "timezone", "is_active"):
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{field} cannot be null.")
+    _validate(db, update_data)
+
+    for field, value in update_data.items():
+        setattr(schedule, field, value)
+    podcast_scheduler.reschedule(schedule)
+    db.commit()
+    db.refresh(schedule)
+    logger.info(f"User {current_user.id} updated PodcastSchedule {schedule.id} with data: {update_data}")
+    return schedule
+
+@router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_podcast_schedule(
+    schedule_id: int,
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Response:
+    """
+    Delete one of the current user's podcast schedules. Podcasts it already queued are kept.
+    """
+    schedule = _get_own_schedule(db, schedule_id, current_user)
+    db.delete(schedule)
+    db.commit()
+    logger.info(f"User {current_user.id} deleted PodcastSchedule {schedule_id}.")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,39 @@
+import logging
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Any, Optional
+
+from app.api import deps
+from app.models.user_models import User
+from app.schemas import usage_schemas
+from app.services import usage_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/me", response_model=usage_schemas.UsageAggregateResponse)
+async def read_my_usage(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user),
+    since: Optional[datetime] = Query(None, description="Only count usage recorded at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only count usage recorded before this time (UTC)."),
+) -> Any:
+    """
+    LLM token and TTS character totals for the current user's digests, per usage kind.
+    """
+    items = usage_service.aggregate_usage(db, user_id=current_user.id, since=since, until=until)
+    return usage_schemas.UsageAggregateResponse(items=items)
+
+@router.get("/me/by-category", response_model=usage_schemas.UsageAggregateResponse)
+async def read_my_usage_by_category(
+    db: Session = Depends(deps.get_db_session),
+    current_user: User = Depends(deps.get_current_active_user),
+    since: Optional[datetime] = Query(None, description="Only count usage recorded at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only count usage recorded before this time (UTC)."),
+) -> Any:
+    """
+    The current user's usage per predefined category (predefined_category_id is null for other requests).
+    """
+    items = usage_service.aggregate_usage(db, group_by="category", user_id=current_user.id, since=since, until=until)
+    return usage_schemas.UsageAggregateResponse(items=items)
@@ -0,0 +1 @@
+# Maintenance commands, run as modules, e.g. `python -m app.commands.backfill_episode_durations`
@@ -0,0 +1,67 @@
+"""
+Fills PodcastEpisode.duration_seconds for episodes created before durations were recorded.
+
+Usage (from the project root):
+    python -m app.commands.backfill_episode_durations            # only episodes without a duration
+    python -m app.commands.backfill_episode_durations --all      # recompute every episode
+    python -m app.commands.backfill_episode_durations --dry-run  # report without writing
+"""
+import argparse
+import logging
+import os
+
+from app.db.database import SessionLocal
+from app.models import news_models # noqa: F401 - registers the ORM models
+from app.models.news_models import PodcastEpisode
+from app.services.audio_formats import file_duration_seconds
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+def backfill_episode_durations(recompute_all: bool = False, dry_run: bool = False, batch_size: int = 200) -> dict:
+    """
+    Reads each episode's audio headers (no decoding) and stores the duration.
+    Returns:
+        Counts of updated, missing-file and unreadable episodes.
+    """
+    counts = {"updated": 0, "missing_file": 0, "unreadable": 0}
+    db = SessionLocal()
+    try:
+        query = db.query(PodcastEpisode).filter(PodcastEpisode.file_path.isnot(None))
+        if not recompute_all:
+            query = query.filter(PodcastEpisode.duration_seconds.is_(None))
+        last_id = 0
+        while True:
+            episodes = query.filter(PodcastEpisode.id > last_id).order_by(PodcastEpisode.id).limit(batch_size).all()
+            if not episodes:
+                break
+            for episode in episodes:
+                last_id = episode.id
+                if not os.path.exists(episode.file_path):
+                    counts["missing_file"] += 1
+                    continue
+                try:
+                    duration = file_duration_seconds(episode.file_path, episode.audio_format or "mp3")
+                except OSError as e:
+                    logger.warning(f"Episode {episode.id}: could not read {episode.file_path}: {e}")
+                    duration = None
+                if duration is None:
+                    counts["unreadable"] += 1
+                    continue
+                episode.duration_seconds = round(duration)
+                counts["updated"] += 1
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+    finally:
+        db.close()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill podcast episode durations from audio headers.")
+    parser.add_argument("--all", action="store_true", help="Recompute durations that are already set.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+    args = parser.parse_args()
+    result = backfill_episode_durations(recompute_all=args.all, dry_run=args.dry_run)
+    logger.info(f"Backfill finished{' (dry run)' if args.dry_run else ''}: {result}")
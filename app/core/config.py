@@ -16,6 +16,14 @@ class Settings:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "YOUR_OPENAI_API_KEY_HERE")
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "YOUR_GOOGLE_API_KEY_HERE") # Added for Gemini
 
+    # API Key Pools - comma-separated "key" or "key:weight" entries. When set, these replace the single keys above.
+    OPENAI_API_KEYS: str = os.getenv("OPENAI_API_KEYS", "")
+    GOOGLE_API_KEYS: str = os.getenv("GOOGLE_API_KEYS", "")
+    KEY_POOL_ERROR_WINDOW: int = int(os.getenv("KEY_POOL_ERROR_WINDOW", 20)) # Recent calls considered for a key's error rate
+    KEY_POOL_MIN_SAMPLES: int = int(os.getenv("KEY_POOL_MIN_SAMPLES", 5)) # Calls needed before error-rate ejection applies
+    KEY_POOL_ERROR_RATE_THRESHOLD: float = float(os.getenv("KEY_POOL_ERROR_RATE_THRESHOLD", 0.5))
+    KEY_POOL_EJECTION_SECONDS: int = int(os.getenv("KEY_POOL_EJECTION_SECONDS", 60)) # Default time an unhealthy key sits out
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./newslistener.db")
 
@@ -24,6 +32,38 @@ class Settings:
     OPENAI_TTS_VOICE: str = os.getenv("OPENAI_TTS_VOICE", "alloy") # Options: alloy, echo, fable, onyx, nova, shimmer
     TTS_CHUNK_CHAR_LIMIT: int = int(os.getenv("TTS_CHUNK_CHAR_LIMIT", 3000))
     TTS_CHUNK_PAUSE_MS: int = int(os.getenv("TTS_CHUNK_PAUSE_MS", 200)) # Milliseconds
+    TTS_CHUNK_TARGET_PARALLELISM: int = int(os.getenv("TTS_CHUNK_TARGET_PARALLELISM", 6)) # Chunks synthesized concurrently per episode
+    TTS_CHUNK_MIN_CHARS: int = int(os.getenv("TTS_CHUNK_MIN_CHARS", 600)) # Scripts are not split below this chunk size just for parallelism
+    TTS_CHUNK_MEMORY_LIMIT_KB: int = int(os.getenv("TTS_CHUNK_MEMORY_LIMIT_KB", 8192)) # Synthesized chunks larger than this spill to TTS_CHUNK_SPILL_DIR
+    TTS_CHUNK_SPILL_DIR: str = os.getenv("TTS_CHUNK_SPILL_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else "") # Empty: system temp directory
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true" # Reuse audio for identical chunks
+    TTS_CACHE_MAX_MB: int = int(os.getenv("TTS_CACHE_MAX_MB", 1024)) # Least recently used entries are evicted beyond this
+    TTS_SEGMENTED_OUTPUT: bool = os.getenv("TTS_SEGMENTED_OUTPUT", "false").lower() == "true" # Also publish chunks as an HLS playlist while generating
+    TTS_SEGMENTS_GRACE_MINUTES: int = int(os.getenv("TTS_SEGMENTS_GRACE_MINUTES", 120)) # Segments of a stored episode stay this long for listeners still on the playlist
+    TTS_STOCK_CLIPS_ENABLED: bool = os.getenv("TTS_STOCK_CLIPS_ENABLED", "true").lower() == "true" # Splice pre-rendered intro/outro instead of scripting them
+
+    # Episode audio formats - comma-separated, first one is the episode's audio_url; each is stored as a rendition
+    AUDIO_OUTPUT_FORMATS: str = os.getenv("AUDIO_OUTPUT_FORMATS", "") # Supported: mp3, opus, aac; unset stores opus (mp3 without ffmpeg)
+    AUDIO_OPUS_BITRATE: str = os.getenv("AUDIO_OPUS_BITRATE", "24k") # Used when transcoding
+    AUDIO_AAC_BITRATE: str = os.getenv("AUDIO_AAC_BITRATE", "48k") # Used when transcoding
+    WAVEFORM_PEAKS_ENABLED: bool = os.getenv("WAVEFORM_PEAKS_ENABLED", "true").lower() == "true" # Peaks sidecar next to each episode
+    WAVEFORM_BUCKETS_PER_SECOND: int = int(os.getenv("WAVEFORM_BUCKETS_PER_SECOND", 10))
+
+    # Job queue - generation runs in `python -m app.worker` processes, not in the API
+    # Jobs run at the same time per worker process, per pipeline stage
+    WORKER_FETCH_CONCURRENCY: int = int(os.getenv("WORKER_FETCH_CONCURRENCY", 8))
+    WORKER_SCRIPT_CONCURRENCY: int = int(os.getenv("WORKER_SCRIPT_CONCURRENCY", 4))
+    WORKER_AUDIO_CONCURRENCY: int = int(os.getenv("WORKER_AUDIO_CONCURRENCY", 4))
+    WORKER_CPU_PROCESSES: int = int(os.getenv("WORKER_CPU_PROCESSES", 2)) # Parsing, transcoding and peaks; 0 runs them in threads
+    WORKER_POLL_INTERVAL_SECONDS: float = float(os.getenv("WORKER_POLL_INTERVAL_SECONDS", 2)) # Idle slots poll this often
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", 120)) # A job whose worker stops renewing is reclaimed after this
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    JOB_RETRY_BACKOFF_SECONDS: int = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 30)) # Doubles with each failed attempt
+    JOB_DEADLINE_SECONDS: int = int(os.getenv("JOB_DEADLINE_SECONDS", 3600)) # From enqueueing; the job times out after this, retries included
+    JOB_FETCH_TIMEOUT_SECONDS: int = int(os.getenv("JOB_FETCH_TIMEOUT_SECONDS", 300)) # Per attempt of each stage; an attempt running longer is cancelled and retried
+    JOB_SCRIPT_TIMEOUT_SECONDS: int = int(os.getenv("JOB_SCRIPT_TIMEOUT_SECONDS", 300))
+    JOB_AUDIO_TIMEOUT_SECONDS: int = int(os.getenv("JOB_AUDIO_TIMEOUT_SECONDS", 900))
+    JOB_REAPER_INTERVAL_SECONDS: int = int(os.getenv("JOB_REAPER_INTERVAL_SECONDS", 60)) # Workers time out jobs and digests past their deadline this often
 
     # Static files
     # Correctly determine the project root relative to this config file
@@ -32,12 +72,21 @@ class Settings:
     APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # This is /app
     STATIC_DIR: str = os.path.join(APP_DIR, "static")
     STATIC_AUDIO_DIR: str = os.path.join(STATIC_DIR, "audio")
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(APP_DIR), ".tts_cache")) # Not served publicly
+    STOCK_CLIPS_DIR: str = os.getenv("STOCK_CLIPS_DIR", os.path.join(os.path.dirname(APP_DIR), ".stock_clips")) # Pre-rendered intro/outro library
+    GENERATION_CHECKPOINT_MAX_AGE_HOURS: int = int(os.getenv("GENERATION_CHECKPOINT_MAX_AGE_HOURS", 48)) # Chunks pinned in the TTS cache by generations never resumed are unpinned after this
 
     # Ensure static audio directory exists
     os.makedirs(STATIC_AUDIO_DIR, exist_ok=True)
 
     # LLM Settings
     GEMINI_MODEL_NAME: str = os.getenv("GEMINI_MODEL_NAME", "gemini-1.0-pro") # Changed from gemini-pro to gemini-1.0-pro for more common naming
+    OPENAI_CHAT_MODEL_NAME: str = os.getenv("OPENAI_CHAT_MODEL_NAME", "gpt-4o-mini") # Alternate provider for script generation
+    LLM_PROVIDERS: str = os.getenv("LLM_PROVIDERS", "gemini,openai") # Comma-separated, in order of preference
+    LLM_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", 90)) # Re-issue to the alternate provider after this; 0 disables
+    LLM_ROUTER_RETRIES_PER_BACKEND: int = int(os.getenv("LLM_ROUTER_RETRIES_PER_BACKEND", 1)) # Retries on one provider before failing over
+    LLM_ROUTER_STATS_WINDOW: int = int(os.getenv("LLM_ROUTER_STATS_WINDOW", 20)) # Recent calls used for latency/error stats
+    LLM_ROUTER_ERROR_RATE_THRESHOLD: float = float(os.getenv("LLM_ROUTER_ERROR_RATE_THRESHOLD", 0.5)) # Above this a provider is only used as fallback
 
     # LangSmith Tracing Settings
     LANGSMITH_TRACING_V2: str = os.getenv("LANGSMITH_TRACING_V2", "true")
@@ -63,6 +112,17 @@ class Settings:
 
     # Podcast Settings
     PODCAST_RETENTION_DAYS: int = int(os.getenv("PODCAST_RETENTION_DAYS", 30)) # Days
+    STATUS_STREAM_POLL_SECONDS: float = float(os.getenv("STATUS_STREAM_POLL_SECONDS", 2)) # Status streams re-read the digest this often (progress from other processes)
+    STATUS_STREAM_MAX_SECONDS: int = int(os.getenv("STATUS_STREAM_MAX_SECONDS", 600)) # Streams close after this; clients reconnect
+    PODCAST_CACHE_MAX_AGE_MINUTES: int = int(os.getenv("PODCAST_CACHE_MAX_AGE_MINUTES", 180)) # Older podcasts are not reused for identical requests; 0: no limit
+    CATEGORY_PODCAST_SHARE_MINUTES: int = int(os.getenv("CATEGORY_PODCAST_SHARE_MINUTES", 60)) # A category edition is shared across users for this long; 0 disables sharing
+
+    # Podcast schedules - workers queue each scheduled podcast ahead of its listening time
+    SCHEDULE_LEAD_MINUTES: int = int(os.getenv("SCHEDULE_LEAD_MINUTES", 60)) # Generation is queued at least this long before the listening time
+    SCHEDULE_SPREAD_MINUTES: int = int(os.getenv("SCHEDULE_SPREAD_MINUTES", 120)) # ...plus a per-schedule offset within this window, spreading the load
+    SCHEDULE_JOB_PRIORITY: int = int(os.getenv("SCHEDULE_JOB_PRIORITY", 200)) # Behind on-demand requests (100)
+    SCHEDULE_POLL_SECONDS: int = int(os.getenv("SCHEDULE_POLL_SECONDS", 60)) # Workers queue due schedules this often
+    SCHEDULE_MAX_PER_USER: int = int(os.getenv("SCHEDULE_MAX_PER_USER", 5))
 
 settings = Settings()
 
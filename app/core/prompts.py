@@ -14,7 +14,7 @@ Create an **original audio script** that synthesizes the key information from th
     *   Use **short to medium-length sentences and paragraphs**.
     *   Incorporate **natural transition phrases** (e.g., "In other news...", "Turning now to...", "Meanwhile, in the world of tech...", "And finally, today...").
     *   If summarizing multiple items, provide a brief headline or hook for each before diving into details.
-    *   Include a brief, engaging introduction (e.g., "Welcome to today's news briefing.") and a concise closing (e.g., "That's all for this update. Stay informed.").
+    *   {intro_outro_instruction}
 4.  **Synthesize and Report:** Based on the "News Context" provided, extract the most important facts and present them coherently. Do not simply copy-paste. Rephrase and structure the information as a news report.
 5.  **Accuracy and Objectivity:** Stick to the information provided in the news context. Do not introduce external opinions or unverified facts.
 6.  **Clarity:** Ensure all information is presented clearly. If a news item is complex, break it down.
@@ -46,7 +46,7 @@ Crea un **guion de audio original** que sintetice la información clave del cont
     *   Utiliza **frases y párrafos de longitud corta a media**.
     *   Incorpora **frases de transición naturales** (p. ej., "En otras noticias...", "Pasando ahora a...", "Mientras tanto, en el mundo de la tecnología...", "Y finalmente, hoy...").
     *   Si resumes varios elementos, proporciona un breve titular o gancho para cada uno antes de entrar en detalles.
-    *   Incluye una introducción breve y atractiva (p. ej., "Bienvenidos al boletín de noticias de hoy.") y un cierre conciso (p. ej., "Eso es todo por esta actualización. Manténgase informado.").
+    *   {intro_outro_instruction}
 4.  **Sintetiza e Informa:** Basándote en el "Contexto de Noticias" proporcionado, extrae los hechos más importantes y preséntalos de forma coherente. No te limites a copiar y pegar. Reformula y estructura la información como un informe de noticias.
 5.  **Precisión y Objetividad:** Cíñete a la información proporcionada en el contexto de las noticias. No introduzcas opiniones externas o hechos no verificados.
 6.  **Claridad:** Asegúrate de que toda la información se presente con claridad. Si una noticia es compleja, desglósala.
@@ -81,7 +81,7 @@ Créez un **script audio original** qui synthétise les informations clés du co
     *   Utilisez des **phrases et des paragraphes de longueur courte à moyenne**.
     *   Incorporez des **phrases de transition naturelles** (par exemple, "Dans d'autres nouvelles...", "Passons maintenant à...", "Pendant ce temps, dans le monde de la technologie...", "Et enfin, aujourd'hui...").
     *   Si vous résumez plusieurs éléments, fournissez un bref titre ou une accroche pour chacun avant d'entrer dans les détails.
-    *   Incluez une introduction brève et engageante (par exemple, "Bienvenue au bulletin d'information d'aujourd'hui.") et une conclusion concise (par exemple, "C'est tout pour cette mise à jour. Restez informé.").
+    *   {intro_outro_instruction}
 4.  **Synthétiser et Rapporter:** Sur la base du "Contexte des Nouvelles" fourni, extrayez les faits les plus importants et présentez-les de manière cohérente. Ne vous contentez pas de copier-coller. Reformulez et structurez l'information comme un reportage d'actualités.
 5.  **Exactitude et Objectivité:** Tenez-vous-en aux informations fournies dans le contexte des nouvelles. N'introduisez pas d'opinions externes ou de faits no vérifiés.
 6.  **Clarté:** Assurez-vous que toutes les informations sont présentées clairement. Si un sujet d'actualité est complexe, décomposez-le.
@@ -109,6 +109,37 @@ NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG = {
     # Add other languages here
 }
 
+# --- Introduction / Closing Instructions ---
+# Substituted for {intro_outro_instruction} when a prompt is compiled. With pre-rendered stock clips
+# (TTS_STOCK_CLIPS_ENABLED) the welcome and sign-off are spliced in as audio, so the script must leave them out.
+NEWS_SCRIPT_INTRO_OUTRO_INSTRUCTION_BY_LANG = {
+    "en": 'Include a brief, engaging introduction (e.g., "Welcome to today\'s news briefing.") and a concise closing (e.g., "That\'s all for this update. Stay informed.").',
+    "es": 'Incluye una introducción breve y atractiva (p. ej., "Bienvenidos al boletín de noticias de hoy.") y un cierre conciso (p. ej., "Eso es todo por esta actualización. Manténgase informado.").',
+    "fr": 'Incluez une introduction brève et engageante (par exemple, "Bienvenue au bulletin d\'information d\'aujourd\'hui.") et une conclusion concise (par exemple, "C\'est tout pour cette mise à jour. Restez informé.").',
+}
+NEWS_SCRIPT_OMIT_INTRO_OUTRO_INSTRUCTION_BY_LANG = {
+    "en": "Do NOT include a welcome, introduction or closing sign-off: a pre-recorded introduction and closing are added automatically. Start directly with the first story and end right after the last one.",
+    "es": "NO incluyas saludo, introducción ni despedida: se añaden automáticamente una introducción y un cierre pregrabados. Empieza directamente con la primera noticia y termina justo después de la última.",
+    "fr": "N'incluez PAS de mot de bienvenue, d'introduction ni de formule de clôture : une introduction et une conclusion préenregistrées sont ajoutées automatiquement. Commencez directement par le premier sujet et terminez juste après le dernier.",
+}
+
+# --- Pre-rendered Stock Clips (see app/services/stock_clips.py) ---
+# Synthesized once per (language, audio style, voice) and reused for every episode.
+NEWS_STOCK_CLIP_TEXTS = {
+    "en": {
+        "intro": "Welcome to your NewsListener briefing. Here is what's happening today.",
+        "outro": "That's all for this update. Thanks for listening, and stay informed.",
+    },
+    "es": {
+        "intro": "Bienvenidos a su boletín de NewsListener. Esto es lo que está pasando hoy.",
+        "outro": "Eso es todo por esta actualización. Gracias por escucharnos y manténganse informados.",
+    },
+    "fr": {
+        "intro": "Bienvenue dans votre bulletin NewsListener. Voici l'essentiel de l'actualité du jour.",
+        "outro": "C'est tout pour cette mise à jour. Merci de votre écoute, et restez informés.",
+    },
+}
+
 # --- TTS Instruction Components (can be moved to config.py or kept here for locality) ---
 # These are defaults and can be overridden or augmented by the 'audio_style' parameter.
 
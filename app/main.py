@@ -12,6 +12,10 @@ from app.api.endpoints import podcast_generation
 from app.api.endpoints import preferences as preferences_router
 from app.api.endpoints import auth as auth_router # New auth router
 from app.api.endpoints import predefined_categories as predefined_categories_router # New router
+from app.api.endpoints import admin as admin_router
+from app.api.endpoints import usage as usage_router
+from app.api.endpoints import schedules as schedules_router
+from app.services import waveform, audio_formats
 from app.db.database import create_db_and_tables, SessionLocal # SessionLocal might be needed if we add logic
 
 # Ensure all model modules are imported before create_db_and_tables is called
@@ -20,6 +24,9 @@ from app.models import user_models # noqa
 from app.models import news_models # noqa
 from app.models import preference_models # noqa
 from app.models import predefined_category_models # noqa New model import
+from app.models import usage_models # noqa
+from app.models import job_models # noqa
+from app.models import schedule_models # noqa
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -45,12 +52,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allows all methods
     allow_headers=["*"], # Allows all headers
+    expose_headers=["ETag"], # Read back by the batch status polling (If-None-Match)
 )
 
+# --- Cache headers for waveform peaks sidecars (served from /static/audio) ---
+@app.middleware("http")
+async def peaks_cache_headers(request: Request, call_next):
+    response = await call_next(request)
+    path = request.url.path
+    if response.status_code == 200 and path.startswith("/static/audio/") and path.endswith(f".{waveform.PEAKS_FILE_EXTENSION}"):
+        response.headers["Cache-Control"] = waveform.PEAKS_CACHE_CONTROL
+    return response
+
 # --- Event Handlers ---
 @app.on_event("startup")
 def on_startup():
     logger.info("Starting up NewsListener application...")
+    audio_formats.check_formats_producible(audio_formats.default_formats()) # Fails startup on an unusable AUDIO_OUTPUT_FORMATS
 
     # Set LangSmith environment variables for tracing
     # This ensures LangSmith is configured for any LangChain/OpenAI calls
@@ -159,6 +177,9 @@ app.include_router(auth_router.router, prefix=f"{settings.API_V1_STR}/auth", tag
 app.include_router(podcast_generation.router, prefix=f"{settings.API_V1_STR}/podcasts", tags=["Podcasts"])
 app.include_router(preferences_router.router, prefix=f"{settings.API_V1_STR}/user/preferences", tags=["User Preferences"])
 app.include_router(predefined_categories_router.router, prefix=f"{settings.API_V1_STR}/predefined-categories", tags=["Predefined Categories"])
+app.include_router(schedules_router.router, prefix=f"{settings.API_V1_STR}/schedules", tags=["Podcast Schedules"])
+app.include_router(usage_router.router, prefix=f"{settings.API_V1_STR}/usage", tags=["Usage"])
+app.include_router(admin_router.router, prefix=f"{settings.API_V1_STR}/admin", tags=["Admin"])
 
 # --- Root Endpoint --- #
 @app.get(f"{settings.API_V1_STR}/health", tags=["Health"])
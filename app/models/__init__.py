@@ -2,4 +2,5 @@
 from .news_models import NewsDigest, PodcastEpisode # noqa Removed NewsSource, NewsArticle
 from .user_models import User # noqa
 from .preference_models import UserPreference # noqa
-from .predefined_category_models import PredefinedCategory # noqa 
\ No newline at end of file
+from .predefined_category_models import PredefinedCategory # noqa
+from .usage_models import UsageRecord # noqa 
\ No newline at end of file
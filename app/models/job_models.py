@@ -0,0 +1,96 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, Float, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+class JobStatus:
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    WAITING = "WAITING" # Attached to an identical in-flight job (leader_job_id) whose result it will share
+    CANCELLED = "CANCELLED" # By its owner
+    TIMED_OUT = "TIMED_OUT" # Past its deadline, or its stage kept exceeding the stage timeout
+
+# Statuses of jobs that are done, one way or another
+FINISHED_JOB_STATUSES = [JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMED_OUT]
+
+class JobKind:
+    GENERATE_PODCAST = "GENERATE_PODCAST"
+
+class JobStage:
+    FETCH = "FETCH" # News ingest: feeds, articles, parsing
+    SCRIPT = "SCRIPT" # LLM script
+    AUDIO = "AUDIO" # TTS, assembly, renditions
+
+# A job moves through these in order; each stage is its own queue with its own worker pool.
+STAGE_ORDER = [JobStage.FETCH, JobStage.SCRIPT, JobStage.AUDIO]
+
+class StageRunOutcome:
+    SUCCEEDED = "SUCCEEDED"
+    RETRYING = "RETRYING"
+    FAILED = "FAILED"
+    LEASE_LOST = "LEASE_LOST"
+    TIMED_OUT = "TIMED_OUT"
+    CANCELLED = "CANCELLED"
+
+class GenerationJob(Base):
+    """
+    A unit of pipeline work in the durable queue. Workers claim QUEUED jobs (or RUNNING jobs whose lease
+    ran out because their worker died) of the stage they serve by taking a lease, renew it while working,
+    and retry failed attempts with backoff until max_attempts. A finished stage requeues the job for the next one.
+    """
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index("ix_generation_jobs_claim", "status", "stage", "priority", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False, default=JobKind.GENERATE_PODCAST)
+    news_digest_id = Column(Integer, ForeignKey("news_digests.id", ondelete="CASCADE"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    stage = Column(String(20), nullable=False, default=JobStage.FETCH, server_default=JobStage.FETCH)
+    payload = Column(JSON, nullable=False) # Arguments of the job's handlers, plus outputs handed to later stages
+    encrypted_secrets = Column(Text, nullable=True) # User-provided API keys, encrypted; cleared when the job finishes
+
+    # Single-flight: jobs with the same key produce the same podcast, so while one runs the others wait for it
+    coalesce_key = Column(String(64), nullable=True, index=True)
+    leader_job_id = Column(Integer, ForeignKey("generation_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    status = Column(String(20), nullable=False, default=JobStatus.QUEUED, index=True)
+    priority = Column(Integer, nullable=False, default=100, server_default='100') # Lower runs first
+    attempts = Column(Integer, nullable=False, default=0, server_default='0') # Of the current stage
+    max_attempts = Column(Integer, nullable=False, default=3, server_default='3')
+    run_after = Column(DateTime, nullable=False, default=func.now(), server_default=func.now()) # Not claimed before this (retry backoff)
+    deadline_at = Column(DateTime, nullable=True, index=True) # The whole job times out at this point, whatever stage it is in
+
+    lease_owner = Column(String(100), nullable=True) # Worker id holding the job
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    news_digest = relationship("NewsDigest")
+
+    def __repr__(self):
+        return f"<GenerationJob(id={self.id}, kind='{self.kind}', status='{self.status}', attempts={self.attempts})>"
+
+class GenerationStageRun(Base):
+    """One attempt of one stage of a job, for per-stage throughput, latency and queue-wait metrics."""
+    __tablename__ = "generation_stage_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    stage = Column(String(20), nullable=False, index=True)
+    attempt = Column(Integer, nullable=False)
+    worker_id = Column(String(100), nullable=True)
+    outcome = Column(String(20), nullable=False) # StageRunOutcome
+    wait_seconds = Column(Float, nullable=True) # From due (run_after) to claimed
+    duration_seconds = Column(Float, nullable=True)
+    finished_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<GenerationStageRun(job_id={self.job_id}, stage='{self.stage}', outcome='{self.outcome}')>"
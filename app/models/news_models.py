@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, func, Boolean
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, func, Boolean, UniqueConstraint, Index, literal_column
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base # Adjusted import path
@@ -9,24 +9,41 @@ class NewsDigestStatus:
     PROCESSING_AUDIO = "PROCESSING_AUDIO"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+    TIMED_OUT = "TIMED_OUT"
+
+# Statuses after which a digest's generation is over
+FINAL_DIGEST_STATUSES = [NewsDigestStatus.COMPLETED, NewsDigestStatus.FAILED, NewsDigestStatus.CANCELLED, NewsDigestStatus.TIMED_OUT]
 
 class NewsDigest(Base):
     __tablename__ = "news_digests"
+    __table_args__ = (
+        Index("ix_news_digests_cache_lookup", "criteria_fingerprint", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, server_default=func.now())
+    # Bumped by every UPDATE; unlike updated_at (whole seconds on SQLite) it tells apart changes within a second
+    row_version = Column(Integer, default=0, onupdate=literal_column("row_version + 1"), nullable=False, server_default="0")
 
     # Information about the source articles (e.g., list of URLs, titles, or topics)
     original_articles_info = Column(JSON, nullable=True) # Store as JSON list of dicts or similar
+    # SHA-256 of the normalized generation criteria (app.services.generation_criteria); the cache lookup key
+    criteria_fingerprint = Column(String(64), nullable=True)
 
+    # Fetched articles the script is written from (output of the FETCH stage, kept so a resumed generation
+    # does not fetch again)
+    news_content = Column(Text, nullable=True)
     # The script generated by the LLM for the podcast
     generated_script_text = Column(Text, nullable=True)
 
     # Status of the digest processing
     status = Column(String, default=NewsDigestStatus.PENDING_SCRIPT, nullable=False, index=True)
     error_message = Column(Text, nullable=True) # To store any errors during processing
+    playlist_url = Column(String, nullable=True) # Segmented (HLS) playlist, growing while PROCESSING_AUDIO when TTS_SEGMENTED_OUTPUT is on
+    progress = Column(JSON, nullable=True) # Latest generation progress event (app.services.progress_events)
 
     user = relationship("User", back_populates="news_digests")
     podcast_episode = relationship("PodcastEpisode", back_populates="news_digest", uselist=False, cascade="all, delete-orphan")
@@ -48,13 +65,36 @@ class PodcastEpisode(Base):
     user_given_name = Column(String(255), nullable=True) # User-defined name for the podcast
     language = Column(String(10), nullable=False, index=True)
     audio_style = Column(String(50), nullable=True, index=True)
-    duration_seconds = Column(Integer, nullable=True) # Optional: store audio duration
+    duration_seconds = Column(Integer, nullable=True) # Read from the audio headers when the audio is assembled
+    audio_format = Column(String(10), nullable=False, default="mp3", server_default="mp3") # Format behind audio_url
+    peaks_url = Column(String, nullable=True) # Waveform peaks sidecar (see app.services.waveform)
 
     created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, server_default=func.now())
+    row_version = Column(Integer, default=0, onupdate=literal_column("row_version + 1"), nullable=False, server_default="0") # As NewsDigest.row_version
     expires_at = Column(DateTime, nullable=True, index=True) # When the podcast episode (and file) should be considered for cleanup
 
     news_digest = relationship("NewsDigest", back_populates="podcast_episode")
+    renditions = relationship("PodcastEpisodeRendition", back_populates="podcast_episode", cascade="all, delete-orphan", order_by="PodcastEpisodeRendition.id")
+
+    def __repr__(self):
+        return f"<PodcastEpisode(id={self.id}, news_digest_id={self.news_digest_id}, name='{self.user_given_name}', audio_url='{self.audio_url}')>" 
+
+class PodcastEpisodeRendition(Base):
+    """One stored encoding of an episode's audio. The episode's own audio_url is one of these."""
+    __tablename__ = "podcast_episode_renditions"
+    __table_args__ = (UniqueConstraint("podcast_episode_id", "audio_format", name="uq_rendition_episode_format"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    podcast_episode_id = Column(Integer, ForeignKey("podcast_episodes.id", ondelete="CASCADE"), nullable=False, index=True)
+    audio_format = Column(String(10), nullable=False) # Key of app.services.audio_formats.AUDIO_FORMATS
+    audio_url = Column(String, nullable=False)
+    file_path = Column(String, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    transcoded = Column(Boolean, default=False, nullable=False, server_default='false') # False if produced by TTS directly
+    created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now())
+
+    podcast_episode = relationship("PodcastEpisode", back_populates="renditions")
 
     def __repr__(self):
-        return f"<PodcastEpisode(id={self.id}, news_digest_id={self.news_digest_id}, name='{self.user_given_name}', audio_url='{self.audio_url}')>" 
\ No newline at end of file
+        return f"<PodcastEpisodeRendition(id={self.id}, podcast_episode_id={self.podcast_episode_id}, format='{self.audio_format}')>"
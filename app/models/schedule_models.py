@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+class PodcastSchedule(Base):
+    """
+    A podcast a user listens to every day at the same local time, from their preferences or a predefined
+    category. Workers generate it ahead of that time (see app/services/podcast_scheduler.py).
+    """
+    __tablename__ = "podcast_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(100), nullable=True) # e.g. "Morning briefing"
+
+    # Listening time: wall-clock time in the user's time zone, kept across DST changes
+    time_of_day = Column(String(5), nullable=False) # "HH:MM"
+    timezone = Column(String(64), nullable=False, default="UTC") # IANA name, e.g. "Europe/Madrid"
+
+    # Source: a predefined category, or the user's preferences if none
+    predefined_category_id = Column(Integer, ForeignKey("predefined_categories.id", ondelete="CASCADE"), nullable=True, index=True)
+    language = Column(String(10), nullable=True) # Defaults to the preference's or category's, then "en"
+    audio_style = Column(String(50), nullable=True)
+
+    is_active = Column(Boolean, default=True, nullable=False, server_default='true')
+    next_delivery_at = Column(DateTime, nullable=True) # UTC listening time of the next podcast
+    next_run_at = Column(DateTime, nullable=True, index=True) # UTC time its generation is queued; None while inactive
+    last_run_at = Column(DateTime, nullable=True)
+    last_news_digest_id = Column(Integer, ForeignKey("news_digests.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, server_default=func.now())
+
+    predefined_category = relationship("PredefinedCategory")
+    last_news_digest = relationship("NewsDigest")
+
+    def __repr__(self):
+        return f"<PodcastSchedule(id={self.id}, user_id={self.user_id}, time_of_day='{self.time_of_day}', timezone='{self.timezone}')>"
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+class UsageKind:
+    LLM_SCRIPT = "LLM_SCRIPT"
+    TTS = "TTS"
+
+class UsageRecord(Base):
+    """One metered provider call (or batch of calls) made while generating a news digest."""
+    __tablename__ = "usage_records"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    news_digest_id = Column(Integer, ForeignKey("news_digests.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Denormalized from NewsDigest.original_articles_info so per-category aggregates need no JSON parsing
+    predefined_category_id = Column(Integer, nullable=True, index=True)
+
+    kind = Column(String(20), nullable=False, index=True) # UsageKind
+    provider = Column(String(50), nullable=True) # e.g. "gemini", "openai"
+    model = Column(String(100), nullable=True)
+
+    # LLM usage
+    input_tokens = Column(Integer, default=0, nullable=False, server_default='0')
+    output_tokens = Column(Integer, default=0, nullable=False, server_default='0')
+    tokens_estimated = Column(Boolean, default=False, nullable=False, server_default='false') # True if the provider reported no usage
+    failed = Column(Boolean, default=False, nullable=False, server_default='false') # Spent by an attempt that produced no script
+
+    # TTS usage
+    characters = Column(Integer, default=0, nullable=False, server_default='0')
+    chunks = Column(Integer, default=0, nullable=False, server_default='0')
+
+    latency_ms = Column(Integer, nullable=True) # Wall-clock time of the stage
+    created_at = Column(DateTime, default=func.now(), nullable=False, server_default=func.now(), index=True)
+
+    news_digest = relationship("NewsDigest")
+
+    def __repr__(self):
+        return f"<UsageRecord(id={self.id}, kind='{self.kind}', news_digest_id={self.news_digest_id})>"
@@ -19,11 +19,19 @@ class PodcastGenerationRequest(BaseModel):
     language: str = Field("en", title="Language", description="Target language for the podcast (ISO 639-1 code). Falls back to user's default if not provided and using preferences.")
     audio_style: str = Field("standard", title="Audio Style", description="Desired audio style. Falls back to user's default if not provided and using preferences.")
 
+    output_formats: Optional[List[str]] = Field(None, title="Output Formats", description="Audio formats to store the episode in ('mp3', 'opus', 'aac'). The first one is used for audio_url, the others are listed as renditions. Defaults to the server's AUDIO_OUTPUT_FORMATS.")
+
     force_regenerate: bool = Field(False, title="Force Regenerate", description="If true, regenerates the podcast even if a cached version exists.")
 
     # User-provided API keys (optional)
-    user_openai_api_key: Optional[str] = Field(None, title="User OpenAI API Key", description="Optional OpenAI API key provided by the user for this request. Will not be stored.", exclude=True) # exclude=True to prevent it from being returned in responses if the model is reused
-    user_google_api_key: Optional[str] = Field(None, title="User Google API Key", description="Optional Google API key provided by the user for this request. Will not be stored.", exclude=True)
+    user_openai_api_key: Optional[str] = Field(None, title="User OpenAI API Key", description="Optional OpenAI API key provided by the user for this request. Kept encrypted with the queued job only until it finishes.", exclude=True) # exclude=True to prevent it from being returned in responses if the model is reused
+    user_google_api_key: Optional[str] = Field(None, title="User Google API Key", description="Optional Google API key provided by the user for this request. Kept encrypted with the queued job only until it finishes.", exclude=True)
+
+class PodcastResumeRequest(BaseModel):
+    force_regenerate: bool = Field(False, title="Force Regenerate", description="If true, also resumes a COMPLETED podcast: its audio is generated again from the existing script.")
+    output_formats: Optional[List[str]] = Field(None, title="Output Formats", description="Audio formats to store the episode in. Defaults to those of the original request.")
+    user_openai_api_key: Optional[str] = Field(None, title="User OpenAI API Key", description="Optional OpenAI API key for the resumed stages. Kept encrypted with the queued job only until it finishes.", exclude=True)
+    user_google_api_key: Optional[str] = Field(None, title="User Google API Key", description="Optional Google API key for the resumed stages. Kept encrypted with the queued job only until it finishes.", exclude=True)
 
 class PodcastGenerationResponse(BaseModel):
     news_digest_id: int
@@ -31,12 +39,22 @@ class PodcastGenerationResponse(BaseModel):
     message: str
     podcast_episode_id: Optional[int] = None # Include episode ID if created synchronously or for immediate naming
 
+class AudioRendition(BaseModel):
+    audio_format: str # 'mp3', 'opus' or 'aac'
+    audio_url: str
+    size_bytes: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 class PodcastEpisodeStatusResponse(BaseModel):
     news_digest_id: int
     status: str # From NewsDigest
     audio_url: Optional[str] = None # Reverted to str
+    playlist_url: Optional[str] = None # HLS playlist, playable while status is PROCESSING_AUDIO and for a grace period after (segmented output only)
     script_preview: Optional[str] = None # First few lines of the script
     error_message: Optional[str] = None # From NewsDigest
+    progress: Optional[Dict[str, Any]] = None # Latest progress event, e.g. {"event": "chunk_ready", "chunks_done": 3, "chunks_total": 6, "at": ...}
     created_at: datetime # NewsDigest created_at
     updated_at: datetime # NewsDigest updated_at
 
@@ -48,6 +66,18 @@ class PodcastEpisodeStatusResponse(BaseModel):
     episode_created_at: Optional[datetime] = None # PodcastEpisode created_at
     episode_updated_at: Optional[datetime] = None # PodcastEpisode updated_at
     episode_expires_at: Optional[datetime] = None # PodcastEpisode expires_at
+    duration_seconds: Optional[int] = None # PodcastEpisode duration, from the audio headers
+    audio_format: Optional[str] = None # Format of audio_url
+    peaks_url: Optional[str] = None # int8 waveform peaks for the player
+    renditions: List[AudioRendition] = [] # Every stored format of the episode, audio_url's included
+
+STATUS_BATCH_MAX_IDS = 100
+
+class PodcastStatusBatchRequest(BaseModel):
+    news_digest_ids: List[int] = Field(..., min_length=1, max_length=STATUS_BATCH_MAX_IDS, description=f"Digests to report on, at most {STATUS_BATCH_MAX_IDS}.")
+
+class PodcastStatusBatchResponse(BaseModel):
+    items: List[PodcastEpisodeStatusResponse] # In request order; IDs that do not exist or belong to another user are left out
 
 
 class NewsDigestBase(BaseModel):
@@ -88,6 +118,9 @@ class PodcastEpisodeInDB(PodcastEpisodeBase):
     audio_url: Optional[str] = None # Reverted to str
     file_path: Optional[str] = None
     duration_seconds: Optional[int] = None
+    audio_format: Optional[str] = None
+    peaks_url: Optional[str] = None
+    renditions: List[AudioRendition] = []
     created_at: datetime
     updated_at: datetime
     expires_at: Optional[datetime] = None
@@ -109,6 +142,10 @@ class UserPodcastListItem(BaseModel):
     digest_created_at: datetime
     episode_created_at: datetime
     episode_expires_at: Optional[datetime] = None
+    duration_seconds: Optional[int] = None
+    audio_format: Optional[str] = None
+    peaks_url: Optional[str] = None
+    renditions: List[AudioRendition] = []
 
     class Config:
         from_attributes = True
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class PodcastScheduleBase(BaseModel):
+    name: Optional[str] = Field(None, example="Morning briefing", max_length=100)
+    time_of_day: str = Field(..., example="07:30", description="Listening time, HH:MM in the schedule's time zone.")
+    timezone: str = Field("UTC", example="Europe/Madrid", description="IANA time zone name.")
+    predefined_category_id: Optional[int] = Field(None, description="Category of the podcast; the user's preferences if not set.")
+    language: Optional[str] = Field(None, example="en", min_length=2, max_length=10)
+    audio_style: Optional[str] = Field(None, example="standard", min_length=3, max_length=50)
+    is_active: bool = True
+
+class PodcastScheduleCreate(PodcastScheduleBase):
+    pass
+
+class PodcastScheduleUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=100)
+    time_of_day: Optional[str] = None
+    timezone: Optional[str] = None
+    predefined_category_id: Optional[int] = None
+    language: Optional[str] = Field(None, min_length=2, max_length=10)
+    audio_style: Optional[str] = Field(None, min_length=3, max_length=50)
+    is_active: Optional[bool] = None
+
+class PodcastScheduleInDB(PodcastScheduleBase):
+    id: int
+    user_id: int
+    next_delivery_at: Optional[datetime] = None # UTC; the podcast is ready by then
+    next_run_at: Optional[datetime] = None # UTC; when its generation is queued
+    last_run_at: Optional[datetime] = None
+    last_news_digest_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class UsageAggregate(BaseModel):
+    kind: str # LLM_SCRIPT or TTS
+    records: int
+    digests: int # Distinct news digests the usage belongs to
+    input_tokens: int = 0
+    output_tokens: int = 0
+    characters: int = 0 # Characters sent to TTS
+    chunks: int = 0 # TTS requests
+    total_latency_ms: int = 0
+    failed_records: int = 0 # Records of attempts that failed; their usage is included in the totals
+
+    # Set depending on the grouping of the endpoint
+    user_id: Optional[int] = None
+    predefined_category_id: Optional[int] = None # None groups non-category digests
+
+class UsageAggregateResponse(BaseModel):
+    items: List[UsageAggregate]
@@ -0,0 +1,152 @@
+import logging
+import mimetypes
+import shutil
+import struct
+import subprocess
+from typing import Iterable, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.services import mp3_frames
+
+logger = logging.getLogger(__name__)
+
+class AudioFormat(NamedTuple):
+    name: str # As used in requests and stored on renditions
+    extension: str
+    media_type: str
+    tts_response_format: Optional[str] # OpenAI speech response_format producing it directly, if any
+    export_format: str # ffmpeg muxer used when transcoding
+    codec: Optional[str]
+    bitrate: Optional[str]
+    export_parameters: tuple = ()
+
+# Opus and AAC are requested at speech bitrates; both stay intelligible well below MP3's music-oriented defaults.
+AUDIO_FORMATS = {
+    "mp3": AudioFormat("mp3", "mp3", "audio/mpeg", "mp3", "mp3", None, None),
+    "opus": AudioFormat("opus", "opus", "audio/ogg", "opus", "opus", "libopus", settings.AUDIO_OPUS_BITRATE, ("-application", "voip")),
+    "aac": AudioFormat("aac", "aac", "audio/aac", "aac", "adts", "aac", settings.AUDIO_AAC_BITRATE),
+}
+
+for _audio_format in AUDIO_FORMATS.values():
+    mimetypes.add_type(_audio_format.media_type, f".{_audio_format.extension}") # For StaticFiles content types
+
+def parse_formats(names: Iterable[str]) -> List[str]:
+    """
+    Normalizes requested format names, keeping their order (the first is the episode's main audio_url).
+    Raises:
+        ValueError: If a name is not in AUDIO_FORMATS or nothing was requested.
+    """
+    formats: List[str] = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format '{name}'. Supported: {', '.join(AUDIO_FORMATS)}.")
+        if name not in formats:
+            formats.append(name)
+    if not formats:
+        raise ValueError("At least one audio format is required.")
+    return formats
+
+DEFAULT_FORMAT = "opus" # Used when AUDIO_OUTPUT_FORMATS is unset
+_warned_default_fallback = False
+
+def default_formats() -> List[str]:
+    """
+    AUDIO_OUTPUT_FORMATS, or DEFAULT_FORMAT when it is unset. Without ffmpeg the unset default falls back
+    to mp3 with a warning; an explicit list is returned as configured, for check_formats_producible to refuse.
+    """
+    global _warned_default_fallback
+    if settings.AUDIO_OUTPUT_FORMATS.strip():
+        return parse_formats(settings.AUDIO_OUTPUT_FORMATS.split(","))
+    if _ffmpeg_path() is None:
+        if not _warned_default_fallback:
+            logger.warning(f"ffmpeg is not installed; new episodes are stored as mp3 instead of {DEFAULT_FORMAT}.")
+            _warned_default_fallback = True
+        return ["mp3"]
+    return [DEFAULT_FORMAT]
+
+def check_formats_producible(formats: Iterable[str]) -> None:
+    """
+    Checks that every format can be stored: chunks are joined as MP3, so any other format is transcoded.
+    Raises:
+        ValueError: If a format needs ffmpeg and it is not installed.
+    """
+    needs_ffmpeg = [name for name in formats if name != "mp3"]
+    if needs_ffmpeg and _ffmpeg_path() is None:
+        raise ValueError(f"Audio format(s) {', '.join(needs_ffmpeg)} need ffmpeg, which is not installed on this server.")
+
+# --- Durations without decoding ---
+_ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+
+def ogg_opus_duration_seconds(data: bytes) -> Optional[float]:
+    """Duration of an Ogg Opus file from the last page's granule position, less the OpusHead pre-skip."""
+    head = data.find(b"OpusHead")
+    last_page = data.rfind(b"OggS")
+    if head == -1 or last_page == -1 or last_page + 14 > len(data) or head + 12 > len(data):
+        return None
+    pre_skip = struct.unpack_from("<H", data, head + 10)[0]
+    granule = struct.unpack_from("<q", data, last_page + 6)[0]
+    if granule <= 0:
+        return None
+    return max(0, granule - pre_skip) / 48000 # Opus granule positions always count 48 kHz samples
+
+def adts_duration_seconds(data: bytes) -> Optional[float]:
+    """Duration of a raw AAC (ADTS) stream, counting frames of 1024 samples each."""
+    offset = 0
+    samples = 0
+    sample_rate = None
+    while offset + 7 <= len(data):
+        if data[offset] != 0xFF or (data[offset + 1] & 0xF6) != 0xF0:
+            offset += 1 # Not a frame header (e.g. a leading ID3 tag); resynchronize
+            continue
+        rate_index = (data[offset + 2] >> 2) & 0x0F
+        frame_length = ((data[offset + 3] & 0x03) << 11) | (data[offset + 4] << 3) | (data[offset + 5] >> 5)
+        if rate_index >= len(_ADTS_SAMPLE_RATES) or frame_length < 7:
+            offset += 1
+            continue
+        sample_rate = sample_rate or _ADTS_SAMPLE_RATES[rate_index]
+        samples += 1024 * ((data[offset + 6] & 0x03) + 1)
+        offset += frame_length
+    if not sample_rate:
+        return None
+    return samples / sample_rate
+
+def file_duration_seconds(path: str, format_name: str) -> Optional[float]:
+    """Duration of an audio file in one of AUDIO_FORMATS, read from its headers."""
+    if format_name == "mp3":
+        return mp3_frames.mp3_file_duration_seconds(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if format_name == "opus":
+        return ogg_opus_duration_seconds(data)
+    if format_name == "aac":
+        return adts_duration_seconds(data)
+    return None
+
+# --- Transcoding (needs ffmpeg, like the pydub fallback) ---
+def _ffmpeg_path() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+def transcode_file(source_path: str, output_path: str, format_name: str) -> None:
+    """
+    Converts source_path into format_name at its speech bitrate. ffmpeg streams from file to file, so memory
+    stays flat however long the episode is (no decoded PCM is held here).
+    Raises:
+        RuntimeError: If ffmpeg is not installed or fails.
+    """
+    ffmpeg = _ffmpeg_path()
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is not installed.")
+    target = AUDIO_FORMATS[format_name]
+    command = [ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", source_path, "-vn"]
+    if target.codec:
+        command += ["-c:a", target.codec]
+    if target.bitrate:
+        command += ["-b:a", target.bitrate]
+    command += [*target.export_parameters, "-f", target.export_format, output_path]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        error = result.stderr.decode("utf-8", errors="replace").strip().splitlines()
+        raise RuntimeError(f"ffmpeg exited with {result.returncode}: {error[-1] if error else 'no output'}")
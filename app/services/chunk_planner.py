@@ -0,0 +1,106 @@
+import logging
+import math
+import re
+from typing import List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# --- Cut points, best first: paragraph breaks, then sentence ends, then (only inside over-long sentences) words ---
+CUT_PARAGRAPH = 0
+CUT_SENTENCE = 1
+CUT_WORD = 2
+# How far (in units of the tolerance window) a cut point may be moved from the balanced position to reach
+# a better kind of cut. A paragraph break one window away is as good as a sentence end right on target.
+_CUT_KIND_PENALTY = {CUT_PARAGRAPH: 0.0, CUT_SENTENCE: 1.0, CUT_WORD: 4.0}
+_BALANCE_TOLERANCE = 0.15 # Fraction of the ideal chunk size
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'»”’)\]]*\s+|\n\s*")
+_CLAUSE_END = re.compile(r"[,;:—–]\s+")
+_WORD_GAP = re.compile(r"\s+")
+
+class CutPoint(NamedTuple):
+    position: int # Index where the next chunk starts
+    kind: int
+
+def _cut_points(text: str, limit: int) -> List[CutPoint]:
+    """All allowed cut positions in text, guaranteeing no gap between consecutive ones exceeds limit."""
+    kinds = {}
+    for match in _SENTENCE_END.finditer(text):
+        kinds[match.end()] = CUT_SENTENCE
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        kinds[match.end()] = CUT_PARAGRAPH
+    positions = sorted(position for position in kinds if 0 < position < len(text))
+
+    points: List[CutPoint] = []
+    previous = 0
+    for position in positions + [len(text)]:
+        # A sentence longer than the limit: cut it at clause ends, else at word gaps, else hard.
+        while position - previous > limit:
+            window = text[previous:previous + limit]
+            inner = [m.end() for m in _CLAUSE_END.finditer(window)] or [m.end() for m in _WORD_GAP.finditer(window)]
+            inner = [offset for offset in inner if offset < len(window)]
+            previous += inner[-1] if inner else limit
+            points.append(CutPoint(previous, CUT_WORD))
+        if position < len(text):
+            points.append(CutPoint(position, kinds[position]))
+        previous = position
+    return points
+
+def _choose_cuts(points: List[CutPoint], total: int, chunk_count: int, limit: int) -> List[int]:
+    """Picks chunk_count - 1 cut positions, each near the position that balances the remaining text."""
+    cuts: List[int] = []
+    start = 0
+    tolerance = max(1.0, _BALANCE_TOLERANCE * total / chunk_count)
+    for remaining_chunks in range(chunk_count, 1, -1):
+        ideal = start + (total - start) / remaining_chunks
+        # Candidates must keep this chunk within the limit and leave a remainder the other chunks can hold.
+        candidates = [
+            point for point in points
+            if start < point.position <= start + limit and total - point.position <= limit * (remaining_chunks - 1)
+        ]
+        if not candidates:
+            candidates = [point for point in points if start < point.position <= start + limit]
+        if not candidates:
+            break
+        best = min(candidates, key=lambda point: abs(point.position - ideal) / tolerance + _CUT_KIND_PENALTY[point.kind])
+        cuts.append(best.position)
+        start = best.position
+    return cuts
+
+def plan_tts_chunks(script: str, char_limit: int, target_parallelism: int = 1, min_chunk_chars: int = 0) -> List[str]:
+    """
+    Splits a script into chunks of similar length for concurrent TTS, so the slowest chunk (which
+    bounds wall-clock time under asyncio.gather) is as short as possible.
+
+    Args:
+        script: Full script text.
+        char_limit: Hard maximum characters per chunk (the TTS request limit).
+        target_parallelism: Number of chunks to aim for when the limit alone would allow fewer.
+        min_chunk_chars: Do not split into chunks shorter than this just to reach target_parallelism;
+            each extra chunk costs request overhead and adds a pause.
+    Returns:
+        Chunk texts in order. Cuts prefer paragraph breaks, then sentence ends; words are only split
+        inside sentences longer than char_limit.
+    """
+    text = script.strip()
+    if not text:
+        return []
+    total = len(text)
+    needed = math.ceil(total / char_limit)
+    wanted = min(max(1, target_parallelism), total // min_chunk_chars) if min_chunk_chars > 0 else max(1, target_parallelism)
+    chunk_count = max(needed, wanted, 1)
+    if chunk_count == 1:
+        return [text]
+
+    points = _cut_points(text, char_limit)
+    while True:
+        cuts = _choose_cuts(points, total, chunk_count, char_limit)
+        bounds = [0] + cuts + [total]
+        chunks = [text[begin:end].strip() for begin, end in zip(bounds, bounds[1:])]
+        if all(len(chunk) <= char_limit for chunk in chunks) or chunk_count >= len(points) + 1:
+            break
+        chunk_count += 1 # Cut points were too uneven to fit the limit; allow one more chunk
+    chunks = [chunk for chunk in chunks if chunk]
+    logger.debug(f"Planned {len(chunks)} TTS chunks for {total} chars (sizes: {[len(chunk) for chunk in chunks]}).")
+    return chunks
@@ -0,0 +1,158 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.job_models import GenerationJob, JobStatus
+from app.models.news_models import NewsDigest, NewsDigestStatus, PodcastEpisode
+from app.services import job_queue, podcast_service
+
+logger = logging.getLogger(__name__)
+
+# Identical requests in flight at the same time (see job_queue.enqueue_generation_job) run the pipeline once:
+# the first job leads, later ones wait on it with their own digest, which follows the leader's digest and
+# gets its own episode pointing at the leader's audio once it completes. Completed podcasts of predefined
+# categories are shared the same way with later subscribers (copy_completed_digest). Functions here commit.
+
+def _follower_digests(db: Session, followers: List[GenerationJob]) -> List[NewsDigest]:
+    digest_ids = [follower.news_digest_id for follower in followers if follower.news_digest_id]
+    if not digest_ids:
+        return []
+    return db.query(NewsDigest).filter(NewsDigest.id.in_(digest_ids)).all()
+
+def _adopt_result(db: Session, source_digest: NewsDigest, digest: NewsDigest) -> None:
+    """The digest gets the source digest's script and its own episode on the source's audio files."""
+    digest.generated_script_text = source_digest.generated_script_text
+    digest.status = NewsDigestStatus.COMPLETED
+    digest.error_message = None
+    digest.progress = source_digest.progress
+    podcast_service.share_episode(db, source_digest.podcast_episode, digest)
+
+def find_completed_podcast(
+    db: Session,
+    fingerprint: str,
+    language: str,
+    audio_style: str,
+    max_age_minutes: int,
+    user_id: Optional[int] = None
+) -> Optional[NewsDigest]:
+    """
+    Latest completed digest with these criteria whose audio is still available.
+    Args:
+        max_age_minutes: Only digests created this recently (0: no limit); news goes stale.
+        user_id: Only this user's digests (default: any user's).
+    """
+    now = datetime.utcnow()
+    query = db.query(NewsDigest) \
+        .join(NewsDigest.podcast_episode) \
+        .filter(
+            NewsDigest.criteria_fingerprint == fingerprint, # Indexed with status and created_at
+            NewsDigest.status == NewsDigestStatus.COMPLETED,
+            PodcastEpisode.language == language,
+            PodcastEpisode.audio_style == audio_style,
+            PodcastEpisode.audio_url.isnot(None),
+            or_(PodcastEpisode.expires_at.is_(None), PodcastEpisode.expires_at > now)
+        )
+    if user_id is not None:
+        query = query.filter(NewsDigest.user_id == user_id)
+    if max_age_minutes > 0:
+        query = query.filter(NewsDigest.created_at >= now - timedelta(minutes=max_age_minutes))
+    return query.order_by(NewsDigest.created_at.desc()).first()
+
+def copy_completed_digest(
+    db: Session,
+    source_digest: NewsDigest,
+    user_id: int,
+    original_articles_info: Optional[Dict[str, Any]] = None
+) -> NewsDigest:
+    """
+    A completed digest of the user's own referencing another digest's script and audio (e.g. today's edition
+    of a predefined category generated for another subscriber). Naming and deletion stay per user.
+    """
+    digest = NewsDigest(
+        user_id=user_id,
+        original_articles_info=original_articles_info if original_articles_info is not None else source_digest.original_articles_info,
+        criteria_fingerprint=source_digest.criteria_fingerprint,
+    )
+    db.add(digest)
+    db.flush()
+    _adopt_result(db, source_digest, digest)
+    db.commit()
+    db.refresh(digest)
+    logger.info(f"NewsDigest {digest.id} of user {user_id} shares the podcast of NewsDigest {source_digest.id}.")
+    return digest
+
+def mirror_status(db: Session, leader_job: GenerationJob) -> None:
+    """Follower digests show the progress of the leader's digest while they wait."""
+    followers = job_queue.get_followers(db, leader_job.id)
+    leader_digest = db.get(NewsDigest, leader_job.news_digest_id) if leader_job.news_digest_id else None
+    if not followers or not leader_digest:
+        return
+    for digest in _follower_digests(db, followers):
+        digest.status = leader_digest.status
+        digest.progress = leader_digest.progress
+    db.commit()
+
+def share_result_with_followers(db: Session, leader_job: GenerationJob) -> int:
+    """
+    Completes the followers of a succeeded job with the leader's script and audio.
+    Returns:
+        The number of follower digests completed.
+    """
+    followers = job_queue.get_followers(db, leader_job.id)
+    if not followers:
+        return 0
+    leader_digest = db.get(NewsDigest, leader_job.news_digest_id) if leader_job.news_digest_id else None
+    source_episode = leader_digest.podcast_episode if leader_digest else None
+    if not source_episode or not source_episode.audio_url:
+        # Deleted by its owner in the meantime: the followers run the generation themselves
+        logger.warning(f"Job {leader_job.id}: result is gone, followers take over.")
+        promote_follower(db, leader_job)
+        return 0
+
+    digests = {digest.id: digest for digest in _follower_digests(db, followers)}
+    for follower in followers:
+        digest = digests.get(follower.news_digest_id)
+        if digest:
+            _adopt_result(db, leader_digest, digest)
+        job_queue.finish_follower(db, follower.id, JobStatus.SUCCEEDED)
+    db.commit()
+    logger.info(f"Job {leader_job.id}: shared its podcast with {len(digests)} identical request(s).")
+    return len(digests)
+
+def fail_followers(db: Session, leader_job: GenerationJob) -> None:
+    """
+    Fails the followers of a job whose stage reported a failure for the criteria themselves (e.g. no news
+    found), which running them again would repeat.
+    """
+    followers = job_queue.get_followers(db, leader_job.id)
+    if not followers:
+        return
+    leader_digest = db.get(NewsDigest, leader_job.news_digest_id) if leader_job.news_digest_id else None
+    if leader_digest is None: # Deleted by its owner, which says nothing about the criteria
+        promote_follower(db, leader_job)
+        return
+    error_message = leader_digest.error_message or "Generation failed."
+    for digest in _follower_digests(db, followers):
+        digest.status = NewsDigestStatus.FAILED
+        digest.error_message = error_message
+        digest.progress = leader_digest.progress
+    for follower in followers:
+        job_queue.finish_follower(db, follower.id, JobStatus.FAILED, error=f"Identical job {leader_job.id} failed: {error_message}")
+    db.commit()
+
+def promote_follower(db: Session, leader_job: GenerationJob) -> None:
+    """
+    After the leader failed on errors of its own (exhausted retries), or was cancelled or timed out,
+    its followers try again.
+    """
+    new_leader = job_queue.promote_follower(db, leader_job.id)
+    if new_leader is None:
+        return
+    db.flush()
+    for digest in _follower_digests(db, [new_leader] + job_queue.get_followers(db, new_leader.id)):
+        digest.status = NewsDigestStatus.PENDING_SCRIPT
+        digest.error_message = None
+    db.commit()
@@ -0,0 +1,35 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Process pool for CPU-bound pipeline steps (HTML/feed parsing, transcoding, waveform peaks), so they neither
+# hold the event loop nor compete for the GIL with the I/O-bound stages. Started by app/worker.py; when it
+# is not started (e.g. in the API process), work runs in the default thread pool instead.
+_executor: Optional[ProcessPoolExecutor] = None
+
+def start(max_workers: int) -> None:
+    global _executor
+    if _executor is not None or max_workers <= 0:
+        return
+    # spawn: children import only what the submitted functions need, and do not inherit the event loop,
+    # threads or database connections of the worker.
+    _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    logger.info(f"CPU process pool started with {max_workers} processes.")
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+async def run(func: Callable[..., T], *args: Any) -> T:
+    """Runs func(*args) in the process pool. func and its arguments must be picklable (module-level functions)."""
+    if _executor is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+from app.services.tts_cache import get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+# Audio of the script chunks a digest's generation already synthesized stays in the TTS cache (tts_cache),
+# pinned for the digest until its episode is stored, so a retried or resumed audio stage only synthesizes the
+# chunks still missing. Entries are keyed by everything that determines the audio, so a chunk whose text,
+# voice or instructions changed is not reused. Without the TTS cache (TTS_CACHE_ENABLED off) a resumed
+# audio stage synthesizes every chunk again.
+# The outputs of the earlier stages are kept on the digest itself (news_content, generated_script_text).
+
+def _owner(news_digest_id: int) -> str:
+    return f"digest-{int(news_digest_id)}"
+
+async def pin_chunk(news_digest_id: int, key: str) -> bool:
+    """
+    Keeps the cached chunk for key from eviction until the digest's episode is stored. Call before
+    synthesizing the chunk, so it is kept from the moment it is cached.
+    Returns:
+        Whether the chunk is cached already (from an earlier attempt, or another digest with the same chunk).
+    """
+    tts_cache = get_tts_cache()
+    if tts_cache is None:
+        return False
+    return await asyncio.to_thread(tts_cache.pin, _owner(news_digest_id), key)
+
+def clear(news_digest_id: int) -> None:
+    """Unpins the digest's chunks, once its episode is stored."""
+    tts_cache = get_tts_cache()
+    if tts_cache is not None:
+        tts_cache.unpin_all(_owner(news_digest_id))
+
+def prune(max_age_seconds: float) -> int:
+    """
+    Unpins the chunks of generations not touched for max_age_seconds (failed and never resumed).
+    Returns:
+        The number of digests whose chunks were unpinned.
+    """
+    tts_cache = get_tts_cache()
+    if tts_cache is None:
+        return 0
+    return tts_cache.prune_pins(max_age_seconds)
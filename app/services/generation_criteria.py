@@ -0,0 +1,53 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+# Keys that identify where criteria came from rather than what is generated from them
+_IGNORED_KEYS = {"user_preference_id"}
+_URL_KEYS = {"urls", "rss_urls"}
+_TEXT_KEYS = {"language", "audio_style", "source_type"}
+
+def normalize_url(url: str) -> str:
+    """Lowercases scheme and host, drops default ports, fragments and trailing slashes."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+def _normalize_list(key: str, values: List[Any]) -> List[str]:
+    if key in _URL_KEYS:
+        normalized = {normalize_url(str(value)) for value in values if str(value).strip()}
+    else: # Topics, keywords and excluded domains are matched case-insensitively and in any order
+        normalized = {str(value).strip().lower() for value in values if str(value).strip()}
+    return sorted(normalized)
+
+def normalize_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of resolved generation criteria: equal for requests that produce the same podcast,
+    whatever the order, case or spelling of their lists and URLs. Empty values are dropped.
+    """
+    normalized: Dict[str, Any] = {}
+    for key, value in criteria.items():
+        if key in _IGNORED_KEYS or value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            normalized[key] = _normalize_list(key, list(value))
+        elif key in _TEXT_KEYS and isinstance(value, str):
+            normalized[key] = value.strip().lower()
+        else:
+            normalized[key] = value
+    return normalized
+
+def criteria_fingerprint(criteria: Dict[str, Any], output_formats: Optional[List[str]] = None) -> str:
+    """
+    SHA-256 (hex) of the normalized criteria. With output_formats, identifies the audio files too,
+    so only requests that would store the same renditions share them.
+    """
+    canonical: Dict[str, Any] = {"criteria": normalize_criteria(criteria)}
+    if output_formats:
+        canonical["output_formats"] = list(output_formats)
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
@@ -0,0 +1,117 @@
+import logging
+import math
+import os
+import shutil
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services import mp3_frames
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_FILENAME = "playlist.m3u8"
+SEGMENTS_SUBDIR = "segments"
+# TTS chunks run for minutes; they are cut into segments of about this length so players can poll often.
+SEGMENT_SECONDS = 6
+
+class SegmentedPlaylist:
+    """
+    HLS-style event playlist whose MP3 segments are published while an episode is generated.
+    Each finished TTS chunk is cut at frame boundaries into segments of about SEGMENT_SECONDS; players
+    poll the playlist and can start with the first segment. close() adds #EXT-X-ENDLIST.
+
+    Args:
+        directory: Directory for the playlist and its segments (created here).
+        url_prefix: Public URL of that directory, without a trailing slash.
+        pause_ms: Silence appended after every chunk but the last, matching the pause of the joined file.
+    """
+
+    def __init__(self, directory: str, url_prefix: str, pause_ms: int = 0):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.pause_ms = pause_ms
+        # Fixed up front (HLS does not allow it to change); a chunk's last segment also carries the pause.
+        self.target_duration = math.ceil(SEGMENT_SECONDS + pause_ms / 1000) + 1
+        self.segments: List[tuple] = [] # (filename, duration_seconds)
+        self.closed = False
+        os.makedirs(directory, exist_ok=True)
+        self._write_playlist()
+
+    @property
+    def playlist_url(self) -> str:
+        return f"{self.url_prefix}/{PLAYLIST_FILENAME}"
+
+    def add_chunk(self, data: bytes, is_last: bool = False, source: str = "<bytes>") -> float:
+        """
+        Publishes the MP3 chunk in data as the next segments (frames copied, pause appended to the last one).
+        Returns:
+            The chunk's duration in seconds, pause included.
+        Raises:
+            mp3_frames.Mp3FormatMismatch: If the chunk has no parseable MP3 frames.
+        """
+        stream = mp3_frames.parse_mp3(data)
+        if stream is None:
+            raise mp3_frames.Mp3FormatMismatch(f"Could not parse MP3 frames of {source}.")
+        header = stream.first_header
+        frame_seconds = header.samples_per_frame / header.sample_rate
+        frames_per_segment = max(1, int(SEGMENT_SECONDS / frame_seconds))
+        pause_frames = 0 if is_last else mp3_frames.silence_frame_count(header, self.pause_ms)
+        total_duration = 0.0
+        for start in range(0, len(stream.frames), frames_per_segment):
+            frames = stream.frames[start:start + frames_per_segment]
+            last_of_chunk = start + frames_per_segment >= len(stream.frames)
+            filename = f"segment_{len(self.segments):05d}.mp3"
+            segment_path = os.path.join(self.directory, filename)
+            partial_path = segment_path + ".part"
+            with open(partial_path, "wb") as output:
+                mp3_frames.write_frames(output, data, mp3_frames.Mp3Stream(header, frames))
+                if last_of_chunk and pause_frames:
+                    output.write(mp3_frames.silence_frames(header, self.pause_ms))
+            os.replace(partial_path, segment_path) # Publish the segment before the playlist references it
+            duration = (len(frames) + (pause_frames if last_of_chunk else 0)) * frame_seconds
+            self.segments.append((filename, duration))
+            total_duration += duration
+        self._write_playlist()
+        return total_duration
+
+    def close(self) -> None:
+        self.closed = True
+        self._write_playlist()
+
+    def discard(self) -> None:
+        """Removes the playlist and its segments (e.g. after a failed or re-encoded generation)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write_playlist(self) -> None:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for filename, duration in self.segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(filename)
+        if self.closed:
+            lines.append("#EXT-X-ENDLIST")
+        playlist_path = os.path.join(self.directory, PLAYLIST_FILENAME)
+        partial_path = playlist_path + ".part"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(partial_path, playlist_path) # Pollers never see a half-written playlist
+
+def create_playlist(name: str) -> SegmentedPlaylist:
+    """New playlist under STATIC_AUDIO_DIR/segments/<name>, served from /static/audio/segments/<name>."""
+    directory = os.path.join(settings.STATIC_AUDIO_DIR, SEGMENTS_SUBDIR, name)
+    return SegmentedPlaylist(directory, f"/static/audio/{SEGMENTS_SUBDIR}/{name}", settings.TTS_CHUNK_PAUSE_MS)
+
+def remove_playlist(playlist_url: Optional[str]) -> None:
+    """Deletes the segment directory behind a playlist URL created by create_playlist."""
+    prefix = f"/static/audio/{SEGMENTS_SUBDIR}/"
+    if not playlist_url or not playlist_url.startswith(prefix):
+        return
+    name = playlist_url[len(prefix):].split("/", 1)[0]
+    if not name or name in (".", ".."):
+        return
+    shutil.rmtree(os.path.join(settings.STATIC_AUDIO_DIR, SEGMENTS_SUBDIR, name), ignore_errors=True)
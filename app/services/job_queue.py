@@ -0,0 +1,446 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from sqlalchemy import func, or_, and_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.job_models import GenerationJob, GenerationStageRun, JobKind, JobStatus, StageRunOutcome, STAGE_ORDER, FINISHED_JOB_STATUSES
+from app.models.news_models import NewsDigest, FINAL_DIGEST_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# --- User API keys: encrypted at rest, only for as long as the job is unfinished ---
+def _fernet() -> Fernet:
+    key = base64.urlsafe_b64encode(hashlib.sha256(f"generation-job-secrets:{settings.SECRET_KEY}".encode("utf-8")).digest())
+    return Fernet(key)
+
+def encrypt_secrets(secrets: Dict[str, Optional[str]]) -> Optional[str]:
+    present = {name: value for name, value in secrets.items() if value}
+    if not present:
+        return None
+    return _fernet().encrypt(json.dumps(present).encode("utf-8")).decode("ascii")
+
+def decrypt_secrets(token: Optional[str]) -> Dict[str, str]:
+    if not token:
+        return {}
+    try:
+        return json.loads(_fernet().decrypt(token.encode("ascii")))
+    except (InvalidToken, ValueError) as e:
+        # SECRET_KEY changed since the job was queued; run with the server keys instead.
+        logger.warning(f"Could not decrypt job secrets ({e.__class__.__name__}). Ignoring user-provided keys.")
+        return {}
+
+# --- Queue operations ---
+def enqueue_generation_job(
+    db: Session,
+    news_digest: NewsDigest,
+    generation_criteria: Dict[str, Any],
+    force_regenerate: bool = False,
+    output_formats: Optional[List[str]] = None,
+    user_api_keys: Optional[Dict[str, Optional[str]]] = None,
+    priority: int = 100,
+    run_after: Optional[datetime] = None,
+    coalesce_key: Optional[str] = None,
+    stage: Optional[str] = None,
+) -> GenerationJob:
+    """
+    Adds a job generating the digest's podcast to the session. The caller commits.
+    The job starts at stage (default: the first; later ones to resume from the digest's checkpoints) and
+    times out JOB_DEADLINE_SECONDS after run_after, whatever stage it reached.
+    If an identical job (same coalesce_key) is in flight, the new job is WAITING on it instead of running.
+    """
+    leader = find_inflight_leader(db, coalesce_key) if coalesce_key else None
+    run_after = run_after or datetime.utcnow()
+    job = GenerationJob(
+        kind=JobKind.GENERATE_PODCAST,
+        stage=stage or STAGE_ORDER[0],
+        news_digest_id=news_digest.id,
+        user_id=news_digest.user_id,
+        payload={
+            "generation_criteria": generation_criteria,
+            "force_regenerate": force_regenerate,
+            "output_formats": output_formats,
+        },
+        encrypted_secrets=encrypt_secrets(user_api_keys or {}),
+        status=JobStatus.WAITING if leader else JobStatus.QUEUED,
+        coalesce_key=coalesce_key,
+        leader_job_id=leader.id if leader else None,
+        priority=priority,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=run_after,
+        deadline_at=run_after + timedelta(seconds=settings.JOB_DEADLINE_SECONDS) if settings.JOB_DEADLINE_SECONDS > 0 else None,
+    )
+    db.add(job)
+    if leader:
+        logger.info(f"NewsDigest {news_digest.id}: attached to in-flight job {leader.id} with identical criteria.")
+    return job
+
+# --- Single-flight coalescing ---
+def coalesce_key(criteria_fingerprint: str, user_api_keys: Optional[Dict[str, Optional[str]]] = None) -> str:
+    """
+    Key under which identical requests share one job: the criteria fingerprint, scoped to the API keys a
+    request brings, so a job never runs on (or fails because of) another user's keys.
+    """
+    keys = {name: value for name, value in (user_api_keys or {}).items() if value}
+    if not keys:
+        return criteria_fingerprint
+    keys_digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), json.dumps(keys, sort_keys=True).encode("utf-8"), hashlib.sha256).hexdigest()
+    return hashlib.sha256(f"{criteria_fingerprint}:{keys_digest}".encode("utf-8")).hexdigest()
+
+def find_inflight_leader(db: Session, coalesce_key: str, before_job_id: Optional[int] = None) -> Optional[GenerationJob]:
+    """The oldest queued or running job with this key that is not itself waiting on another."""
+    query = db.query(GenerationJob).filter(
+        GenerationJob.coalesce_key == coalesce_key,
+        GenerationJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        GenerationJob.leader_job_id.is_(None),
+    )
+    if before_job_id is not None:
+        query = query.filter(GenerationJob.id < before_job_id)
+    return query.order_by(GenerationJob.id).first()
+
+def coalesce_with_earlier_leader(db: Session, job: GenerationJob) -> bool:
+    """
+    Closes the race of identical requests enqueued at the same moment (neither saw the other in flight):
+    called after the job is committed, it attaches the job, if no worker has taken it yet, to an earlier
+    identical job. Returns True if it was attached.
+    """
+    if not job.coalesce_key or job.status != JobStatus.QUEUED:
+        return False
+    leader = find_inflight_leader(db, job.coalesce_key, before_job_id=job.id)
+    if not leader:
+        return False
+    result = db.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id == job.id, GenerationJob.status == JobStatus.QUEUED, GenerationJob.attempts == 0)
+        .values(status=JobStatus.WAITING, leader_job_id=leader.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        # Requests that attached to this job in the meantime follow the leader too
+        db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.leader_job_id == job.id)
+            .values(leader_job_id=leader.id)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    db.refresh(job)
+    return result.rowcount == 1
+
+def get_followers(db: Session, leader_job_id: int) -> List[GenerationJob]:
+    return db.query(GenerationJob).filter(
+        GenerationJob.leader_job_id == leader_job_id,
+        GenerationJob.status == JobStatus.WAITING,
+    ).order_by(GenerationJob.id).all()
+
+def finish_follower(db: Session, job_id: int, status: str, error: Optional[str] = None) -> None:
+    """Ends a WAITING job with its leader's outcome. The caller commits."""
+    db.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id == job_id, GenerationJob.status == JobStatus.WAITING)
+        .values(
+            status=status,
+            stage=STAGE_ORDER[-1] if status == JobStatus.SUCCEEDED else GenerationJob.stage,
+            last_error=error[:2000] if error else None,
+            finished_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+            encrypted_secrets=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def promote_follower(db: Session, leader_job_id: int) -> Optional[GenerationJob]:
+    """
+    After a leader ended without a result (failed for good, cancelled or timed out), its oldest follower
+    runs the generation itself and the other
+    followers wait on that one. The caller commits.
+    """
+    followers = get_followers(db, leader_job_id)
+    if not followers:
+        return None
+    new_leader, others = followers[0], followers[1:]
+    new_leader.status = JobStatus.QUEUED
+    new_leader.leader_job_id = None
+    new_leader.run_after = datetime.utcnow()
+    for follower in others:
+        follower.leader_job_id = new_leader.id
+    logger.info(f"Job {new_leader.id} takes over from ended job {leader_job_id} for {len(others)} other waiting job(s).")
+    return new_leader
+
+def claim_job(db: Session, worker_id: str, stages: Optional[List[str]] = None, lease_seconds: Optional[int] = None) -> Optional[GenerationJob]:
+    """
+    Takes a lease on the next runnable job: QUEUED and due, RUNNING with an expired lease (its worker died),
+    or WAITING on a leader that is gone.
+    Claiming is a conditional UPDATE on the row, so concurrent workers (and processes) never both win a job.
+    Args:
+        stages: Only claim jobs waiting for one of these stages (default: any).
+    Returns:
+        The claimed job with attempts incremented, or None if nothing is runnable.
+    """
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    now = datetime.utcnow()
+    finished_leader = aliased(GenerationJob)
+    runnable = or_(
+        and_(GenerationJob.status == JobStatus.QUEUED, GenerationJob.run_after <= now),
+        and_(GenerationJob.status == JobStatus.RUNNING, GenerationJob.lease_expires_at < now),
+        # A follower whose leader was deleted (with its digest), or finished before it attached, runs on its own
+        and_(GenerationJob.status == JobStatus.WAITING, or_(
+            GenerationJob.leader_job_id.is_(None),
+            GenerationJob.leader_job_id.in_(
+                select(finished_leader.id).where(finished_leader.status.in_(FINISHED_JOB_STATUSES))
+            ),
+        )),
+    )
+    # Jobs past their deadline are left to the reaper (time_out_overdue_jobs)
+    runnable = and_(or_(GenerationJob.deadline_at.is_(None), GenerationJob.deadline_at > now), runnable)
+    if stages:
+        runnable = and_(GenerationJob.stage.in_(stages), runnable)
+    candidates = db.query(GenerationJob.id).filter(runnable) \
+        .order_by(GenerationJob.priority, GenerationJob.run_after, GenerationJob.id) \
+        .limit(10)
+    if db.bind.dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    for (job_id,) in candidates.all():
+        result = db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, runnable)
+            .values(
+                status=JobStatus.RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                leader_job_id=None,
+                attempts=GenerationJob.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            db.commit()
+            job = db.get(GenerationJob, job_id)
+            db.refresh(job)
+            logger.info(f"Worker {worker_id} claimed job {job_id} at stage {job.stage} (attempt {job.attempts}/{job.max_attempts}).")
+            return job
+    db.rollback() # Releases FOR UPDATE locks on candidates someone else took
+    return None
+
+def renew_lease(db: Session, job_id: int, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+    """Extends the lease. False if the worker no longer holds it (it expired and another worker took the job)."""
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    result = db.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id == job_id, GenerationJob.lease_owner == worker_id, GenerationJob.status == JobStatus.RUNNING)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def _finish(db: Session, job_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+    result = db.execute(
+        update(GenerationJob)
+        # Not if the job was cancelled or timed out by the reaper meanwhile
+        .where(GenerationJob.id == job_id, GenerationJob.lease_owner == worker_id, GenerationJob.status == JobStatus.RUNNING)
+        .values(lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        logger.warning(f"Worker {worker_id} no longer held the lease on job {job_id}; result not recorded.")
+    return result.rowcount == 1
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    return _finish(db, job_id, worker_id, {
+        "status": JobStatus.SUCCEEDED,
+        "finished_at": datetime.utcnow(),
+        "encrypted_secrets": None,
+    })
+
+def advance_job(db: Session, job: GenerationJob, worker_id: str, payload_updates: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hands a job whose current stage succeeded to the next stage's queue (due now, attempts reset),
+    or completes it after the last stage.
+    Returns:
+        The stage the job now waits for, or JobStatus.SUCCEEDED.
+    """
+    position = STAGE_ORDER.index(job.stage)
+    if position == len(STAGE_ORDER) - 1:
+        complete_job(db, job.id, worker_id)
+        return JobStatus.SUCCEEDED
+    next_stage = STAGE_ORDER[position + 1]
+    _finish(db, job.id, worker_id, {
+        "status": JobStatus.QUEUED,
+        "stage": next_stage,
+        "attempts": 0,
+        "run_after": datetime.utcnow(),
+        "last_error": None,
+        "payload": {**(job.payload or {}), **(payload_updates or {})},
+    })
+    return next_stage
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, retry: bool = True, final_status: str = JobStatus.FAILED) -> str:
+    """
+    Records a failed attempt: requeues with exponential backoff while attempts remain (and retry is True),
+    otherwise gives the job its final_status (FAILED, or TIMED_OUT for attempts that ran out of time).
+    Returns:
+        The job's new status.
+    """
+    job = db.get(GenerationJob, job_id)
+    if retry and job is not None and job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        _finish(db, job_id, worker_id, {
+            "status": JobStatus.QUEUED,
+            "run_after": datetime.utcnow() + timedelta(seconds=delay),
+            "last_error": error[:2000],
+        })
+        logger.warning(f"Job {job_id} attempt {job.attempts} failed: {error}. Retrying in {delay}s.")
+        return JobStatus.QUEUED
+    _finish(db, job_id, worker_id, {
+        "status": final_status,
+        "finished_at": datetime.utcnow(),
+        "last_error": error[:2000],
+        "encrypted_secrets": None,
+    })
+    logger.error(f"Job {job_id} ended {final_status}: {error}")
+    return final_status
+
+# --- Cancellation and deadlines ---
+_UNFINISHED_JOB_STATUSES = [JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.WAITING]
+
+def _end_unfinished_job(db: Session, job_id: int, status: str, error: str) -> bool:
+    """
+    Ends a job that has not finished, whether queued, waiting or running. A worker running it notices on
+    its next lease renewal and abandons the attempt.
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id == job_id, GenerationJob.status.in_(_UNFINISHED_JOB_STATUSES))
+        .values(
+            status=status,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=error,
+            finished_at=now,
+            updated_at=now,
+            encrypted_secrets=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def get_latest_job(db: Session, news_digest_id: int) -> Optional[GenerationJob]:
+    return db.query(GenerationJob).filter(GenerationJob.news_digest_id == news_digest_id).order_by(GenerationJob.id.desc()).first()
+
+def get_unfinished_job(db: Session, news_digest_id: int) -> Optional[GenerationJob]:
+    return db.query(GenerationJob).filter(
+        GenerationJob.news_digest_id == news_digest_id,
+        GenerationJob.status.in_(_UNFINISHED_JOB_STATUSES),
+    ).order_by(GenerationJob.id.desc()).first()
+
+def cancel_job(db: Session, job_id: int) -> bool:
+    """Cancels a job that has not finished. False if it already had."""
+    cancelled = _end_unfinished_job(db, job_id, JobStatus.CANCELLED, "Cancelled by its owner.")
+    if cancelled:
+        logger.info(f"Job {job_id} cancelled.")
+    return cancelled
+
+def time_out_overdue_jobs(db: Session) -> List[GenerationJob]:
+    """
+    Times out unfinished jobs past their deadline (a stuck worker included: it loses the job on its next
+    lease renewal). Returns:
+        The jobs timed out by this call.
+    """
+    overdue = db.query(GenerationJob).filter(
+        GenerationJob.status.in_(_UNFINISHED_JOB_STATUSES),
+        GenerationJob.deadline_at < datetime.utcnow(),
+    ).order_by(GenerationJob.id).limit(500).all()
+    timed_out = [job for job in overdue if _end_unfinished_job(db, job.id, JobStatus.TIMED_OUT, "Job passed its deadline.")]
+    for job in timed_out:
+        db.refresh(job)
+        logger.warning(f"Job {job.id} (NewsDigest {job.news_digest_id}) passed its deadline at stage {job.stage}; timed out.")
+    return timed_out
+
+def stale_digest_ids(db: Session, idle_seconds: int) -> List[int]:
+    """
+    Digests still in progress that no unfinished job will ever finish (e.g. their job ended without updating
+    them, or a generation run in the API process died with it), untouched for idle_seconds.
+    """
+    unfinished_job = select(GenerationJob.id).where(
+        GenerationJob.news_digest_id == NewsDigest.id,
+        GenerationJob.status.in_(_UNFINISHED_JOB_STATUSES),
+    ).exists()
+    rows = db.query(NewsDigest.id).filter(
+        NewsDigest.status.notin_(FINAL_DIGEST_STATUSES),
+        NewsDigest.updated_at < datetime.utcnow() - timedelta(seconds=idle_seconds),
+        ~unfinished_job,
+    ).order_by(NewsDigest.id).limit(500).all()
+    return [digest_id for (digest_id,) in rows]
+
+def record_stage_run(db: Session, job: GenerationJob, worker_id: str, outcome: str, started_at: datetime) -> None:
+    """Stores one stage attempt for the metrics in queue_stats. job is the job as claimed."""
+    now = datetime.utcnow()
+    db.add(GenerationStageRun(
+        job_id=job.id,
+        stage=job.stage,
+        attempt=job.attempts,
+        worker_id=worker_id,
+        outcome=outcome,
+        wait_seconds=max(0.0, (started_at - job.run_after).total_seconds()) if job.run_after else None,
+        duration_seconds=(now - started_at).total_seconds(),
+        finished_at=now,
+    ))
+    db.commit()
+
+# --- Metrics ---
+def _empty_stage_stats() -> Dict[str, Any]:
+    return {"due": 0, "backoff": 0, "running": 0, "oldest_due_wait_seconds": None, "runs": {}}
+
+def queue_stats(db: Session, window_minutes: int = 15) -> Dict[str, Any]:
+    """
+    Per stage: queue depth (due, waiting on backoff, running) and the oldest due job's wait, plus throughput,
+    failures, mean run time and mean queue wait over the last window_minutes.
+    """
+    now = datetime.utcnow()
+    since = now - timedelta(minutes=window_minutes)
+    stages: Dict[str, Dict[str, Any]] = {stage: _empty_stage_stats() for stage in STAGE_ORDER}
+
+    due_counts = db.query(GenerationJob.stage, func.count(GenerationJob.id), func.min(GenerationJob.run_after)) \
+        .filter(GenerationJob.status == JobStatus.QUEUED, GenerationJob.run_after <= now) \
+        .group_by(GenerationJob.stage).all()
+    for stage, count, oldest in due_counts:
+        stats = stages.setdefault(stage, _empty_stage_stats())
+        stats["due"] = count
+        stats["oldest_due_wait_seconds"] = round((now - oldest).total_seconds(), 1) if oldest else None
+    for key, condition in (
+        ("backoff", and_(GenerationJob.status == JobStatus.QUEUED, GenerationJob.run_after > now)),
+        ("running", GenerationJob.status == JobStatus.RUNNING),
+    ):
+        for stage, count in db.query(GenerationJob.stage, func.count(GenerationJob.id)).filter(condition).group_by(GenerationJob.stage).all():
+            stages.setdefault(stage, _empty_stage_stats())[key] = count
+
+    runs = db.query(
+        GenerationStageRun.stage,
+        GenerationStageRun.outcome,
+        func.count(GenerationStageRun.id),
+        func.avg(GenerationStageRun.duration_seconds),
+        func.avg(GenerationStageRun.wait_seconds),
+    ).filter(GenerationStageRun.finished_at >= since) \
+        .group_by(GenerationStageRun.stage, GenerationStageRun.outcome).all()
+    for stage, outcome, count, avg_duration, avg_wait in runs:
+        stats = stages.setdefault(stage, _empty_stage_stats())
+        stats["runs"][outcome] = count
+        if outcome == StageRunOutcome.SUCCEEDED:
+            stats["throughput_per_minute"] = round(count / window_minutes, 2)
+            stats["mean_run_seconds"] = round(avg_duration or 0.0, 2)
+            stats["mean_wait_seconds"] = round(avg_wait or 0.0, 2)
+
+    by_status = dict(db.query(GenerationJob.status, func.count(GenerationJob.id)).group_by(GenerationJob.status).all())
+    return {"window_minutes": window_minutes, "by_status": by_status, "stages": stages}
@@ -1,14 +1,271 @@
 import logging
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Optional, List, Dict, Any, Mapping
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+PLACEHOLDER_KEYS = {
+    "openai": "YOUR_OPENAI_API_KEY_HERE",
+    "google": "YOUR_GOOGLE_API_KEY_HERE",
+}
+
+def _mask_key(api_key: str) -> str:
+    """Returns a log/API-safe identifier for a key (never the key itself)."""
+    if len(api_key) <= 8:
+        return "****"
+    return f"{api_key[:3]}...{api_key[-4:]}"
+
+def _parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parses OpenAI-style reset durations (e.g. "1s", "6m0s", "250ms", "1h2m3.5s") into seconds.
+    Plain numbers (as sent in Retry-After) are treated as seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    number = ""
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+            i += 1
+            continue
+        if value.startswith("ms", i):
+            unit_seconds, i = 0.001, i + 2
+        elif char == "h":
+            unit_seconds, i = 3600.0, i + 1
+        elif char == "m":
+            unit_seconds, i = 60.0, i + 1
+        elif char == "s":
+            unit_seconds, i = 1.0, i + 1
+        else:
+            return None
+        if not number:
+            return None
+        total += float(number) * unit_seconds
+        number = ""
+    return total if not number else None
+
+class PooledKey:
+    """Health and usage state for a single server-side API key in a KeyPool."""
+
+    def __init__(self, api_key: str, weight: int = 1):
+        self.api_key = api_key
+        self.weight = max(1, weight)
+        self.current_weight = 0 # Smooth weighted round-robin accumulator
+        self.outcomes: deque = deque(maxlen=settings.KEY_POOL_ERROR_WINDOW) # True = success
+        self.ejected_until: float = 0.0
+        self.ejection_reason: Optional[str] = None
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_ejections = 0
+        self.last_used_at: Optional[float] = None
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+
+    @property
+    def key_id(self) -> str:
+        return _mask_key(self.api_key)
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - (sum(self.outcomes) / len(self.outcomes))
+
+    def to_usage_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "key_id": self.key_id,
+            "weight": self.weight,
+            "healthy": self.is_available(now),
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - now), 1),
+            "ejection_reason": self.ejection_reason if not self.is_available(now) else None,
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "total_ejections": self.total_ejections,
+            "recent_error_rate": round(self.error_rate(), 3),
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "seconds_since_last_use": round(now - self.last_used_at, 1) if self.last_used_at else None,
+        }
+
+class KeyPool:
+    """
+    A pool of server-side API keys for one provider.
+    Keys are handed out with smooth weighted round-robin. Keys whose recent error rate crosses
+    KEY_POOL_ERROR_RATE_THRESHOLD, that are rate limited (HTTP 429), or whose rate-limit headers
+    report an exhausted quota are ejected for a while and skipped until the ejection expires.
+    """
+
+    def __init__(self, key_type: str, weighted_keys: List[tuple]):
+        self.key_type = key_type
+        self._keys = [PooledKey(api_key, weight) for api_key, weight in weighted_keys]
+        self._by_key = {entry.api_key: entry for entry in self._keys}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def acquire(self) -> str:
+        """
+        Selects the next key by smooth weighted round-robin among healthy keys.
+        If every key is ejected, the one whose ejection expires first is returned rather than failing outright.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [entry for entry in self._keys if entry.is_available(now)]
+            if not candidates:
+                chosen = min(self._keys, key=lambda entry: entry.ejected_until)
+                logger.warning(f"All {self.key_type} keys are ejected. Using {chosen.key_id} (ejection ends in {chosen.ejected_until - now:.1f}s).")
+            else:
+                total_weight = 0
+                chosen = None
+                for entry in candidates:
+                    entry.current_weight += entry.weight
+                    total_weight += entry.weight
+                    if chosen is None or entry.current_weight > chosen.current_weight:
+                        chosen = entry
+                chosen.current_weight -= total_weight
+            chosen.total_requests += 1
+            chosen.last_used_at = now
+            return chosen.api_key
+
+    def _eject(self, entry: PooledKey, seconds: float, reason: str, now: float) -> None:
+        until = now + seconds
+        if until > entry.ejected_until:
+            if entry.is_available(now):
+                entry.total_ejections += 1
+                logger.warning(f"Ejecting {self.key_type} key {entry.key_id} for {seconds:.1f}s: {reason}")
+            entry.ejected_until = until
+            entry.ejection_reason = reason
+
+    def _apply_rate_limit_headers(self, entry: PooledKey, headers: Optional[Mapping[str, str]], now: float) -> None:
+        if not headers:
+            return
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        try:
+            if remaining_requests is not None:
+                entry.remaining_requests = int(remaining_requests)
+            if remaining_tokens is not None:
+                entry.remaining_tokens = int(remaining_tokens)
+        except ValueError:
+            logger.debug(f"Unparseable rate-limit headers for {self.key_type} key {entry.key_id}: {dict(headers)}")
+            return
+        if entry.remaining_requests == 0:
+            reset = _parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            self._eject(entry, reset or settings.KEY_POOL_EJECTION_SECONDS, "request quota exhausted", now)
+        elif entry.remaining_tokens == 0:
+            reset = _parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            self._eject(entry, reset or settings.KEY_POOL_EJECTION_SECONDS, "token quota exhausted", now)
+
+    def report_success(self, api_key: str, headers: Optional[Mapping[str, str]] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._by_key.get(api_key)
+            if not entry:
+                return
+            entry.outcomes.append(True)
+            self._apply_rate_limit_headers(entry, headers, now)
+
+    def report_failure(
+        self,
+        api_key: str,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._by_key.get(api_key)
+            if not entry:
+                return
+            entry.outcomes.append(False)
+            entry.total_errors += 1
+            self._apply_rate_limit_headers(entry, headers, now)
+            if status_code == 429:
+                retry_after = _parse_reset_duration(headers.get("retry-after")) if headers else None
+                self._eject(entry, retry_after or settings.KEY_POOL_EJECTION_SECONDS, "rate limited (429)", now)
+            elif status_code in (401, 403):
+                # Revoked or misconfigured keys will not recover by themselves; keep them out much longer.
+                self._eject(entry, settings.KEY_POOL_EJECTION_SECONDS * 10, f"authentication failure ({status_code})", now)
+            elif len(entry.outcomes) >= settings.KEY_POOL_MIN_SAMPLES and entry.error_rate() >= settings.KEY_POOL_ERROR_RATE_THRESHOLD:
+                self._eject(entry, settings.KEY_POOL_EJECTION_SECONDS, f"error rate {entry.error_rate():.0%}", now)
+                entry.outcomes.clear() # Give the key a clean slate once it is readmitted
+
+    def get_usage(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [entry.to_usage_dict(now) for entry in self._keys]
+
+def _configured_keys(key_type: str) -> List[tuple]:
+    """
+    Reads the server keys for a provider from settings.
+    OPENAI_API_KEYS / GOOGLE_API_KEYS hold a comma-separated pool, each entry optionally suffixed
+    with ":<weight>". When the pool setting is empty, the single OPENAI_API_KEY / GOOGLE_API_KEY is used.
+    """
+    if key_type == "openai":
+        pool_str, single_key = settings.OPENAI_API_KEYS, settings.OPENAI_API_KEY
+    elif key_type == "google":
+        pool_str, single_key = settings.GOOGLE_API_KEYS, settings.GOOGLE_API_KEY
+    else:
+        return []
+
+    weighted_keys = []
+    for raw_entry in (pool_str or "").split(","):
+        raw_entry = raw_entry.strip()
+        if not raw_entry:
+            continue
+        api_key, weight = raw_entry, 1
+        if ":" in raw_entry:
+            candidate_key, _, candidate_weight = raw_entry.rpartition(":")
+            if candidate_weight.isdigit():
+                api_key, weight = candidate_key.strip(), int(candidate_weight)
+        if api_key and api_key != PLACEHOLDER_KEYS.get(key_type):
+            weighted_keys.append((api_key, weight))
+
+    if not weighted_keys and single_key and single_key != PLACEHOLDER_KEYS.get(key_type):
+        weighted_keys.append((single_key, 1))
+    return weighted_keys
+
+_key_pools: Dict[str, KeyPool] = {}
+_key_pools_lock = threading.Lock()
+
+def get_key_pool(key_type: str) -> Optional[KeyPool]:
+    """Returns the process-wide pool for a provider, building it from settings on first use."""
+    key_type = key_type.lower()
+    with _key_pools_lock:
+        if key_type not in _key_pools:
+            weighted_keys = _configured_keys(key_type)
+            if not weighted_keys:
+                return None
+            _key_pools[key_type] = KeyPool(key_type, weighted_keys)
+            logger.info(f"Initialized {key_type} key pool with {len(weighted_keys)} key(s).")
+        return _key_pools[key_type]
+
+def get_key_pool_usage() -> Dict[str, List[Dict[str, Any]]]:
+    """Per-key usage and health for every pool initialized in this process."""
+    with _key_pools_lock:
+        pools = dict(_key_pools)
+    return {key_type: pool.get_usage() for key_type, pool in pools.items()}
+
 class KeyProvider:
     """
-    Simple key provider that retrieves API keys from application settings (environment variables)
-    or uses a user-provided key if available.
+    Key provider that hands out API keys from a pool of server keys configured in application
+    settings (environment variables), or uses a user-provided key if available.
+    Callers should report the outcome of each call made with a pooled key through
+    report_success / report_failure so unhealthy keys are temporarily taken out of rotation.
     """
 
     def __init__(self, key_type: str):
@@ -22,7 +279,7 @@ class KeyProvider:
     async def get_key(self, user_provided_key: Optional[str] = None) -> str:
         """
         Get the actual API key at the point of use.
-        Prioritizes user_provided_key, then falls back to settings.
+        Prioritizes user_provided_key, then falls back to the next key in the settings pool.
         Args:
             user_provided_key: An optional API key provided directly by the user.
         Returns:
@@ -31,42 +288,63 @@ class KeyProvider:
             ValueError: If no valid key can be retrieved.
         """
         if user_provided_key:
-            logger.info(f"Using user-provided API key for {self.key_type}.")
-            # Basic validation for placeholder for user-provided keys
-            if self.key_type == "openai" and user_provided_key == "YOUR_OPENAI_API_KEY_HERE":
-                logger.error("User provided the placeholder OpenAI API key.")
-                raise ValueError("User-provided OpenAI API key is a placeholder. Please provide a valid key.")
-            if self.key_type == "google" and user_provided_key == "YOUR_GOOGLE_API_KEY_HERE":
-                logger.error("User provided the placeholder Google API key.")
-                raise ValueError("User-provided Google API key is a placeholder. Please provide a valid key.")
-            if not user_provided_key.strip():
-                logger.error(f"User provided an empty API key for {self.key_type}.")
-                raise ValueError(f"User-provided API key for {self.key_type} is empty.")
+            self._validate_user_key(user_provided_key)
             return user_provided_key
 
-        logger.info(f"Attempting to retrieve {self.key_type} API key from settings.")
-        api_key: Optional[str] = None
-        if self.key_type == "openai":
-            api_key = settings.OPENAI_API_KEY
-            if not api_key or api_key == "YOUR_OPENAI_API_KEY_HERE": # Check for placeholder or empty
-                logger.error("OpenAI API key is not configured in settings or is set to the placeholder.")
-                raise ValueError("OpenAI API key is not configured in settings. Please set it in the .env file or provide it in the request.")
-        elif self.key_type == "google":
-            api_key = settings.GOOGLE_API_KEY
-            if not api_key or api_key == "YOUR_GOOGLE_API_KEY_HERE": # Check for placeholder or empty
-                logger.error("Google API key is not configured in settings or is set to the placeholder.")
-                raise ValueError("Google API key is not configured in settings. Please set it in the .env file or provide it in the request.")
+        api_key = self._get_pool().acquire()
+        logger.debug(f"Providing {self.key_type} API key {_mask_key(api_key)} from settings pool.")
+        return api_key
+
+    async def ensure_available(self, user_provided_key: Optional[str] = None) -> None:
+        """
+        Checks that get_key would succeed, without taking a key out of the rotation.
+        Raises:
+            ValueError: If no valid key can be retrieved.
+        """
+        if user_provided_key:
+            self._validate_user_key(user_provided_key)
         else:
+            self._get_pool()
+
+    def _validate_user_key(self, user_provided_key: str) -> None:
+        logger.info(f"Using user-provided API key for {self.key_type}.")
+        # Basic validation for placeholder for user-provided keys
+        if self.key_type == "openai" and user_provided_key == "YOUR_OPENAI_API_KEY_HERE":
+            logger.error("User provided the placeholder OpenAI API key.")
+            raise ValueError("User-provided OpenAI API key is a placeholder. Please provide a valid key.")
+        if self.key_type == "google" and user_provided_key == "YOUR_GOOGLE_API_KEY_HERE":
+            logger.error("User provided the placeholder Google API key.")
+            raise ValueError("User-provided Google API key is a placeholder. Please provide a valid key.")
+        if not user_provided_key.strip():
+            logger.error(f"User provided an empty API key for {self.key_type}.")
+            raise ValueError(f"User-provided API key for {self.key_type} is empty.")
+
+    def _get_pool(self) -> KeyPool:
+        logger.info(f"Attempting to retrieve {self.key_type} API key from settings.")
+        if self.key_type not in PLACEHOLDER_KEYS:
             logger.error(f"API key type '{self.key_type}' is not supported by this KeyProvider.")
             raise ValueError(f"Unsupported API key type: {self.key_type}")
 
-        if not api_key:
-            # This case should ideally be caught by the specific checks above, but as a fallback:
-            logger.error(f"{self.key_type.upper()} API key is not set in environment variables or is empty.")
-            raise ValueError(f"{self.key_type.upper()} API key not found or is empty. Check your .env file, app/core/config.py, or provide it in the request.")
+        pool = get_key_pool(self.key_type)
+        if not pool:
+            if self.key_type == "openai":
+                logger.error("OpenAI API key is not configured in settings or is set to the placeholder.")
+                raise ValueError("OpenAI API key is not configured in settings. Please set it in the .env file or provide it in the request.")
+            logger.error("Google API key is not configured in settings or is set to the placeholder.")
+            raise ValueError("Google API key is not configured in settings. Please set it in the .env file or provide it in the request.")
+        return pool
+
+    def report_success(self, api_key: str, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Records a successful call made with api_key. No-op for user-provided keys."""
+        pool = get_key_pool(self.key_type)
+        if pool:
+            pool.report_success(api_key, headers=headers)
 
-        logger.debug(f"Providing {self.key_type} API key from settings.")
-        return api_key
+    def report_failure(self, api_key: str, status_code: Optional[int] = None, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Records a failed call made with api_key. No-op for user-provided keys."""
+        pool = get_key_pool(self.key_type)
+        if pool:
+            pool.report_failure(api_key, status_code=status_code, headers=headers)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(key_type='{self.key_type}')"
@@ -83,4 +361,4 @@ class OpenAIKeyProvider(KeyProvider):
 
 class GoogleKeyProvider(KeyProvider):
     def __init__(self):
-        super().__init__("google") 
\ No newline at end of file
+        super().__init__("google")
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
+
+from app.core.config import settings
+from app.services.key_provider import KeyProvider, GoogleKeyProvider, OpenAIKeyProvider
+
+logger = logging.getLogger(__name__)
+
+# --- Helper: Extract an HTTP-like status code from provider exceptions (for key pool health) ---
+def _status_code_from_exception(error: Exception) -> Optional[int]:
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+class LLMBackend:
+    """
+    One chat-model provider the router can send script generation to, with rolling latency and error stats.
+
+    Args:
+        name: Backend identifier, also used to look up a per-request user API key (e.g. "gemini", "openai").
+        llm_factory: Callable taking the resolved API key (None when key_provider is None) and returning a
+            LangChain runnable chat model. Tests can pass a factory returning a local stub/fake chat model.
+        key_provider: KeyProvider used to resolve (and report on) API keys. None for keyless stub backends.
+        model_name: Model identifier recorded in usage accounting when the provider does not report one.
+    """
+
+    def __init__(self, name: str, llm_factory: Callable[[Optional[str]], Any], key_provider: Optional[KeyProvider] = None, model_name: Optional[str] = None):
+        self.name = name
+        self.model_name = model_name
+        self.llm_factory = llm_factory
+        self.key_provider = key_provider
+        self._llms: Dict[Optional[str], Any] = {} # LLM instances for pooled keys, reused so cached chains stay valid
+        self.latencies: deque = deque(maxlen=settings.LLM_ROUTER_STATS_WINDOW) # Seconds per finished call
+        self.outcomes: deque = deque(maxlen=settings.LLM_ROUTER_STATS_WINDOW) # True = success
+
+    def get_llm(self, api_key: Optional[str], cache: bool = True) -> Any:
+        """Returns the LLM for api_key, reusing the instance built for a pooled key. User keys are never cached."""
+        if not cache:
+            return self.llm_factory(api_key)
+        llm = self._llms.get(api_key)
+        if llm is None:
+            llm = self.llm_factory(api_key)
+            self._llms[api_key] = llm
+        return llm
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - (sum(self.outcomes) / len(self.outcomes))
+
+    def typical_latency(self) -> Optional[float]:
+        """Median of recent latencies, or None before the first call."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def health_score(self) -> float:
+        """Lower is better: median latency inflated by the recent error rate."""
+        latency = self.typical_latency()
+        if latency is None:
+            latency = 0.0 # Untried backends get a chance
+        return latency * (1.0 + 4.0 * self.error_rate()) + (1000.0 if self.error_rate() >= settings.LLM_ROUTER_ERROR_RATE_THRESHOLD else 0.0)
+
+    def record(self, elapsed: float, success: bool) -> None:
+        self.latencies.append(elapsed)
+        self.outcomes.append(success)
+
+    def stats(self) -> Dict[str, Any]:
+        latency = self.typical_latency()
+        return {
+            "name": self.name,
+            "calls": len(self.outcomes),
+            "recent_error_rate": round(self.error_rate(), 3),
+            "median_latency_seconds": round(latency, 2) if latency is not None else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name='{self.name}')"
+
+class LLMProviderRouter:
+    """
+    Routes a prompt to the healthiest backend (lowest latency/error score, configured order breaking ties).
+    If the chosen backend fails, or has not answered within the per-request deadline, the call is re-issued
+    to the next backend; after a deadline both calls race and the first successful answer wins.
+    """
+
+    def __init__(self, backends: List[LLMBackend]):
+        if not backends:
+            raise ValueError("LLMProviderRouter needs at least one backend.")
+        self.backends = backends
+
+    def ranked_backends(self) -> List[LLMBackend]:
+        # sorted() is stable, so equally healthy backends keep their configured preference order.
+        return sorted(self.backends, key=lambda backend: backend.health_score())
+
+    async def _call_backend(
+        self,
+        backend: LLMBackend,
+        prompt_template: ChatPromptTemplate,
+        parser: BaseOutputParser,
+        params: Dict[str, Any],
+        user_api_key: Optional[str],
+        postprocess: Optional[Callable[[Any], Any]] = None,
+        callbacks: Optional[List[Any]] = None,
+    ) -> Any:
+        # Imported here: llm_service builds the default router, so a module-level import would be circular.
+        from app.services.llm_service import run_llm_chain
+
+        api_key: Optional[str] = None
+        start = time.monotonic()
+        try:
+            # Inside the try: a backend without a usable key counts as failing, so it is not ranked first again
+            if backend.key_provider:
+                api_key = await backend.key_provider.get_key(user_provided_key=user_api_key)
+            llm = backend.get_llm(api_key, cache=not user_api_key)
+            result = await run_llm_chain(prompt_template, llm, parser, params, max_retries=settings.LLM_ROUTER_RETRIES_PER_BACKEND, postprocess=postprocess, callbacks=callbacks, cache_chain=not user_api_key)
+        except asyncio.CancelledError:
+            # Lost the race against the alternate backend; count the time spent so slow backends fall behind.
+            backend.record(time.monotonic() - start, success=False)
+            raise
+        except Exception as e:
+            backend.record(time.monotonic() - start, success=False)
+            if backend.key_provider and api_key:
+                backend.key_provider.report_failure(api_key, status_code=_status_code_from_exception(e))
+            raise
+        backend.record(time.monotonic() - start, success=True)
+        if backend.key_provider and api_key:
+            backend.key_provider.report_success(api_key)
+        return result
+
+    async def invoke(
+        self,
+        prompt_template: ChatPromptTemplate,
+        parser: BaseOutputParser,
+        params: Dict[str, Any],
+        user_api_keys: Optional[Dict[str, Optional[str]]] = None,
+        deadline_seconds: Optional[float] = None,
+        postprocess: Optional[Callable[[Any], Any]] = None,
+        callbacks: Optional[List[Any]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Runs the prompt on the healthiest backend with failover.
+        Args:
+            prompt_template: The (language-specific) prompt; it is sent unchanged to every backend.
+            parser: Output parser for the chain.
+            params: Template parameters.
+            user_api_keys: Optional user-provided keys by backend name.
+            deadline_seconds: Time after which the call is re-issued to the next backend. Defaults to
+                settings.LLM_REQUEST_DEADLINE_SECONDS; 0 disables deadline-based re-issue.
+            postprocess: Optional repair/validation step applied to each backend's result (see run_llm_chain).
+            callbacks: Optional LangChain callback handlers (e.g. token usage) passed to every backend call.
+        Returns:
+            Tuple (result, name of the backend that produced it).
+        Raises:
+            The last backend error if every backend failed.
+        """
+        user_api_keys = user_api_keys or {}
+        if deadline_seconds is None:
+            deadline_seconds = settings.LLM_REQUEST_DEADLINE_SECONDS
+        pending_backends = self.ranked_backends()
+        running: Dict[asyncio.Task, LLMBackend] = {}
+        last_error: Optional[Exception] = None
+
+        def start_next() -> bool:
+            if not pending_backends:
+                return False
+            backend = pending_backends.pop(0)
+            logger.info(f"LLM router: sending request to backend '{backend.name}' (stats: {backend.stats()})")
+            task = asyncio.create_task(self._call_backend(backend, prompt_template, parser, params, user_api_keys.get(backend.name), postprocess, callbacks))
+            running[task] = backend
+            return True
+
+        start_next()
+        try:
+            while running:
+                timeout = deadline_seconds if deadline_seconds and pending_backends else None
+                done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    slow_names = ", ".join(backend.name for backend in running.values())
+                    logger.warning(f"LLM router: no answer from '{slow_names}' within {deadline_seconds}s deadline. Re-issuing to alternate backend.")
+                    start_next()
+                    continue
+                for task in done:
+                    backend = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"LLM router: backend '{backend.name}' failed: {e}")
+                        last_error = e
+                        continue
+                    logger.info(f"LLM router: backend '{backend.name}' answered.")
+                    return result, backend.name
+                if not running:
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        if last_error:
+            raise last_error
+        raise ValueError("No LLM backend was available to handle the request.")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.stats() for backend in self.backends]
+
+# --- Default backends built from settings ---
+def _create_gemini_llm(api_key: Optional[str]) -> ChatGoogleGenerativeAI:
+    logger.info(f"Initializing Google Gemini LLM with model: {settings.GEMINI_MODEL_NAME}")
+    return ChatGoogleGenerativeAI(
+        model=settings.GEMINI_MODEL_NAME,
+        google_api_key=api_key,
+        temperature=0.7, # Adjust as needed
+        max_output_tokens=8192 # Adjust as needed, Gemini Pro has larger context
+    )
+
+def _create_openai_llm(api_key: Optional[str]) -> ChatOpenAI:
+    logger.info(f"Initializing OpenAI chat LLM with model: {settings.OPENAI_CHAT_MODEL_NAME}")
+    return ChatOpenAI(
+        model=settings.OPENAI_CHAT_MODEL_NAME,
+        api_key=api_key,
+        temperature=0.7,
+        max_tokens=8192
+    )
+
+_BACKEND_BUILDERS: Dict[str, Callable[[], LLMBackend]] = {
+    "gemini": lambda: LLMBackend("gemini", _create_gemini_llm, GoogleKeyProvider(), model_name=settings.GEMINI_MODEL_NAME),
+    "openai": lambda: LLMBackend("openai", _create_openai_llm, OpenAIKeyProvider(), model_name=settings.OPENAI_CHAT_MODEL_NAME),
+}
+
+_script_router: Optional[LLMProviderRouter] = None
+
+def get_script_router() -> LLMProviderRouter:
+    """Process-wide router for script generation, built from settings.LLM_PROVIDERS on first use."""
+    global _script_router
+    if _script_router is None:
+        backends = []
+        for name in settings.LLM_PROVIDERS.split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in _BACKEND_BUILDERS:
+                logger.error(f"Unknown LLM provider '{name}' in LLM_PROVIDERS setting. Skipping.")
+                continue
+            backends.append(_BACKEND_BUILDERS[name]())
+        _script_router = LLMProviderRouter(backends)
+        logger.info(f"Initialized script LLM router with backends: {[backend.name for backend in backends]}")
+    return _script_router
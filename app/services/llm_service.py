@@ -1,18 +1,23 @@
 import asyncio
 import logging
 import time
-from typing import Dict, Any, TypeVar, Generic, Optional
+import functools
+from collections import OrderedDict
+from typing import Dict, Any, TypeVar, Generic, Optional, Tuple, Callable, List
 
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI 
-from langchain_openai import ChatOpenAI # Keep for potential future use or if TTS and LLM use different keys/providers
 
 from app.core.config import settings
-from app.core.prompts import NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG, NEWS_AUDIO_STYLE_CONFIG
-# KeyProvider can be simplified or bypassed if keys come directly from settings for each service type
-# from app.services.key_provider import KeyProvider 
-from app.services.key_provider import GoogleKeyProvider # Added GoogleKeyProvider
+from app.core.prompts import (
+    NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG,
+    NEWS_AUDIO_STYLE_CONFIG,
+    NEWS_SCRIPT_INTRO_OUTRO_INSTRUCTION_BY_LANG,
+    NEWS_SCRIPT_OMIT_INTRO_OUTRO_INSTRUCTION_BY_LANG
+)
+from app.services.llm_router import LLMProviderRouter, get_script_router
+from app.services.script_repair import validate_and_repair_script
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +50,26 @@ IMPORTANT: Please try again, ensuring your response is valid and complete text a
 """
     return ChatPromptTemplate.from_messages([("system", retry_template_str)])
 
+# --- Helper: Cached Chains ---
+# Composing prompt | llm | parser is not free, so chains are reused until the LLM instance (or prompt/parser) changes.
+_CHAIN_CACHE_SIZE = 32
+_chain_cache: "OrderedDict[Tuple[int, int, int], Tuple[Any, Any, Any, Any]]" = OrderedDict()
+
+def _get_chain(prompt_template: ChatPromptTemplate, llm: Any, parser: BaseOutputParser, cache: bool = True):
+    if not cache: # E.g. an LLM built for a user's own key, which must not outlive the request
+        return prompt_template | llm | parser
+    cache_key = (id(prompt_template), id(llm), id(parser))
+    cached = _chain_cache.get(cache_key)
+    # Compare identities as well, since id() values can be reused once an object is garbage collected.
+    if cached and cached[0] is prompt_template and cached[1] is llm and cached[2] is parser:
+        _chain_cache.move_to_end(cache_key)
+        return cached[3]
+    chain = prompt_template | llm | parser
+    _chain_cache[cache_key] = (prompt_template, llm, parser, chain)
+    if len(_chain_cache) > _CHAIN_CACHE_SIZE:
+        _chain_cache.popitem(last=False)
+    return chain
+
 # --- Core LLM Interaction Logic (adapted from run_chain) ---
 async def run_llm_chain(
     prompt_template: ChatPromptTemplate,
@@ -53,18 +78,31 @@ async def run_llm_chain(
     params: Dict[str, Any],
     max_retries: int = 2, 
     initial_retry_delay: float = 2.0,
+    postprocess: Optional[Callable[[T], T]] = None,
+    callbacks: Optional[List[Any]] = None,
+    cache_chain: bool = True,
 ) -> T:
-    escaped_params = {key: escape_curly_braces(value) if isinstance(value, str) else value for key, value in params.items()}
-    chain = prompt_template | llm | parser
+    """
+    Invokes prompt | llm | parser with retries and exponential backoff.
+    The composed chain is cached per LLM instance unless cache_chain is False (LLMs built for a user key).
+    If postprocess is given, it is applied to each result (e.g. local repair/validation); it should
+    raise when the result is unusable, which is the only case besides errors that costs another LLM call.
+    Callbacks (e.g. a token usage handler) see every attempt, including ones that are retried.
+    """
+    # Parameter values are substituted as values, never re-parsed as template text, so they need no brace escaping.
+    chain = _get_chain(prompt_template, llm, parser, cache=cache_chain)
+    config = {"callbacks": callbacks} if callbacks else None
     retries = 0
     last_error = None
     while retries <= max_retries:
         try:
             logger.info(f"Invoking LLM chain (Attempt {retries + 1}/{max_retries + 1}) with model: {llm.model_name if hasattr(llm, 'model_name') else type(llm)}")
-            result = await chain.ainvoke(escaped_params)
+            result = await chain.ainvoke(params, config=config)
             if isinstance(result, str) and not result.strip():
                 logger.warning("LLM returned an empty string. Retrying if attempts left...")
                 raise ValueError("LLM returned an empty string.")
+            if postprocess:
+                result = postprocess(result)
             return result
         except Exception as e:
             logger.error(f"Error in LLM chain execution (Attempt {retries + 1}): {e}", exc_info=True)
@@ -79,86 +117,140 @@ async def run_llm_chain(
                 raise
     raise Exception(f"LLM chain failed after {max_retries} retries. Last error: {last_error}")
 
-# --- LLM Instantiation ---
-async def get_llm_instance(user_google_api_key: Optional[str] = None):
-    """Initialize and return the LLM instance, now defaulting to Gemini.
-    Uses user_google_api_key if provided, otherwise falls back to settings.
+# --- Precompiled Script Prompts ---
+_str_output_parser = StrOutputParser()
+
+def _resolve_audio_style_key(audio_style_key: str) -> str:
+    return audio_style_key if audio_style_key in NEWS_AUDIO_STYLE_CONFIG else "standard"
+
+def get_intro_outro_instruction(language_iso_code: str) -> str:
+    """The prompt line about the welcome and sign-off; tells the LLM to omit them when stock clips are spliced in."""
+    if settings.TTS_STOCK_CLIPS_ENABLED and language_iso_code in NEWS_SCRIPT_OMIT_INTRO_OUTRO_INSTRUCTION_BY_LANG:
+        return NEWS_SCRIPT_OMIT_INTRO_OUTRO_INSTRUCTION_BY_LANG[language_iso_code]
+    return NEWS_SCRIPT_INTRO_OUTRO_INSTRUCTION_BY_LANG.get(language_iso_code, NEWS_SCRIPT_INTRO_OUTRO_INSTRUCTION_BY_LANG["en"])
+
+@functools.lru_cache(maxsize=None)
+def _compile_news_script_prompt(language_iso_code: str, audio_style_key: str) -> ChatPromptTemplate:
+    template_str = NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG[language_iso_code]
+    style_instruction = NEWS_AUDIO_STYLE_CONFIG[audio_style_key]["llm_script_instruction"]
+    # The style text is fixed per style, so it is baked into the template once; only {news_context} stays a variable.
+    template_str = template_str.replace("{audio_style_script_instruction}", escape_curly_braces(style_instruction))
+    template_str = template_str.replace("{intro_outro_instruction}", escape_curly_braces(get_intro_outro_instruction(language_iso_code)))
+    logger.info(f"Compiled news script prompt for language: {language_iso_code}, style: {audio_style_key}")
+    return ChatPromptTemplate.from_template(template_str)
+
+def get_news_script_prompt(language_iso_code: str, audio_style_key: str) -> ChatPromptTemplate:
     """
-    google_key_provider = GoogleKeyProvider()
-    try:
-        actual_google_api_key = await google_key_provider.get_key(user_provided_key=user_google_api_key)
-    except ValueError as e:
-        logger.error(f"Failed to get Google API Key for LLM: {e}")
-        raise ValueError(f"Google API Key for LLM could not be retrieved: {e}")
-
-    # This check becomes redundant if get_key handles it, but kept for defense in depth for now.
-    # if not settings.GOOGLE_API_KEY or settings.GOOGLE_API_KEY == "YOUR_GOOGLE_API_KEY_HERE":
-    #     logger.error("Google API Key for Gemini LLM is not configured or is set to placeholder.")
-    #     raise ValueError("GOOGLE_API_KEY for LLM is not configured. Please set it in .env and app/core/config.py.")
-    
-    logger.info(f"Initializing Google Gemini LLM with model: {settings.GEMINI_MODEL_NAME}")
-    try:
-        return ChatGoogleGenerativeAI(
-            model=settings.GEMINI_MODEL_NAME, 
-            google_api_key=actual_google_api_key, # Use the resolved key
-            temperature=0.7, # Adjust as needed
-            max_output_tokens=8192 # Adjust as needed, Gemini Pro has larger context
-        )
-    except Exception as e:
-        logger.error(f"Failed to initialize ChatGoogleGenerativeAI: {e}", exc_info=True)
-        raise ValueError(f"Could not initialize Gemini LLM: {e}")
+    Returns the parsed prompt for (language, style), compiling it on first use.
+    Unknown styles share the "standard" entry so arbitrary request values cannot grow the cache.
+    Raises:
+        KeyError: If the language has no prompt.
+    """
+    return _compile_news_script_prompt(language_iso_code, _resolve_audio_style_key(audio_style_key))
 
 # --- News Podcast Script Generation Service Function ---
+def _summarize_llm_usage(
+    usage_handler: UsageMetadataCallbackHandler,
+    router: LLMProviderRouter,
+    backend_name: Optional[str],
+    prompt_chars: int,
+    output_text: str,
+) -> Dict[str, Any]:
+    """
+    Token totals collected by the callback handler (summed over every model and attempt), or a
+    chars-per-token estimate when the provider did not report usage metadata. Without an answer
+    (backend_name None), only reported tokens count: there is nothing to estimate from.
+    """
+    backend_model = next((backend.model_name for backend in router.backends if backend.name == backend_name), None)
+    reported = usage_handler.usage_metadata
+    if reported:
+        return {
+            "provider": backend_name or next((backend.name for backend in router.backends if backend.model_name in reported), None),
+            "model": backend_model or next(iter(reported)),
+            "input_tokens": sum(usage.get("input_tokens", 0) for usage in reported.values()),
+            "output_tokens": sum(usage.get("output_tokens", 0) for usage in reported.values()),
+            "tokens_estimated": False,
+        }
+    if backend_name is None:
+        return {"provider": None, "model": None, "input_tokens": 0, "output_tokens": 0, "tokens_estimated": False}
+    # Imported here: usage_service imports the ORM models, which this module otherwise does not need.
+    from app.services.usage_service import estimate_tokens
+    return {
+        "provider": backend_name,
+        "model": backend_model,
+        "input_tokens": estimate_tokens(prompt_chars),
+        "output_tokens": estimate_tokens(len(output_text)),
+        "tokens_estimated": True,
+    }
+
 async def generate_news_podcast_script(
     news_items_content: str,
     language_iso_code: str,
     audio_style_key: str, # e.g., "standard", "engaging_storyteller"
-    user_google_api_key: Optional[str] = None # Added user_google_api_key
+    user_google_api_key: Optional[str] = None, # Added user_google_api_key
+    user_openai_api_key: Optional[str] = None,
+    router: Optional[LLMProviderRouter] = None,
+    usage_out: Optional[Dict[str, Any]] = None
 ) -> str:
     """
     Generates a news podcast script using an LLM.
+    The request goes to the healthiest configured provider (see llm_router); on errors or
+    when the per-request deadline passes it is re-issued to the alternate provider.
     Args:
         news_items_content: A string containing the summarized/processed news items.
         language_iso_code: ISO 639-1 language code (e.g., "en", "es").
         audio_style_key: Key for the desired audio style from NEWS_AUDIO_STYLE_CONFIG.
+        user_google_api_key: Optional user-provided key for the Gemini backend.
+        user_openai_api_key: Optional user-provided key for the OpenAI chat backend.
+        router: Router to use instead of the process-wide default (e.g. one built on stub backends).
+        usage_out: Optional dict filled with the provider, model, input/output tokens (estimated from
+            text length when the provider reports none) and latency of the generation, including the
+            tokens of failed and retried attempts. Filled when the generation fails too.
     Returns:
         The generated audio script as a string.
     Raises:
         ValueError: If the language or audio style is not supported.
-        Exception: If LLM script generation fails after retries.
+        Exception: If LLM script generation fails on every provider.
     """
     if language_iso_code not in NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG:
         logger.error(f"Unsupported language for news script generation: {language_iso_code}")
         raise ValueError(f"Language '{language_iso_code}' is not supported for news script generation.")
     
-    prompt_template_str = NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG[language_iso_code]
-    style_config = NEWS_AUDIO_STYLE_CONFIG.get(audio_style_key, NEWS_AUDIO_STYLE_CONFIG["standard"])
-    audio_style_llm_instruction = style_config["llm_script_instruction"]
-
-    prompt = ChatPromptTemplate.from_template(prompt_template_str)
-    llm = await get_llm_instance(user_google_api_key=user_google_api_key) # Pass key to get_llm_instance
-    parser = StrOutputParser()
+    prompt = get_news_script_prompt(language_iso_code, audio_style_key)
+    parser = _str_output_parser
+    router = router or get_script_router()
 
     MAX_CONTEXT_CHARS = 300000 # Gemini has a larger context window generally
     if len(news_items_content) > MAX_CONTEXT_CHARS:
         logger.warning(f"News content length ({len(news_items_content)}) exceeds limit ({MAX_CONTEXT_CHARS}). Truncating.")
         news_items_content = news_items_content[:MAX_CONTEXT_CHARS] + "... (content truncated)"
 
-    params = {
-        "news_context": news_items_content,
-        "audio_style_script_instruction": audio_style_llm_instruction,
-        # The prompts use {language_name}, ensure this aligns or change prompt to {language_iso_code}
-        "language_name": language_iso_code 
-    }
+    params = {"news_context": news_items_content}
 
-    logger.info(f"Generating news podcast script with Gemini for language: {language_iso_code}, style: {audio_style_key}")
+    logger.info(f"Generating news podcast script for language: {language_iso_code}, style: {audio_style_key}")
+    usage_handler = UsageMetadataCallbackHandler()
+    start_time = time.monotonic()
+    audio_script, backend_name = "", None
     try:
-        audio_script = await run_llm_chain(prompt, llm, parser, params)
+        audio_script, backend_name = await router.invoke(
+            prompt,
+            parser,
+            params,
+            user_api_keys={"gemini": user_google_api_key, "openai": user_openai_api_key},
+            postprocess=validate_and_repair_script, # Fix rule-8 violations locally; retry only if unrepairable
+            callbacks=[usage_handler]
+        )
         if not audio_script or len(audio_script.strip()) < 20:
-            logger.error(f"LLM (Gemini) generated an invalid or very short script. Script: '{audio_script[:100]}...'")
+            logger.error(f"LLM ({backend_name}) generated an invalid or very short script. Script: '{audio_script[:100]}...'")
             raise ValueError("Generated audio script was invalid or too short.")
-        logger.info(f"Successfully generated news script with Gemini. Length: {len(audio_script)}")
+        logger.info(f"Successfully generated news script with {backend_name}. Length: {len(audio_script)}")
         return audio_script
     except Exception as e:
-        logger.exception(f"Failed to generate news podcast script with Gemini: {e}")
-        raise 
\ No newline at end of file
+        logger.exception(f"Failed to generate news podcast script: {e}")
+        raise
+    finally:
+        # Providers bill failed and retried attempts too
+        if usage_out is not None:
+            prompt_chars = len(NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG[language_iso_code]) + len(news_items_content)
+            usage_out.update(_summarize_llm_usage(usage_handler, router, backend_name, prompt_chars, audio_script or ""))
+            usage_out["latency_ms"] = int((time.monotonic() - start_time) * 1000)
@@ -0,0 +1,300 @@
+import logging
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- MPEG audio header tables (Layer III only; that is all TTS providers return as "mp3") ---
+_VERSION_MPEG1 = 3
+_VERSION_MPEG2 = 2
+_VERSION_MPEG25 = 0
+_LAYER_III = 1
+
+_BITRATES_KBPS = {
+    _VERSION_MPEG1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    _VERSION_MPEG2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+_BITRATES_KBPS[_VERSION_MPEG25] = _BITRATES_KBPS[_VERSION_MPEG2]
+
+_SAMPLE_RATES = {
+    _VERSION_MPEG1: [44100, 48000, 32000],
+    _VERSION_MPEG2: [22050, 24000, 16000],
+    _VERSION_MPEG25: [11025, 12000, 8000],
+}
+
+_CHANNEL_MODE_MONO = 3
+
+class Mp3FrameHeader(NamedTuple):
+    version: int
+    bitrate_index: int
+    bitrate_kbps: int
+    sample_rate: int
+    padding: int
+    channel_mode: int
+    frame_length: int
+    raw: bytes
+
+    @property
+    def samples_per_frame(self) -> int:
+        return 1152 if self.version == _VERSION_MPEG1 else 576
+
+    @property
+    def side_info_length(self) -> int:
+        mono = self.channel_mode == _CHANNEL_MODE_MONO
+        if self.version == _VERSION_MPEG1:
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+    @property
+    def side_info_blocks(self) -> Tuple[int, int, int]:
+        """
+        Layout of the per-granule, per-channel blocks in the side information:
+        (bit offset of the first block, bits per block, number of blocks).
+        """
+        mono = self.channel_mode == _CHANNEL_MODE_MONO
+        channels = 1 if mono else 2
+        if self.version == _VERSION_MPEG1:
+            return 9 + (5 if mono else 3) + 4 * channels, 59, 2 * channels
+        return 8 + (1 if mono else 2), 63, channels
+
+    @property
+    def stream_format(self) -> Tuple[int, int, bool]:
+        """What must match for frames of two streams to be joined: (version, sample rate, mono/stereo)."""
+        return self.version, self.sample_rate, self.channel_mode == _CHANNEL_MODE_MONO
+
+class Mp3Stream(NamedTuple):
+    first_header: Mp3FrameHeader # First audio frame (after any Xing/Info/VBRI frame)
+    frames: List[Tuple[int, int]] # (offset, length) of every audio frame in the source bytes
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.frames) * self.first_header.samples_per_frame / self.first_header.sample_rate
+
+def parse_frame_header(data: bytes, offset: int) -> Optional[Mp3FrameHeader]:
+    """Decodes the 4-byte MPEG Layer III header at offset, or None if there is no valid header there."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer != _LAYER_III or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None # Reserved version, other layers, free-format/bad bitrate or reserved sample rate
+    bitrate_kbps = _BITRATES_KBPS[version][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    coefficient = 144 if version == _VERSION_MPEG1 else 72
+    frame_length = coefficient * bitrate_kbps * 1000 // sample_rate + padding
+    return Mp3FrameHeader(
+        version=version,
+        bitrate_index=bitrate_index,
+        bitrate_kbps=bitrate_kbps,
+        sample_rate=sample_rate,
+        padding=padding,
+        channel_mode=(b3 >> 6) & 0x03,
+        frame_length=frame_length,
+        raw=bytes((b0, b1, b2, b3)),
+    )
+
+def _id3v2_length(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9] # Syncsafe integer
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _is_info_frame(data: bytes, offset: int, header: Mp3FrameHeader) -> bool:
+    """True for the Xing/Info/VBRI metadata frame encoders put first; it holds no audio and describes only its own file."""
+    xing_at = offset + 4 + header.side_info_length
+    if data[xing_at:xing_at + 4] in (b"Xing", b"Info"):
+        return True
+    return data[offset + 36:offset + 40] == b"VBRI"
+
+def _info_frame_count(data: bytes, offset: int, header: Mp3FrameHeader) -> Optional[int]:
+    """Total frame count stored in a Xing/Info or VBRI header frame, if the encoder recorded one."""
+    xing_at = offset + 4 + header.side_info_length
+    if data[xing_at:xing_at + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing_at + 4:xing_at + 8], "big")
+        if flags & 0x01 and len(data) >= xing_at + 12:
+            return int.from_bytes(data[xing_at + 8:xing_at + 12], "big")
+        return None
+    if data[offset + 36:offset + 40] == b"VBRI" and len(data) >= offset + 54:
+        return int.from_bytes(data[offset + 50:offset + 54], "big")
+    return None
+
+def _first_frame(data: bytes) -> Optional[Tuple[int, Mp3FrameHeader]]:
+    """First frame header after any ID3v2 tag, confirmed by a valid header right after it."""
+    offset = _id3v2_length(data)
+    while offset + 4 <= len(data):
+        header = parse_frame_header(data, offset)
+        if header is not None:
+            following = offset + header.frame_length
+            if following + 4 > len(data) or parse_frame_header(data, following) is not None:
+                return offset, header
+        next_sync = data.find(b"\xff", offset + 1)
+        if next_sync == -1:
+            return None
+        offset = next_sync
+    return None
+
+def mp3_duration_seconds(data: bytes) -> Optional[float]:
+    """
+    Duration of an MP3 without decoding: from the Xing/Info/VBRI frame count when present,
+    otherwise by counting frames. None if data holds no MP3 frames.
+    """
+    first = _first_frame(data)
+    if first is None:
+        return None
+    offset, header = first
+    frame_count = _info_frame_count(data, offset, header)
+    if frame_count is not None:
+        return frame_count * header.samples_per_frame / header.sample_rate
+    stream = parse_mp3(data)
+    return stream.duration_seconds if stream else None
+
+def mp3_file_duration_seconds(path: str) -> Optional[float]:
+    """mp3_duration_seconds for a file, reading only its head when it carries a Xing/Info/VBRI frame count."""
+    with open(path, "rb") as f:
+        head = f.read(65536)
+        first = _first_frame(head)
+        if first is not None and _info_frame_count(head, *first) is not None:
+            return mp3_duration_seconds(head)
+        return mp3_duration_seconds(head + f.read())
+
+def parse_mp3(data: bytes) -> Optional[Mp3Stream]:
+    """
+    Walks the Layer III frames of an MP3 file, skipping ID3 tags and the Xing/Info/VBRI frame.
+    Returns:
+        The stream's frame table, or None if no consistent run of frames was found.
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128 # ID3v1 trailer
+    offset = _id3v2_length(data)
+    frames: List[Tuple[int, int]] = []
+    first_header: Optional[Mp3FrameHeader] = None
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header is not None and offset + header.frame_length > end:
+            break # Truncated last frame
+        if header is None:
+            # Not at a frame boundary (leading junk, or junk between frames): resync on the next 0xFF byte.
+            next_sync = data.find(b"\xff", offset + 1, end)
+            if next_sync == -1:
+                break
+            offset = next_sync
+            continue
+        if first_header is None:
+            if _is_info_frame(data, offset, header):
+                offset += header.frame_length
+                continue
+            first_header = header
+        elif header.stream_format != first_header.stream_format:
+            logger.warning(f"MP3 stream changes format at byte {offset}; treating it as unparseable.")
+            return None
+        frames.append((offset, header.frame_length))
+        offset += header.frame_length
+    if first_header is None:
+        return None
+    return Mp3Stream(first_header=first_header, frames=frames)
+
+def silence_frame_count(template: Mp3FrameHeader, duration_ms: int) -> int:
+    if duration_ms <= 0:
+        return 0
+    samples = template.sample_rate * duration_ms / 1000
+    return max(1, round(samples / template.samples_per_frame))
+
+def silence_frames(template: Mp3FrameHeader, duration_ms: int) -> bytes:
+    """
+    Pre-encoded silence matching the template frame's version, sample rate, channel mode and bitrate.
+    A Layer III frame whose side information is all zero carries no Huffman data, so it decodes to
+    digital silence without needing an encoder.
+    """
+    frame_count = silence_frame_count(template, duration_ms)
+    if not frame_count:
+        return b""
+    header = bytearray(template.raw)
+    header[1] |= 0x01 # No CRC
+    header[2] &= ~0x02 & 0xFF # No padding
+    header[3] &= 0xC0 # Keep the channel mode; clear mode extension, copyright, original and emphasis
+    coefficient = 144 if template.version == _VERSION_MPEG1 else 72
+    frame_length = coefficient * template.bitrate_kbps * 1000 // template.sample_rate
+    frame = bytes(header) + bytes(frame_length - 4)
+    return frame * frame_count
+
+def write_frames(output: BinaryIO, data: bytes, stream: Mp3Stream) -> int:
+    """Writes the stream's audio frames (contiguous runs in one call each) to output. Returns bytes written."""
+    written = 0
+    run_start, run_end = None, None
+    for offset, length in stream.frames:
+        if run_end == offset:
+            run_end += length
+            continue
+        if run_start is not None:
+            output.write(data[run_start:run_end])
+            written += run_end - run_start
+        run_start, run_end = offset, offset + length
+    if run_start is not None:
+        output.write(data[run_start:run_end])
+        written += run_end - run_start
+    return written
+
+class Mp3FormatMismatch(ValueError):
+    """Raised when an MP3 cannot be appended frame by frame to the stream being written."""
+    pass
+
+class Mp3StreamWriter:
+    """
+    Appends MP3 files to an open output one at a time, frame by frame, with silence frames between them.
+    Only the file being appended is held in memory, so peak memory does not depend on episode length.
+
+    Args:
+        output: Binary file object the joined stream is written to.
+        pause_ms: Silence inserted between appended files.
+        waveform: Optional collector with add_stream(data, stream) and add_silence(frame_count), fed
+            everything written (see app.services.waveform.WaveformAccumulator).
+    """
+
+    def __init__(self, output: BinaryIO, pause_ms: int = 0, waveform=None):
+        self.output = output
+        self.pause_ms = pause_ms
+        self.waveform = waveform
+        self.first_header: Optional[Mp3FrameHeader] = None
+        self._pause: bytes = b""
+        self._pause_frame_count = 0
+        self.frames_written = 0
+        self.bytes_written = 0
+
+    def append(self, data: bytes, source: str = "<bytes>") -> Mp3Stream:
+        """
+        Raises:
+            Mp3FormatMismatch: If data has no parseable frames or a different format than the first appended file.
+        """
+        stream = parse_mp3(data)
+        if stream is None:
+            raise Mp3FormatMismatch(f"Could not parse MP3 frames of {source}.")
+        if self.first_header is None:
+            self.first_header = stream.first_header
+            self._pause = silence_frames(stream.first_header, self.pause_ms)
+            self._pause_frame_count = silence_frame_count(stream.first_header, self.pause_ms)
+        elif stream.first_header.stream_format != self.first_header.stream_format:
+            raise Mp3FormatMismatch(f"MP3 {source} has format {stream.first_header.stream_format}, expected {self.first_header.stream_format}.")
+        else:
+            self.output.write(self._pause)
+            self.bytes_written += len(self._pause)
+            self.frames_written += self._pause_frame_count
+            if self.waveform is not None:
+                self.waveform.add_silence(self._pause_frame_count)
+        self.bytes_written += write_frames(self.output, data, stream)
+        self.frames_written += len(stream.frames)
+        if self.waveform is not None:
+            self.waveform.add_stream(data, stream)
+        return stream
+
+    @property
+    def duration_seconds(self) -> float:
+        if self.first_header is None:
+            return 0.0
+        return self.frames_written * self.first_header.samples_per_frame / self.first_header.sample_rate
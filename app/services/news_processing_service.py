@@ -6,8 +6,85 @@ from bs4 import BeautifulSoup # New import
 import asyncio # For running async http requests if needed, or just for consistency with async def
 import random # Added for shuffling
 
+from app.services import cpu_pool
+
 logger = logging.getLogger(__name__)
 
+_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 NewsListenerApp/1.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'DNT': '1', # Do Not Track
+    'Upgrade-Insecure-Requests': '1'
+}
+
+ARTICLE_SEPARATOR = "\n\n---\nEND OF ARTICLE\n---\n\n" # Between the articles of a digest's news content
+
+def count_articles(news_content: str) -> int:
+    return news_content.count(ARTICLE_SEPARATOR) + 1 if news_content else 0
+
+# --- Parsing (CPU-bound; module-level so it can run in the worker's process pool, see cpu_pool) ---
+def extract_article_text(html_content: str, url: str) -> Optional[str]:
+    """Extracts the article text from a page's HTML. None if no substantial text was found."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    paragraphs = soup.find_all('p')
+    text_content = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+
+    if not text_content.strip() or len(text_content.strip()) < 100: # Check for minimal content length
+        logger.warning(f"Paragraph extraction yielded little to no content for URL: {url}. Trying main content tags.")
+        # Try to find common main content containers
+        main_content_tags = soup.find_all(['article', 'main', {'role': 'main'}, {'id': 'content'}, {'class': 'content'}])
+        if main_content_tags:
+            text_content = "\n".join([tag.get_text(separator='\n', strip=True) for tag in main_content_tags])
+        else:
+             # Fallback: get text from body, can be noisy
+            body_text = soup.body.get_text(separator='\n', strip=True) if soup.body else None
+            if body_text and len(body_text) > 100:
+                logger.info(f"Falling back to body text for {url}")
+                text_content = body_text
+            else:
+                logger.warning(f"No substantial text content found for URL: {url}")
+                return None
+
+    return text_content.strip()
+
+def parse_feed_items(feed_content: bytes, rss_url: str) -> List[Dict[str, str]]:
+    """Parses a fetched RSS/Atom document into items with title, link, summary and text for the LLM."""
+    items = []
+    feed_data = feedparser.parse(feed_content)
+
+    if feed_data.bozo:
+        logger.warning(f"RSS feed {rss_url} may be malformed: {feed_data.bozo_exception}")
+
+    for entry in feed_data.entries:
+        title = entry.get("title", "")
+        link = entry.get("link", "")
+        summary = entry.get("summary", entry.get("description", ""))
+
+        content_from_rss = ""
+        if hasattr(entry, 'content') and entry.content:
+            if isinstance(entry.content, list) and len(entry.content) > 0:
+                content_value = entry.content[0].get('value', '')
+                soup = BeautifulSoup(content_value, 'html.parser')
+                content_from_rss = soup.get_text(separator='\n', strip=True)
+
+        # Prefer full content from RSS, then summary. Title used if both are empty.
+        text_for_llm = content_from_rss if content_from_rss else summary
+        if not text_for_llm.strip() and title: # If content and summary are empty, use title as placeholder
+            text_for_llm = title
+
+        if title and link: # Must have at least title and link
+            items.append({
+                "title": title.strip(),
+                "link": link.strip(),
+                "summary": summary.strip(),
+                "content_preview": text_for_llm.strip()[:500], # Preview of what we send to LLM initially
+                "full_content_from_rss": text_for_llm.strip()
+            })
+    return items
+
 class NewsProcessingService:
     def __init__(self):
         # In the future, this could initialize clients for news APIs, etc.
@@ -16,17 +93,9 @@ class NewsProcessingService:
     async def _fetch_article_content(self, url: str) -> Optional[str]:
         """Fetches and extracts text content from a single article URL."""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 NewsListenerApp/1.0',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive',
-                'DNT': '1', # Do Not Track
-                'Upgrade-Insecure-Requests': '1'
-            }
             # Using asyncio.to_thread for synchronous requests in an async function
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda: requests.get(url, timeout=15, headers=headers))
+            response = await loop.run_in_executor(None, lambda: requests.get(url, timeout=15, headers=_REQUEST_HEADERS))
             response.raise_for_status()
             
             # Decode content explicitly using UTF-8, fallback to apparent_encoding
@@ -36,28 +105,7 @@ class NewsProcessingService:
             except UnicodeDecodeError:
                 html_content = content_bytes.decode(response.apparent_encoding, errors='replace')
 
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            paragraphs = soup.find_all('p')
-            text_content = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-            
-            if not text_content.strip() or len(text_content.strip()) < 100: # Check for minimal content length
-                logger.warning(f"Paragraph extraction yielded little to no content for URL: {url}. Trying main content tags.")
-                # Try to find common main content containers
-                main_content_tags = soup.find_all(['article', 'main', {'role': 'main'}, {'id': 'content'}, {'class': 'content'}])
-                if main_content_tags:
-                    text_content = "\n".join([tag.get_text(separator='\n', strip=True) for tag in main_content_tags])
-                else:
-                     # Fallback: get text from body, can be noisy
-                    body_text = soup.body.get_text(separator='\n', strip=True) if soup.body else None
-                    if body_text and len(body_text) > 100:
-                        logger.info(f"Falling back to body text for {url}")
-                        text_content = body_text
-                    else:
-                        logger.warning(f"No substantial text content found for URL: {url}")
-                        return None
-            
-            return text_content.strip()
+            return await cpu_pool.run(extract_article_text, html_content, url)
 
         except requests.Timeout:
             logger.error(f"Timeout fetching URL {url}")
@@ -74,38 +122,11 @@ class NewsProcessingService:
         items = []
         try:
             logger.info(f"Fetching RSS feed: {rss_url}")
-            # Using asyncio.to_thread for synchronous feedparser in an async function
+            # Download in a thread, parse in the CPU pool
             loop = asyncio.get_event_loop()
-            feed_data = await loop.run_in_executor(None, lambda: feedparser.parse(rss_url))
-
-            if feed_data.bozo:
-                logger.warning(f"RSS feed {rss_url} may be malformed: {feed_data.bozo_exception}")
-
-            for entry in feed_data.entries:
-                title = entry.get("title", "")
-                link = entry.get("link", "")
-                summary = entry.get("summary", entry.get("description", ""))
-                
-                content_from_rss = ""
-                if hasattr(entry, 'content') and entry.content:
-                    if isinstance(entry.content, list) and len(entry.content) > 0:
-                        content_value = entry.content[0].get('value', '')
-                        soup = BeautifulSoup(content_value, 'html.parser')
-                        content_from_rss = soup.get_text(separator='\n', strip=True)
-                
-                # Prefer full content from RSS, then summary. Title used if both are empty.
-                text_for_llm = content_from_rss if content_from_rss else summary
-                if not text_for_llm.strip() and title: # If content and summary are empty, use title as placeholder
-                    text_for_llm = title
-
-                if title and link: # Must have at least title and link
-                    items.append({
-                        "title": title.strip(), 
-                        "link": link.strip(), 
-                        "summary": summary.strip(), 
-                        "content_preview": text_for_llm.strip()[:500], # Preview of what we send to LLM initially
-                        "full_content_from_rss": text_for_llm.strip()
-                    })
+            response = await loop.run_in_executor(None, lambda: requests.get(rss_url, timeout=15, headers=_REQUEST_HEADERS))
+            response.raise_for_status()
+            items = await cpu_pool.run(parse_feed_items, response.content, rss_url)
             logger.info(f"Fetched {len(items)} items from RSS feed: {rss_url}")
         except Exception as e:
             logger.error(f"Error fetching or parsing RSS feed {rss_url}: {e}", exc_info=True)
@@ -231,7 +252,7 @@ class NewsProcessingService:
             return ("No news content could be found or processed based on the provided criteria. "
                     "Please try different topics, keywords, or add RSS feeds to your preferences.")
 
-        final_content = "\n\n---\nEND OF ARTICLE\n---\n\n".join(all_processed_news_items_text)
+        final_content = ARTICLE_SEPARATOR.join(all_processed_news_items_text)
         logger.info(f"NewsProcessingService: Returning content of length {len(final_content)} characters from {len(all_processed_news_items_text)} articles.")
         return final_content
 
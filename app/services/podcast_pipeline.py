@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.job_models import JobStage
+from app.models.news_models import NewsDigest, NewsDigestStatus
+from app.services import news_processing_service, llm_service, podcast_service, usage_service, progress_events, hls_playlist
+from app.services.progress_events import ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+# The generation pipeline as separate stages (see JobStage). Each runs in the worker pool of its stage
+# (app/worker.py) with the worker's own session. A stage returns its result, returns None/False if it marked
+# the digest FAILED for a reason retrying would not fix, and raises (after rolling back) to have the job retried.
+# Stage outputs are kept on the digest (news_content, generated_script_text; chunk audio pinned in the TTS
+# cache, see generation_checkpoints), so a resumed generation starts at its first incomplete stage.
+
+def first_incomplete_stage(news_digest: NewsDigest) -> str:
+    """The stage a resumed generation of the digest starts at."""
+    if news_digest.generated_script_text:
+        return JobStage.AUDIO
+    if news_digest.news_content:
+        return JobStage.SCRIPT
+    return JobStage.FETCH
+
+_END_EVENTS = {
+    NewsDigestStatus.FAILED: ProgressEvent.FAILED,
+    NewsDigestStatus.CANCELLED: ProgressEvent.CANCELLED,
+    NewsDigestStatus.TIMED_OUT: ProgressEvent.TIMED_OUT,
+}
+
+def mark_digest_failed(db: Session, news_digest_id: int, error_message: str, status: str = NewsDigestStatus.FAILED) -> None:
+    """Ends the digest's generation unsuccessfully: FAILED, or CANCELLED/TIMED_OUT."""
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+    if news_digest:
+        news_digest.status = status
+        news_digest.error_message = error_message
+        hls_playlist.remove_playlist(news_digest.playlist_url) # Segments of an attempt that will not finish
+        news_digest.playlist_url = None
+        db.commit()
+        progress_events.publish(news_digest_id, _END_EVENTS[status], message=error_message)
+
+def _get_digest(db: Session, news_digest_id: int, stage: str) -> Optional[NewsDigest]:
+    news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
+    if not news_digest:
+        logger.error(f"[PIPELINE:{stage}] NewsDigest {news_digest_id} not found; it was probably deleted after being queued.")
+    return news_digest
+
+async def fetch_news(
+    db: Session,
+    news_digest_id: int,
+    user_id: int,
+    generation_criteria: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Stage FETCH: feeds and articles for the criteria, as the text the script is written from (kept on the digest).
+    Returns:
+        The news content, or None if nothing usable was found (the digest is marked FAILED).
+    """
+    news_digest = _get_digest(db, news_digest_id, "FETCH")
+    if not news_digest:
+        return None
+    try:
+        logger.info(f"[PIPELINE:FETCH] NewsDigest {news_digest_id}: Processing with criteria: {generation_criteria}")
+        if news_digest.status != NewsDigestStatus.PENDING_SCRIPT: # Retry of an attempt that got further
+            news_digest.status = NewsDigestStatus.PENDING_SCRIPT
+            news_digest.error_message = None
+            db.commit()
+        progress_events.publish(news_digest_id, ProgressEvent.FETCHING)
+
+        news_processor = news_processing_service.NewsProcessingService()
+        processed_news_content = await news_processor.get_content_for_news_digest(
+            criteria=generation_criteria,
+            user_id=user_id
+        )
+
+        if not processed_news_content or processed_news_content.strip().startswith("No news content") or processed_news_content.strip().startswith("This is placeholder news content") :
+            logger.error(f"[PIPELINE:FETCH] NewsDigest {news_digest_id}: News processing returned no or placeholder content. Content: {(processed_news_content or '')[:200]}")
+            news_digest.status = NewsDigestStatus.FAILED
+            news_digest.error_message = "Failed to process news content or no content found for criteria."
+            if processed_news_content and len(processed_news_content) < 255 and (processed_news_content.strip().startswith("No news content") or processed_news_content.strip().startswith("This is placeholder news content")):
+                 news_digest.error_message = processed_news_content.strip()
+            db.commit()
+            progress_events.publish(news_digest_id, ProgressEvent.FAILED, message=news_digest.error_message)
+            return None
+
+        news_digest.news_content = processed_news_content
+        db.commit()
+        logger.info(f"[PIPELINE:FETCH] NewsDigest {news_digest_id}: News content processed. Length: {len(processed_news_content)}")
+        progress_events.publish(news_digest_id, ProgressEvent.ARTICLES_FETCHED, articles=news_processing_service.count_articles(processed_news_content))
+        return processed_news_content
+
+    except Exception as e:
+        logger.exception(f"[PIPELINE:FETCH] NewsDigest {news_digest_id}: Unhandled exception: {e}")
+        db.rollback()
+        raise
+
+def _record_failed_script_usage(db: Session, news_digest_id: int, script_usage: Dict[str, Any]) -> None:
+    """Records the tokens a failed script attempt spent, so they count like those of successful ones."""
+    if not (script_usage.get("input_tokens") or script_usage.get("output_tokens")):
+        return
+    try:
+        news_digest = db.get(NewsDigest, news_digest_id)
+        if news_digest:
+            usage_service.record_llm_usage(db, news_digest, **script_usage, failed=True)
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[PIPELINE:SCRIPT] NewsDigest {news_digest_id}: could not record usage of the failed attempt: {e}")
+
+async def write_script(
+    db: Session,
+    news_digest_id: int,
+    generation_criteria: Dict[str, Any],
+    news_content: Optional[str] = None,
+    user_openai_api_key: Optional[str] = None,
+    user_google_api_key: Optional[str] = None
+) -> bool:
+    """
+    Stage SCRIPT: the LLM script, stored on the digest, which then waits for audio (PENDING_AUDIO).
+    Written from news_content, by default the digest's (fetched by the FETCH stage).
+    """
+    news_digest = _get_digest(db, news_digest_id, "SCRIPT")
+    if not news_digest:
+        return False
+    news_content = news_content or news_digest.news_content
+    if not news_content:
+        mark_digest_failed(db, news_digest_id, "News content of the fetch stage is missing.")
+        return False
+    script_usage: Dict[str, Any] = {}
+    try:
+        progress_events.publish(news_digest_id, ProgressEvent.SCRIPT_STARTED)
+        generated_script = await llm_service.generate_news_podcast_script(
+            news_items_content=news_content,
+            language_iso_code=generation_criteria.get("language", "en"),
+            audio_style_key=generation_criteria.get("audio_style", "standard"),
+            user_google_api_key=user_google_api_key,
+            user_openai_api_key=user_openai_api_key,
+            usage_out=script_usage
+        )
+        news_digest.generated_script_text = generated_script
+        news_digest.status = NewsDigestStatus.PENDING_AUDIO
+        usage_service.record_llm_usage(db, news_digest, **script_usage)
+        db.commit()
+        progress_events.publish(news_digest_id, ProgressEvent.SCRIPT_READY)
+        logger.info(f"[PIPELINE:SCRIPT] NewsDigest {news_digest_id}: Script generated. Length: {len(generated_script)}")
+        return True
+
+    except asyncio.CancelledError: # Stage timeout, cancellation or lost lease
+        db.rollback()
+        _record_failed_script_usage(db, news_digest_id, script_usage)
+        raise
+    except Exception as e:
+        logger.exception(f"[PIPELINE:SCRIPT] NewsDigest {news_digest_id}: Unhandled exception: {e}")
+        db.rollback()
+        _record_failed_script_usage(db, news_digest_id, script_usage)
+        raise
+
+async def produce_audio(
+    db: Session,
+    news_digest_id: int,
+    generation_criteria: Dict[str, Any],
+    force_regenerate: bool,
+    user_openai_api_key: Optional[str] = None,
+    output_formats: Optional[List[str]] = None
+) -> bool:
+    """Stage AUDIO: TTS, assembly and renditions of the digest's script (podcast_service)."""
+    if not _get_digest(db, news_digest_id, "AUDIO"):
+        return False
+    try:
+        audio_url, error_msg = await podcast_service.generate_podcast_audio_for_digest(
+            db=db,
+            news_digest_id=news_digest_id,
+            language=generation_criteria.get("language", "en"),
+            audio_style=generation_criteria.get("audio_style", "standard"),
+            force_regenerate=force_regenerate,
+            user_openai_api_key=user_openai_api_key,
+            output_formats=output_formats
+        )
+
+        if error_msg:
+            logger.error(f"[PIPELINE:AUDIO] NewsDigest {news_digest_id}: Audio generation failed: {error_msg}")
+            progress_events.publish(news_digest_id, ProgressEvent.FAILED, message=error_msg)
+            return False
+        logger.info(f"[PIPELINE:AUDIO] NewsDigest {news_digest_id}: Audio generation successful. URL: {audio_url}")
+        progress_events.publish(news_digest_id, ProgressEvent.AUDIO_READY, audio_url=audio_url)
+        return True
+
+    except Exception as e:
+        logger.exception(f"[PIPELINE:AUDIO] NewsDigest {news_digest_id}: Unhandled exception: {e}")
+        db.rollback()
+        raise
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.news_models import NewsDigest, NewsDigestStatus
+from app.models.predefined_category_models import PredefinedCategory
+from app.models.preference_models import UserPreference
+from app.models.schedule_models import PodcastSchedule
+from app.models.user_models import User
+from app.services import audio_formats, coalescing, job_queue
+from app.services.generation_criteria import criteria_fingerprint
+from app.services.progress_events import ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+# Scheduled podcasts are generated before their listening time instead of while the user waits: workers
+# queue each one SCHEDULE_LEAD_MINUTES ahead, plus an offset of its own within SCHEDULE_SPREAD_MINUTES so
+# schedules set to the same time (the 7:00 briefing) do not all hit the providers at once, at a priority
+# behind on-demand requests. A schedule's podcast is queued with the criteria an on-demand request of the
+# same preferences or category resolves to, so the caches and category sharing apply to it as well.
+
+# --- Schedule times ---
+def parse_time_of_day(value: str) -> time:
+    """
+    Raises:
+        ValueError: If value is not a "HH:MM" time.
+    """
+    try:
+        hours, minutes = value.split(":")
+        if len(hours) != 2 or len(minutes) != 2:
+            raise ValueError
+        return time(int(hours), int(minutes))
+    except ValueError:
+        raise ValueError(f"Invalid time of day '{value}': expected HH:MM.")
+
+def get_timezone(name: str) -> ZoneInfo:
+    """
+    Raises:
+        ValueError: If name is not an IANA time zone.
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone '{name}'.")
+
+def _spread_offset(schedule_id: int) -> timedelta:
+    """The schedule's place in the spread window: stable, so each podcast is ready at the same time every day."""
+    window_seconds = max(0, settings.SCHEDULE_SPREAD_MINUTES) * 60
+    if window_seconds == 0:
+        return timedelta(0)
+    digest = hashlib.sha256(f"podcast-schedule:{schedule_id}".encode("utf-8")).digest()
+    return timedelta(seconds=int.from_bytes(digest[:8], "big") % window_seconds)
+
+def next_times(schedule: PodcastSchedule, after: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Next listening time of the schedule whose generation is queued after the given time (default: now),
+    and that queueing time, both naive UTC like the rest of the database.
+    """
+    tz = get_timezone(schedule.timezone)
+    time_of_day = parse_time_of_day(schedule.time_of_day)
+    ahead = timedelta(minutes=max(0, settings.SCHEDULE_LEAD_MINUTES)) + _spread_offset(schedule.id)
+    earliest = (after or datetime.utcnow()).replace(tzinfo=timezone.utc) + ahead
+    day = earliest.astimezone(tz).date()
+    while True:
+        # Wall-clock time on that day, so the podcast follows DST changes
+        delivery = datetime.combine(day, time_of_day, tzinfo=tz).astimezone(timezone.utc)
+        if delivery > earliest:
+            break
+        day += timedelta(days=1)
+    delivery = delivery.replace(tzinfo=None)
+    return delivery, delivery - ahead
+
+def reschedule(schedule: PodcastSchedule) -> None:
+    """Sets the next run of a created or changed schedule; inactive schedules have none."""
+    if schedule.is_active:
+        schedule.next_delivery_at, schedule.next_run_at = next_times(schedule)
+    else:
+        schedule.next_delivery_at, schedule.next_run_at = None, None
+
+# --- Criteria ---
+def _criteria_lists(source: Any, topics: str, keywords: str, rss_urls: str, exclude_keywords: str, exclude_source_domains: str) -> Dict[str, Any]:
+    """The list criteria of a category or preferences (source), read from the given attributes."""
+    return {
+        "topics": getattr(source, topics, None) or [],
+        "keywords": getattr(source, keywords, None) or [],
+        "rss_urls": [str(url) for url in getattr(source, rss_urls, None) or []],
+        "exclude_keywords": getattr(source, exclude_keywords, None) or [],
+        "exclude_source_domains": getattr(source, exclude_source_domains, None) or [],
+    }
+
+def resolve_criteria(db: Session, schedule: PodcastSchedule) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Generation criteria and source info of the schedule's next podcast: what POST /podcasts/generate-podcast
+    resolves for its category, or the user's preferences, without request overrides.
+    Returns:
+        (generation_criteria, source_info), or None if the category is gone or no longer active.
+    """
+    if schedule.predefined_category_id is not None:
+        category = db.query(PredefinedCategory).filter(
+            PredefinedCategory.id == schedule.predefined_category_id,
+            PredefinedCategory.is_active == True
+        ).first()
+        if not category:
+            return None
+        criteria = {
+            "source_type": "direct_input",
+            "language": schedule.language or category.language or "en",
+            "audio_style": schedule.audio_style or category.audio_style or "standard",
+            **_criteria_lists(category, "topics", "keywords", "rss_urls", "exclude_keywords", "exclude_source_domains"),
+        }
+        source_info = {
+            **criteria,
+            "source_type": "predefined_category_resolved",
+            "predefined_category_id": category.id,
+        }
+    else:
+        prefs = db.query(UserPreference).filter(UserPreference.user_id == schedule.user_id).first()
+        criteria = {
+            "source_type": "user_preferences",
+            "user_preference_id": prefs.id if prefs else None,
+            "language": schedule.language or (prefs.default_language if prefs else None) or "en",
+            "audio_style": schedule.audio_style or (prefs.default_audio_style if prefs else None) or "standard",
+            **_criteria_lists(prefs, "preferred_topics", "custom_keywords", "include_source_rss_urls", "exclude_keywords", "exclude_source_domains"),
+        }
+        source_info = {
+            "source_type": "user_preferences",
+            "user_preference_id": criteria["user_preference_id"],
+            "applied_criteria": {key: value for key, value in criteria.items() if key not in ("source_type", "user_preference_id")},
+        }
+    source_info["podcast_schedule_id"] = schedule.id
+    return criteria, source_info
+
+# --- Queueing ---
+def _queue_podcast(db: Session, schedule: PodcastSchedule) -> Optional[NewsDigest]:
+    """
+    The schedule's next podcast: the current shared edition of its category if there is one (committed
+    right away), else a digest with a generation job, which the caller commits.
+    """
+    resolved = resolve_criteria(db, schedule)
+    if resolved is None:
+        logger.warning(f"PodcastSchedule {schedule.id}: predefined category {schedule.predefined_category_id} is not available; skipping this podcast.")
+        return None
+    generation_criteria, source_info = resolved
+    fingerprint = criteria_fingerprint(generation_criteria)
+
+    if schedule.predefined_category_id is not None and settings.CATEGORY_PODCAST_SHARE_MINUTES > 0:
+        edition = coalescing.find_completed_podcast(
+            db, fingerprint, generation_criteria["language"], generation_criteria["audio_style"],
+            max_age_minutes=settings.CATEGORY_PODCAST_SHARE_MINUTES
+        )
+        if edition and edition.podcast_episode:
+            return coalescing.copy_completed_digest(db, edition, schedule.user_id, original_articles_info=source_info)
+
+    news_digest = NewsDigest(
+        user_id=schedule.user_id,
+        original_articles_info=source_info,
+        criteria_fingerprint=fingerprint,
+        status=NewsDigestStatus.PENDING_SCRIPT,
+        progress={"event": ProgressEvent.QUEUED, "at": datetime.utcnow().isoformat()}
+    )
+    db.add(news_digest)
+    db.flush()
+    job_queue.enqueue_generation_job(
+        db,
+        news_digest=news_digest,
+        generation_criteria=generation_criteria,
+        priority=settings.SCHEDULE_JOB_PRIORITY,
+        coalesce_key=job_queue.coalesce_key(criteria_fingerprint(generation_criteria, audio_formats.default_formats())),
+    )
+    return news_digest
+
+def queue_due_schedules(db: Session, limit: int = 100) -> int:
+    """
+    Queues the podcasts of active schedules whose run time has come and moves each schedule on to its next
+    run. Each schedule is claimed by a conditional update of its run time, so workers polling at the same
+    time queue it once. A run missed until past its listening time (no worker was running) is skipped.
+    Returns:
+        The number of podcasts queued.
+    """
+    now = datetime.utcnow()
+    due: List[PodcastSchedule] = db.query(PodcastSchedule) \
+        .filter(PodcastSchedule.is_active == True, PodcastSchedule.next_run_at <= now) \
+        .order_by(PodcastSchedule.next_run_at) \
+        .limit(limit) \
+        .all()
+    queued = 0
+    for schedule in due:
+        run_at, delivery_at = schedule.next_run_at, schedule.next_delivery_at
+        try:
+            next_delivery_at, next_run_at = next_times(schedule, after=now)
+        except ValueError as e: # Time zone removed from the tz database
+            logger.error(f"PodcastSchedule {schedule.id}: {e} Deactivating it.")
+            schedule.is_active = False
+            schedule.next_run_at = schedule.next_delivery_at = None
+            db.commit()
+            continue
+        try:
+            result = db.execute(
+                update(PodcastSchedule)
+                .where(PodcastSchedule.id == schedule.id, PodcastSchedule.next_run_at == run_at)
+                .values(next_run_at=next_run_at, next_delivery_at=next_delivery_at, last_run_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1: # Queued by another worker
+                db.rollback()
+                continue
+            user = db.get(User, schedule.user_id)
+            if delivery_at is not None and delivery_at <= now:
+                logger.warning(f"PodcastSchedule {schedule.id}: run of {run_at} missed its listening time {delivery_at}; skipped.")
+                news_digest = None
+            elif user is None or not user.is_active:
+                news_digest = None
+            else:
+                news_digest = _queue_podcast(db, schedule)
+            if news_digest is not None:
+                db.execute(
+                    update(PodcastSchedule)
+                    .where(PodcastSchedule.id == schedule.id)
+                    .values(last_news_digest_id=news_digest.id)
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"PodcastSchedule {schedule.id}: queueing its podcast failed: {e}", exc_info=True)
+            continue
+        if news_digest is not None:
+            queued += 1
+            job = job_queue.get_unfinished_job(db, news_digest.id)
+            if job is not None:
+                job_queue.coalesce_with_earlier_leader(db, job) # Identical schedules queued at the same moment
+            logger.info(f"PodcastSchedule {schedule.id}: queued NewsDigest {news_digest.id} for {delivery_at} UTC; next run at {next_run_at} UTC.")
+    return queued
@@ -1,21 +1,25 @@
 import asyncio
+import io
 import logging
 import os
 import uuid
 import tempfile
-import shutil # For robust temp file removal if needed, though os.remove is usually fine.
-from typing import Optional, List, Tuple
+from typing import BinaryIO, Optional, List, Tuple, Dict, Union
 from datetime import datetime, timedelta
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from openai import AsyncOpenAI, APIError
+from openai import AsyncOpenAI, APIError, APIStatusError, APIConnectionError
 from pydub import AudioSegment
 from langsmith.wrappers import wrap_openai # Added for LangSmith tracing
 
 from app.core.config import settings
-from app.models.news_models import NewsDigest, PodcastEpisode, NewsDigestStatus
+from app.models.news_models import NewsDigest, PodcastEpisode, PodcastEpisodeRendition, NewsDigestStatus
 from app.services.key_provider import OpenAIKeyProvider
+from app.services import usage_service, mp3_frames, hls_playlist, stock_clips, audio_formats, waveform, cpu_pool, progress_events, generation_checkpoints
+from app.services.progress_events import ProgressEvent
+from app.services.tts_cache import get_tts_cache, TTSChunkCache
+from app.services.chunk_planner import plan_tts_chunks
 # Import TTS instruction components and style configs from prompts.py
 from app.core.prompts import (
     TTS_PERSONA_NEWS,
@@ -28,65 +32,336 @@ from app.core.prompts import (
 
 logger = logging.getLogger(__name__)
 
-# --- Helper Function: Split Script (largely from your audio_service.py) ---
-def _split_script(script: str, limit: int) -> List[str]:
-    chunks = []
-    paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
-    for paragraph in paragraphs:
-        if len(paragraph) <= limit:
-            if paragraph: chunks.append(paragraph)
-        else:
-            current_pos = 0
-            while current_pos < len(paragraph):
-                end_pos = current_pos + limit
-                if end_pos >= len(paragraph):
-                    chunk = paragraph[current_pos:]
-                    if chunk.strip(): chunks.append(chunk.strip())
-                    break
-                else:
-                    split_point = -1
-                    for char in reversed(['.', '!', '?', '\n']):
-                        found = paragraph.rfind(char, current_pos, end_pos)
-                        if found != -1:
-                            split_point = found + 1
-                            break
-                    if split_point == -1:
-                        found = paragraph.rfind(' ', current_pos, end_pos)
-                        if found != -1: split_point = found + 1
-                        else: split_point = end_pos
-                    chunk = paragraph[current_pos:split_point]
-                    if chunk.strip(): chunks.append(chunk.strip())
-                    current_pos = split_point
-                    while current_pos < len(paragraph) and paragraph[current_pos].isspace():
-                        current_pos += 1
-    return chunks
-
-# --- Helper Function: Generate TTS Chunk (largely from your audio_service.py) ---
-async def _generate_tts_chunk(
-    async_client: AsyncOpenAI,
-    chunk_text: str,
+# --- Helper: OpenAI clients per pooled key ---
+_openai_clients: Dict[str, AsyncOpenAI] = {}
+
+def _get_openai_client(api_key: str, cache: bool = True) -> AsyncOpenAI:
+    """
+    Returns a (LangSmith-wrapped, if tracing is enabled) AsyncOpenAI client for api_key.
+    Args:
+        cache: Reuse the client across calls. Only for pooled server keys: user-provided keys must not
+            outlive the request, so the caller closes their client after use.
+    """
+    client = _openai_clients.get(api_key) if cache else None
+    if client is not None:
+        return client
+    client = AsyncOpenAI(api_key=api_key)
+    # Wrap the OpenAI client for LangSmith tracing if tracing is enabled
+    if os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true" or os.getenv("LANGSMITH_TRACING", "false").lower() == "true":
+        logger.info("LangSmith tracing enabled for OpenAI client in podcast_service.")
+        try:
+            client = wrap_openai(client)
+            logger.info("AsyncOpenAI client wrapped successfully with LangSmith.")
+        except Exception as e:
+            logger.error(f"Failed to wrap AsyncOpenAI client with LangSmith: {e}", exc_info=True)
+            # Proceed with the unwrapped client if wrapping fails.
+    else:
+        logger.info("LangSmith tracing not enabled for OpenAI client in podcast_service.")
+    if cache:
+        _openai_clients[api_key] = client
+    return client
+
+# --- Helper Function: Synthesize Speech with a pooled key ---
+async def _create_speech(
+    key_provider: OpenAIKeyProvider,
+    user_openai_api_key: Optional[str],
+    text: str,
     instruction_text: str,
-    output_path: str,
     tts_model: str,
-    tts_voice: str
+    tts_voice: str,
+    usage_counter: Optional[usage_service.TTSUsageCounter] = None,
+    response_format: str = "mp3"
 ):
+    """
+    Runs one TTS request with the next key from the pool (or the user's key) and reports the
+    outcome, including rate-limit headers, back to the key pool. Successful requests are added to usage_counter.
+    """
+    api_key = await key_provider.get_key(user_provided_key=user_openai_api_key)
+    async_client = _get_openai_client(api_key, cache=not user_openai_api_key)
     try:
-        response = await async_client.audio.speech.create(
+        raw_response = await async_client.audio.speech.with_raw_response.create(
             model=tts_model,
             voice=tts_voice,
-            input=chunk_text,
+            input=text,
             instructions=instruction_text,
-            response_format="mp3"
+            response_format=response_format
         )
-        await asyncio.to_thread(response.stream_to_file, output_path)
-        logger.debug(f"Successfully generated TTS chunk: {output_path}")
+        speech = raw_response.parse()
+    except APIStatusError as e:
+        key_provider.report_failure(api_key, status_code=e.status_code, headers=e.response.headers)
+        raise
+    except APIError:
+        key_provider.report_failure(api_key)
+        raise
+    finally:
+        if user_openai_api_key:
+            await async_client.close()
+    key_provider.report_success(api_key, headers=raw_response.headers)
+    if usage_counter is not None:
+        usage_counter.add(text)
+    return speech
+
+# --- Helper Function: Synthesize one chunk (largely from your audio_service.py) ---
+async def _synthesize_chunk(
+    key_provider: OpenAIKeyProvider,
+    user_openai_api_key: Optional[str],
+    chunk_text: str,
+    instruction_text: str,
+    tts_model: str,
+    tts_voice: str,
+    usage_counter: Optional[usage_service.TTSUsageCounter] = None,
+    audio_format: str = "mp3"
+) -> bytes:
+    """Returns the speech for chunk_text, from the TTS cache when an identical chunk was synthesized before."""
+    tts_cache = get_tts_cache()
+    cache_key = TTSChunkCache.make_key(chunk_text, tts_model, tts_voice, instruction_text, audio_format) if tts_cache else None
+    try:
+        if tts_cache:
+            cached = await asyncio.to_thread(tts_cache.read, cache_key)
+            if cached is not None:
+                logger.debug(f"TTS cache hit for chunk (key {cache_key[:12]}, {len(cached)} bytes).")
+                return cached
+        response = await _create_speech(key_provider, user_openai_api_key, chunk_text, instruction_text, tts_model, tts_voice, usage_counter, audio_format)
+        data = response.content
+        logger.debug(f"Successfully generated TTS chunk ({len(chunk_text)} chars, {len(data)} bytes).")
+        if tts_cache:
+            await asyncio.to_thread(tts_cache.put_data, cache_key, data)
+        return data
     except APIError as e:
-        logger.error(f"OpenAI API error generating chunk for {output_path}: {e}")
+        logger.error(f"OpenAI API error generating chunk: {e}")
         raise
     except Exception as e:
-        logger.error(f"Unexpected error generating chunk {output_path}: {e}")
+        logger.error(f"Unexpected error generating chunk: {e}")
+        raise
+
+async def _generate_tts_chunk(
+    key_provider: OpenAIKeyProvider,
+    user_openai_api_key: Optional[str],
+    chunk_text: str,
+    instruction_text: str,
+    output_path: str,
+    tts_model: str,
+    tts_voice: str,
+    usage_counter: Optional[usage_service.TTSUsageCounter] = None,
+    audio_format: str = "mp3"
+):
+    """Writes the speech for chunk_text to output_path."""
+    data = await _synthesize_chunk(key_provider, user_openai_api_key, chunk_text, instruction_text, tts_model, tts_voice, usage_counter, audio_format)
+    def write() -> None:
+        with open(output_path, "wb") as f:
+            f.write(data)
+    await asyncio.to_thread(write)
+
+# --- Helper: Chunk buffers, in memory up to TTS_CHUNK_MEMORY_LIMIT_KB, then spilled to tmpfs ---
+def _new_chunk_buffer() -> BinaryIO:
+    return tempfile.SpooledTemporaryFile(max_size=settings.TTS_CHUNK_MEMORY_LIMIT_KB * 1024, dir=settings.TTS_CHUNK_SPILL_DIR or None)
+
+def _read_part(part: Union[str, BinaryIO]) -> bytes:
+    """Bytes of an episode part: a chunk buffer or the path of a stock clip."""
+    if isinstance(part, str):
+        with open(part, "rb") as f:
+            return f.read()
+    part.seek(0)
+    return part.read()
+
+# --- Helper Function: Construct Rich TTS Instruction for News Anchor ---
+def build_tts_instruction(language: str, audio_style: str) -> str:
+    selected_style_config = NEWS_AUDIO_STYLE_CONFIG.get(audio_style, NEWS_AUDIO_STYLE_CONFIG["standard"])
+    tts_instruction_suffix = selected_style_config["tts_instruction_suffix"]
+    target_accent = Tts_accent_map_news.get(language, Tts_accent_map_news.get("en", "Standard accent for the language"))
+
+    return (
+        f"Base Persona: Act as a {TTS_PERSONA_NEWS}. "
+        f"Base Tone/Pacing: Maintain a {Tts_tone_news_standard} tone. Speak clearly at a {Tts_pacing_news_standard}. Use {Tts_intonation_news_standard}. "
+        f"Language/Accent: Ensure accurate pronunciation using a {target_accent} in the {language} language. "
+        f"Specific Style Guidance for this segment: {tts_instruction_suffix}"
+    )
+
+# --- Helper Function: Write chunks to the episode file in order, while later chunks are still synthesizing ---
+async def _assemble_chunks_streaming(
+    tasks: List[asyncio.Task],
+    output_path: str,
+    news_digest_id: int,
+    playlist: Optional[hls_playlist.SegmentedPlaylist] = None,
+    episode_waveform: Optional[waveform.WaveformAccumulator] = None
+) -> Optional[float]:
+    """
+    Appends each part's MP3 frames to output_path as soon as it and all parts before it are done,
+    publishing it as the next playlist segments too when a playlist is given. Each task returns a
+    chunk buffer or a stock clip path. Any failure cancels the tasks still running.
+    episode_waveform, if given, collects the frame levels of everything written.
+    Returns:
+        Duration in seconds of the written file (counted from the frames written), or None if the
+        chunks cannot be joined frame by frame (the caller falls back to re-encoding).
+    """
+    try:
+        with open(output_path, "wb") as output:
+            writer = mp3_frames.Mp3StreamWriter(output, settings.TTS_CHUNK_PAUSE_MS, waveform=episode_waveform)
+            for index, task in enumerate(tasks):
+                data = await asyncio.to_thread(_read_part, await task)
+                try:
+                    await asyncio.to_thread(writer.append, data, f"part {index}")
+                except mp3_frames.Mp3FormatMismatch as e:
+                    logger.info(f"NewsDigest {news_digest_id}: chunk {index} cannot be appended frame by frame: {e}")
+                    return None
+                if playlist:
+                    await asyncio.to_thread(playlist.add_chunk, data, index == len(tasks) - 1, f"part {index}")
+                logger.debug(f"NewsDigest {news_digest_id}: appended chunk {index + 1}/{len(tasks)} ({writer.duration_seconds:.1f}s written).")
+        return writer.duration_seconds
+    except BaseException:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True) # Also retrieves errors of parts that failed early
         raise
 
+# --- Helper Function: Concatenate by decoding and re-encoding (fallback for mismatched chunk formats) ---
+async def _concatenate_with_pydub(parts: List[Union[str, BinaryIO]], output_path: str, news_digest_id: int):
+    combined_audio = None
+    pause_segment = AudioSegment.silent(duration=settings.TTS_CHUNK_PAUSE_MS)
+    for index, part in enumerate(parts):
+        try:
+            data = await asyncio.to_thread(_read_part, part)
+            segment = await asyncio.to_thread(AudioSegment.from_mp3, io.BytesIO(data))
+        except Exception as e:
+            logger.error(f"Error loading/concatenating chunk {index} for NewsDigest {news_digest_id}: {e}")
+            raise
+        combined_audio = segment if combined_audio is None else combined_audio + pause_segment + segment
+    logger.info(f"Exporting re-encoded audio for NewsDigest {news_digest_id} to {output_path}...")
+    await asyncio.to_thread(combined_audio.export, output_path, format="mp3")
+
+# --- Helper Function: Store the episode in every requested format ---
+async def _produce_renditions(
+    source_path: str,
+    source_format: str,
+    formats: List[str],
+    news_digest_id: int
+) -> List[Tuple[str, str, bool]]:
+    """
+    Uses the source file as-is for its own format and transcodes it once into each other requested format.
+    Requested formats are checked up front (audio_formats.check_formats_producible), so only a failing ffmpeg
+    skips a format here; if none is left, the source is kept.
+    Returns:
+        (format, disk path, transcoded) per stored rendition, in request order.
+    """
+    base_path = os.path.splitext(source_path)[0]
+    renditions: List[Tuple[str, str, bool]] = []
+    for format_name in formats:
+        if format_name == source_format:
+            renditions.append((format_name, source_path, False))
+            continue
+        output_path = f"{base_path}.{audio_formats.AUDIO_FORMATS[format_name].extension}"
+        try:
+            await cpu_pool.run(audio_formats.transcode_file, source_path, output_path, format_name)
+        except Exception as e:
+            logger.warning(f"NewsDigest {news_digest_id}: could not transcode audio to {format_name}: {e}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            continue
+        renditions.append((format_name, output_path, True))
+    if not renditions:
+        logger.warning(f"NewsDigest {news_digest_id}: none of the formats {formats} could be produced. Keeping {source_format}.")
+        renditions.append((source_format, source_path, False))
+    elif source_format not in formats:
+        os.remove(source_path)
+    return renditions
+
+# --- Helper Function: Waveform peaks sidecar for the player ---
+def _peaks_path(peaks_url: Optional[str]) -> Optional[str]:
+    return os.path.join(settings.STATIC_AUDIO_DIR, os.path.basename(peaks_url)) if peaks_url else None
+
+def _remove_episode_files(db: Session, episode: PodcastEpisode) -> None:
+    if episode.news_digest is not None and episode.news_digest.playlist_url: # Segments of its generation
+        hls_playlist.remove_playlist(episode.news_digest.playlist_url)
+        episode.news_digest.playlist_url = None
+    paths = {episode.file_path, _peaks_path(episode.peaks_url)} | {rendition.file_path for rendition in episode.renditions}
+    for path in paths:
+        if path and _file_shared_with_other_episode(db, episode, path):
+            logger.info(f"Keeping {path}: other episodes share it.")
+            continue
+        if path and os.path.exists(path):
+            try: os.remove(path)
+            except OSError as e: logger.error(f"Error deleting old audio file {path}: {e}")
+
+def discard_episode(db: Session, news_digest_id: int) -> None:
+    """Deletes the digest's episode and its files (unless other episodes share them). The caller commits."""
+    episode = db.query(PodcastEpisode).filter_by(news_digest_id=news_digest_id).first()
+    if episode is not None:
+        _remove_episode_files(db, episode)
+        db.delete(episode)
+
+def remove_expired_playlists(db: Session, grace_seconds: float) -> int:
+    """
+    Deletes the segments of completed digests whose episode was stored over grace_seconds ago; until then
+    progressive listeners finish from the closed playlist. Returns the number of playlists removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    digests = db.query(NewsDigest).filter(
+        NewsDigest.status == NewsDigestStatus.COMPLETED,
+        NewsDigest.playlist_url.isnot(None),
+        NewsDigest.updated_at < cutoff
+    ).all()
+    for news_digest in digests:
+        hls_playlist.remove_playlist(news_digest.playlist_url)
+        news_digest.playlist_url = None
+    db.commit()
+    return len(digests)
+
+# --- Helper Functions: Episodes sharing one set of files (coalesced generations) ---
+def _file_shared_with_other_episode(db: Session, episode: PodcastEpisode, path: str) -> bool:
+    other_episodes = db.query(PodcastEpisode.id).filter(PodcastEpisode.id != episode.id)
+    if other_episodes.filter(PodcastEpisode.file_path == path).first():
+        return True
+    if other_episodes.filter(PodcastEpisode.peaks_url == f"/static/audio/{os.path.basename(path)}").first():
+        return True
+    return db.query(PodcastEpisodeRendition.id).filter(
+        PodcastEpisodeRendition.file_path == path,
+        PodcastEpisodeRendition.podcast_episode_id != episode.id
+    ).first() is not None
+
+def share_episode(db: Session, source_episode: PodcastEpisode, news_digest: NewsDigest) -> PodcastEpisode:
+    """
+    Gives the digest its own episode (and renditions) pointing at the audio files of another digest's episode.
+    Files are only removed once no episode references them. The caller commits.
+    """
+    episode = db.query(PodcastEpisode).filter_by(news_digest_id=news_digest.id).first()
+    if episode is None:
+        episode = PodcastEpisode(news_digest_id=news_digest.id)
+        db.add(episode)
+    elif episode.file_path != source_episode.file_path:
+        _remove_episode_files(db, episode)
+    episode.audio_url = source_episode.audio_url
+    episode.file_path = source_episode.file_path
+    episode.audio_format = source_episode.audio_format
+    episode.peaks_url = source_episode.peaks_url
+    episode.language = source_episode.language
+    episode.audio_style = source_episode.audio_style
+    episode.duration_seconds = source_episode.duration_seconds
+    episode.expires_at = source_episode.expires_at
+    episode.renditions = [
+        PodcastEpisodeRendition(
+            audio_format=rendition.audio_format,
+            audio_url=rendition.audio_url,
+            file_path=rendition.file_path,
+            size_bytes=rendition.size_bytes,
+            transcoded=rendition.transcoded
+        )
+        for rendition in source_episode.renditions
+    ]
+    return episode
+
+# --- Helper Function: Failures a retry may get past ---
+# Status codes of the TTS API that say nothing about the request itself: timeouts, conflicts, rate limits and
+# server errors. Every other failure (other 4xx, bad audio, bugs) would happen again on a retry.
+_RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+def _is_retryable_audio_error(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError): # Includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
 # --- Main Podcast Audio Generation Service Function ---
 async def generate_podcast_audio_for_digest(
     db: Session,
@@ -94,7 +369,8 @@ async def generate_podcast_audio_for_digest(
     language: str,
     audio_style: str,
     force_regenerate: bool = False,
-    user_openai_api_key: Optional[str] = None
+    user_openai_api_key: Optional[str] = None,
+    output_formats: Optional[List[str]] = None
 ) -> Tuple[Optional[str], Optional[str]]: # Returns (audio_url, error_message)
     """
     Generates audio for a specific news digest using its pre-generated script.
@@ -107,10 +383,15 @@ async def generate_podcast_audio_for_digest(
         audio_style: Key for the desired audio style.
         force_regenerate: If True, generates audio even if a cached version exists.
         user_openai_api_key: Optional user-provided OpenAI API key.
+        output_formats: Audio formats to store (see audio_formats.AUDIO_FORMATS), the first one becoming
+            the episode's audio_url. Defaults to audio_formats.default_formats().
 
     Returns:
         A tuple (audio_url, error_message). audio_url is the public URL if successful,
-        error_message contains details if generation failed.
+        error_message contains details if generation failed for good (the digest is marked FAILED).
+    Raises:
+        TTS API errors a retry may get past (connection errors, timeouts, 408/409/429, 5xx), after removing
+        the partial output. Any other failure marks the digest FAILED and is returned as error_message.
     """
     news_digest = db.query(NewsDigest).filter(NewsDigest.id == news_digest_id).first()
     if not news_digest:
@@ -148,9 +429,10 @@ async def generate_podcast_audio_for_digest(
     db.commit()
 
     # --- Key and TTS Configuration ---
+    # Keys are drawn from the pool per TTS request; check up front so configuration errors fail fast.
+    key_provider = OpenAIKeyProvider()
     try:
-        key_provider = OpenAIKeyProvider()
-        api_key = await key_provider.get_key(user_provided_key=user_openai_api_key)
+        await key_provider.ensure_available(user_provided_key=user_openai_api_key)
     except ValueError as e:
         logger.error(f"Failed to get OpenAI API key: {e}")
         news_digest.status = NewsDigestStatus.FAILED
@@ -158,100 +440,152 @@ async def generate_podcast_audio_for_digest(
         db.commit()
         return None, "OpenAI API key configuration error."
 
-    async_openai_client = AsyncOpenAI(api_key=api_key)
-    # Wrap the OpenAI client for LangSmith tracing if tracing is enabled
-    if os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true" or os.getenv("LANGSMITH_TRACING", "false").lower() == "true":
-        logger.info("LangSmith tracing enabled for OpenAI client in podcast_service.")
-        try:
-            async_openai_client = wrap_openai(async_openai_client)
-            logger.info("AsyncOpenAI client wrapped successfully with LangSmith.")
-        except Exception as e:
-            logger.error(f"Failed to wrap AsyncOpenAI client with LangSmith: {e}", exc_info=True)
-            # Optionally, decide if you want to proceed without tracing or raise an error
-            # For now, we'll log and proceed with the unwrapped client if wrapping fails.
-    else:
-        logger.info("LangSmith tracing not enabled for OpenAI client in podcast_service.")
-
     tts_model = settings.OPENAI_TTS_MODEL
     tts_voice = settings.OPENAI_TTS_VOICE
 
-    # --- Construct Rich TTS Instruction for News Anchor ---
-    selected_style_config = NEWS_AUDIO_STYLE_CONFIG.get(audio_style, NEWS_AUDIO_STYLE_CONFIG["standard"])
-    tts_instruction_suffix = selected_style_config["tts_instruction_suffix"]
-    target_accent = Tts_accent_map_news.get(language, Tts_accent_map_news.get("en", "Standard accent for the language"))
-
-    instruction_text = (
-        f"Base Persona: Act as a {TTS_PERSONA_NEWS}. "
-        f"Base Tone/Pacing: Maintain a {Tts_tone_news_standard} tone. Speak clearly at a {Tts_pacing_news_standard}. Use {Tts_intonation_news_standard}. "
-        f"Language/Accent: Ensure accurate pronunciation using a {target_accent} in the {language} language. "
-        f"Specific Style Guidance for this segment: {tts_instruction_suffix}"
-    )
+    instruction_text = build_tts_instruction(language, audio_style)
     logger.info(f"Using Rich TTS instruction for NewsDigest {news_digest_id}: {instruction_text}")
 
+    formats = output_formats or audio_formats.default_formats()
     permanent_audio_disk_path = None
-    temp_files = []
+    output_paths: List[str] = [] # Every file written for the episode, removed again if generation fails
+    renditions: List[Tuple[str, str, bool]] = []
+    chunk_buffers: List[BinaryIO] = [] # Closed (and any spill file deleted) when generation ends
     final_audio_url = None
+    peaks_url: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    playlist: Optional[hls_playlist.SegmentedPlaylist] = None
+    tts_usage = usage_service.TTSUsageCounter() # Billed characters, recorded on success and failure alike
+    tts_start_time = datetime.utcnow()
+
+    def discard_playlist() -> None:
+        if playlist:
+            playlist.discard()
+            news_digest.playlist_url = None
+
+    def record_tts_usage() -> None:
+        latency_ms = int((datetime.utcnow() - tts_start_time).total_seconds() * 1000)
+        usage_service.record_tts_usage(db, news_digest, tts_model, tts_usage, latency_ms=latency_ms)
+
+    def discard_partial_output() -> None:
+        """Records the characters spent, then removes the playlist and every file written for the episode."""
+        record_tts_usage()
+        discard_playlist()
+        db.commit()
+        for output_path in output_paths:
+            if os.path.exists(output_path):
+                try: os.remove(output_path)
+                except OSError as rm_err: logger.error(f"Failed to cleanup {output_path}: {rm_err}")
 
     try:
-        if len(audio_script) <= settings.TTS_CHUNK_CHAR_LIMIT:
+        script_chunks = plan_tts_chunks(
+            audio_script,
+            settings.TTS_CHUNK_CHAR_LIMIT,
+            target_parallelism=settings.TTS_CHUNK_TARGET_PARALLELISM,
+            min_chunk_chars=settings.TTS_CHUNK_MIN_CHARS
+        )
+        progress_events.publish(news_digest_id, ProgressEvent.AUDIO_STARTED, chunks_total=len(script_chunks))
+        use_stock_clips = settings.TTS_STOCK_CLIPS_ENABLED and bool(stock_clips.available_clip_kinds(language))
+        episode_name = f"news_podcast_{news_digest_id}_{uuid.uuid4()}"
+        peaks = None # Waveform for the player; only available for MP3 audio (read from the frames)
+        if len(script_chunks) <= 1 and not use_stock_clips:
             logger.info(f"Script for NewsDigest {news_digest_id} is short, generating single audio file.")
-            unique_filename = f"news_podcast_{news_digest_id}_{uuid.uuid4()}.mp3"
-            permanent_audio_disk_path = os.path.join(settings.STATIC_AUDIO_DIR, unique_filename)
-
-            response = await async_openai_client.audio.speech.create(
-                model=tts_model,
-                voice=tts_voice,
-                input=audio_script,
-                instructions=instruction_text,
-                response_format="mp3"
-            )
-            await asyncio.to_thread(response.stream_to_file, permanent_audio_disk_path)
-            final_audio_url = f"/static/audio/{unique_filename}"
+            # Nothing to join, so the main format can come straight from TTS.
+            source_format = formats[0] if audio_formats.AUDIO_FORMATS[formats[0]].tts_response_format else "mp3"
+            permanent_audio_disk_path = os.path.join(settings.STATIC_AUDIO_DIR, f"{episode_name}.{audio_formats.AUDIO_FORMATS[source_format].extension}")
+            output_paths.append(permanent_audio_disk_path)
+
+            await _generate_tts_chunk(key_provider, user_openai_api_key, audio_script, instruction_text, permanent_audio_disk_path, tts_model, tts_voice, tts_usage, audio_formats.AUDIO_FORMATS[source_format].tts_response_format)
+            progress_events.publish(news_digest_id, ProgressEvent.CHUNK_READY, chunks_done=1, chunks_total=1)
+            duration_seconds = await asyncio.to_thread(audio_formats.file_duration_seconds, permanent_audio_disk_path, source_format)
+            if settings.WAVEFORM_PEAKS_ENABLED and source_format == "mp3":
+                peaks = await cpu_pool.run(waveform.mp3_file_peaks, permanent_audio_disk_path, settings.WAVEFORM_BUCKETS_PER_SECOND)
             logger.info(f"Single TTS audio for NewsDigest {news_digest_id} generated: {permanent_audio_disk_path}")
         else:
-            logger.info(f"Script for NewsDigest {news_digest_id} (len: {len(audio_script)}) > limit. Splitting into chunks.")
-            script_chunks = _split_script(audio_script, settings.TTS_CHUNK_CHAR_LIMIT)
-            logger.info(f"Split script into {len(script_chunks)} chunks for NewsDigest {news_digest_id}.")
+            logger.info(f"Split script for NewsDigest {news_digest_id} (len: {len(audio_script)}) into {len(script_chunks)} balanced chunks (sizes: {[len(chunk) for chunk in script_chunks]}).")
 
+            # Episode parts in playback order: stock intro, script chunks, stock outro. Each has a task that
+            # returns the part: a chunk buffer, or a stock clip path (clips are only rendered the first time).
             tasks = []
-            # Create temp files in the static audio directory for simplicity in this setup
-            # Consider a dedicated temp directory if STATIC_AUDIO_DIR is network-mounted or has specific perms.
-            for i, chunk_text in enumerate(script_chunks):
-                fd, temp_path = tempfile.mkstemp(suffix=".mp3", dir=settings.STATIC_AUDIO_DIR)
-                os.close(fd)
-                temp_files.append(temp_path)
-                tasks.append(_generate_tts_chunk(async_openai_client, chunk_text, instruction_text, temp_path, tts_model, tts_voice))
-            
-            logger.info(f"Generating TTS for {len(tasks)} chunks concurrently for NewsDigest {news_digest_id}...")
-            await asyncio.gather(*tasks)
-            logger.info(f"Finished generating all TTS chunks for NewsDigest {news_digest_id}.")
-
-            if not temp_files or not all(os.path.exists(p) for p in temp_files):
-                 raise ValueError("One or more temporary audio chunk files were not generated successfully.")
-
-            logger.info(f"Concatenating {len(temp_files)} audio chunks for NewsDigest {news_digest_id}...")
-            combined_audio = AudioSegment.empty()
-            pause_segment = AudioSegment.silent(duration=settings.TTS_CHUNK_PAUSE_MS)
-            first_segment = True
-            for path in temp_files:
-                try:
-                    segment = await asyncio.to_thread(AudioSegment.from_mp3, path)
-                    if first_segment:
-                        combined_audio = segment
-                        first_segment = False
-                    else:
-                        combined_audio += pause_segment + segment
-                except Exception as e:
-                    logger.error(f"Error loading/concatenating chunk {path} for NewsDigest {news_digest_id}: {e}")
-                    raise
-            
-            unique_filename = f"news_podcast_{news_digest_id}_{uuid.uuid4()}.mp3"
-            permanent_audio_disk_path = os.path.join(settings.STATIC_AUDIO_DIR, unique_filename)
-            logger.info(f"Exporting concatenated audio for NewsDigest {news_digest_id} to {permanent_audio_disk_path}...")
-            await asyncio.to_thread(combined_audio.export, permanent_audio_disk_path, format="mp3")
-            final_audio_url = f"/static/audio/{unique_filename}"
+
+            async def render_clip(text: str, output_path: str) -> None:
+                await _generate_tts_chunk(key_provider, user_openai_api_key, text, instruction_text, output_path, tts_model, tts_voice, tts_usage)
+
+            def add_stock_clips(kinds) -> None:
+                for kind in kinds:
+                    path = stock_clips.clip_path(kind, language, audio_style, tts_model, tts_voice, instruction_text)
+                    if use_stock_clips and path:
+                        tasks.append(asyncio.create_task(stock_clips.ensure_clip(kind, language, audio_style, tts_model, tts_voice, instruction_text, render_clip)))
+
+            chunks_done = 0
+            chunks_resumed = 0
+
+            async def synthesize_to_buffer(chunk_text: str) -> BinaryIO:
+                nonlocal chunks_done, chunks_resumed
+                # Chunks an earlier attempt already synthesized are read back from the TTS cache, which keeps
+                # them pinned for the digest until its episode is stored (generation_checkpoints)
+                cache_key = TTSChunkCache.make_key(chunk_text, tts_model, tts_voice, instruction_text, "mp3")
+                if await generation_checkpoints.pin_chunk(news_digest_id, cache_key):
+                    chunks_resumed += 1
+                data = await _synthesize_chunk(key_provider, user_openai_api_key, chunk_text, instruction_text, tts_model, tts_voice, tts_usage)
+                chunks_done += 1
+                progress_events.publish(news_digest_id, ProgressEvent.CHUNK_READY, chunks_done=chunks_done, chunks_total=len(script_chunks))
+                buffer = _new_chunk_buffer()
+                chunk_buffers.append(buffer)
+                if len(data) > settings.TTS_CHUNK_MEMORY_LIMIT_KB * 1024:
+                    await asyncio.to_thread(buffer.write, data) # Spills to disk
+                else:
+                    buffer.write(data)
+                return buffer
+
+            add_stock_clips(stock_clips.LEADING_CLIP_KINDS)
+            for chunk_text in script_chunks:
+                tasks.append(asyncio.create_task(synthesize_to_buffer(chunk_text)))
+            add_stock_clips(stock_clips.TRAILING_CLIP_KINDS)
+
+            # Chunks are joined at MP3 frame level, so the joined file is MP3 and other formats are transcoded from it.
+            source_format = "mp3"
+            permanent_audio_disk_path = os.path.join(settings.STATIC_AUDIO_DIR, f"{episode_name}.mp3")
+            output_paths.append(permanent_audio_disk_path)
+            if settings.TTS_SEGMENTED_OUTPUT:
+                # Publish the (still empty) playlist right away; /podcast-status exposes it while PROCESSING_AUDIO.
+                playlist = await asyncio.to_thread(hls_playlist.create_playlist, episode_name)
+                hls_playlist.remove_playlist(news_digest.playlist_url) # Segments of a previous generation
+                news_digest.playlist_url = playlist.playlist_url
+                db.commit()
+                logger.info(f"Segmented playlist for NewsDigest {news_digest_id}: {playlist.playlist_url}")
+            logger.info(f"Generating TTS for {len(script_chunks)} chunks ({len(tasks) - len(script_chunks)} stock clips) concurrently for NewsDigest {news_digest_id}, writing them to {permanent_audio_disk_path} as they finish...")
+            episode_waveform = waveform.WaveformAccumulator() if settings.WAVEFORM_PEAKS_ENABLED else None
+            duration_seconds = await _assemble_chunks_streaming(tasks, permanent_audio_disk_path, news_digest_id, playlist, episode_waveform)
+            if chunks_resumed:
+                logger.info(f"NewsDigest {news_digest_id}: reused {chunks_resumed}/{len(script_chunks)} chunks already synthesized (by an earlier attempt or another podcast).")
+            joined = duration_seconds is not None
+            if joined and episode_waveform:
+                peaks = episode_waveform.peaks(settings.WAVEFORM_BUCKETS_PER_SECOND)
+            if joined and playlist:
+                await asyncio.to_thread(playlist.close)
+            if not joined:
+                logger.warning(f"Audio chunks for NewsDigest {news_digest_id} differ in format. Falling back to decode/re-encode concatenation.")
+                discard_playlist() # Segments can no longer match the joined file
+                parts = await asyncio.gather(*tasks)
+                await _concatenate_with_pydub(parts, permanent_audio_disk_path, news_digest_id)
+                duration_seconds = await asyncio.to_thread(mp3_frames.mp3_file_duration_seconds, permanent_audio_disk_path)
+                if settings.WAVEFORM_PEAKS_ENABLED:
+                    peaks = await cpu_pool.run(waveform.mp3_file_peaks, permanent_audio_disk_path, settings.WAVEFORM_BUCKETS_PER_SECOND)
             logger.info(f"Concatenated TTS audio for NewsDigest {news_digest_id} generated: {permanent_audio_disk_path}")
 
+        if peaks is not None and len(peaks):
+            peaks_path = os.path.join(settings.STATIC_AUDIO_DIR, f"{episode_name}.{waveform.PEAKS_FILE_EXTENSION}")
+            output_paths.append(peaks_path)
+            await asyncio.to_thread(waveform.write_peaks_file, peaks_path, peaks, settings.WAVEFORM_BUCKETS_PER_SECOND)
+            peaks_url = f"/static/audio/{os.path.basename(peaks_path)}"
+
+        renditions = await _produce_renditions(permanent_audio_disk_path, source_format, formats, news_digest_id)
+        output_paths.extend(path for _, path, _ in renditions if path not in output_paths)
+        audio_format, permanent_audio_disk_path, _ = renditions[0]
+        final_audio_url = f"/static/audio/{os.path.basename(permanent_audio_disk_path)}"
+        logger.info(f"Stored NewsDigest {news_digest_id} audio as {[format_name for format_name, _, _ in renditions]}.")
+
         # --- Successfully generated audio, update database ---
         if final_audio_url and permanent_audio_disk_path:
             # Delete old episode if force_regenerate was true and an old one existed
@@ -262,19 +596,32 @@ async def generate_podcast_audio_for_digest(
                     PodcastEpisode.audio_style == audio_style
                 ).first()
                 if old_episode_to_delete:
-                    if old_episode_to_delete.file_path and os.path.exists(old_episode_to_delete.file_path):
-                        try: os.remove(old_episode_to_delete.file_path)
-                        except OSError as e: logger.error(f"Error deleting old audio file {old_episode_to_delete.file_path}: {e}")
+                    _remove_episode_files(db, old_episode_to_delete)
                     db.delete(old_episode_to_delete)
+                    db.flush() # So the episode is created anew below
                     logger.info(f"Deleted old podcast episode {old_episode_to_delete.id} due to force_regenerate.")
             
             # Create or update PodcastEpisode record
+            episode_renditions = [
+                PodcastEpisodeRendition(
+                    audio_format=format_name,
+                    audio_url=f"/static/audio/{os.path.basename(path)}",
+                    file_path=path,
+                    size_bytes=os.path.getsize(path),
+                    transcoded=transcoded
+                )
+                for format_name, path, transcoded in renditions
+            ]
             episode = db.query(PodcastEpisode).filter_by(news_digest_id=news_digest_id).first()
             if episode:
                 episode.audio_url = final_audio_url
                 episode.file_path = permanent_audio_disk_path
+                episode.audio_format = audio_format
+                episode.peaks_url = peaks_url
+                episode.renditions = episode_renditions
                 episode.language = language
                 episode.audio_style = audio_style
+                episode.duration_seconds = round(duration_seconds) if duration_seconds is not None else None
                 episode.updated_at = datetime.utcnow() # Explicitly set updated_at for existing records
                 episode.expires_at = datetime.utcnow() + timedelta(days=settings.PODCAST_RETENTION_DAYS)
             else:
@@ -282,52 +629,49 @@ async def generate_podcast_audio_for_digest(
                     news_digest_id=news_digest_id,
                     audio_url=final_audio_url,
                     file_path=permanent_audio_disk_path,
+                    audio_format=audio_format,
+                    peaks_url=peaks_url,
+                    renditions=episode_renditions,
                     language=language,
                     audio_style=audio_style,
+                    duration_seconds=round(duration_seconds) if duration_seconds is not None else None,
                     expires_at=datetime.utcnow() + timedelta(days=settings.PODCAST_RETENTION_DAYS)
                 )
                 db.add(episode)
             
             news_digest.status = NewsDigestStatus.COMPLETED
             news_digest.error_message = None
+            record_tts_usage()
             db.commit()
+            generation_checkpoints.clear(news_digest_id) # The closed playlist stays for progressive listeners (remove_expired_playlists)
             logger.info(f"PodcastEpisode for NewsDigest {news_digest_id} saved to DB. Audio URL: {final_audio_url}")
             return final_audio_url, None
         else:
             # This case should ideally not be reached if logic above is correct
             raise ValueError("Audio generation completed but final_audio_url or permanent_audio_disk_path was not set.")
 
-    except APIError as e:
-        error_detail = f"OpenAI API error during TTS: {getattr(e, 'message', str(e))}"
-        logger.exception(error_detail)
-        news_digest.status = NewsDigestStatus.FAILED
-        news_digest.error_message = error_detail
-        db.commit()
-        if permanent_audio_disk_path and os.path.exists(permanent_audio_disk_path): # Cleanup partially created file
-            try: os.remove(permanent_audio_disk_path)
-            except OSError as rm_err: logger.error(f"Failed to cleanup {permanent_audio_disk_path} after APIError: {rm_err}")
-        return None, error_detail
+    except asyncio.CancelledError: # Cancelled by its owner, timed out, or the worker lost the job
+        logger.warning(f"Audio generation for NewsDigest {news_digest_id} was cancelled; removing its partial output.")
+        discard_partial_output()
+        raise
     except Exception as e:
-        error_detail = f"TTS generation/concatenation error: {str(e)}"
+        if isinstance(e, APIError):
+            error_detail = f"OpenAI API error during TTS: {getattr(e, 'message', str(e))}"
+        else:
+            error_detail = f"TTS generation/concatenation error: {str(e)}"
+        if _is_retryable_audio_error(e):
+            # Rate limits, server errors, timeouts: the job is retried with backoff (app/worker.py)
+            logger.warning(f"{error_detail} (NewsDigest {news_digest_id}); removing its partial output for a retry.")
+            db.rollback()
+            discard_partial_output()
+            raise
         logger.exception(error_detail)
+        db.rollback()
         news_digest.status = NewsDigestStatus.FAILED
         news_digest.error_message = error_detail
-        db.commit()
-        if permanent_audio_disk_path and os.path.exists(permanent_audio_disk_path): # Cleanup partially created file
-            try: os.remove(permanent_audio_disk_path)
-            except OSError as rm_err: logger.error(f"Failed to cleanup {permanent_audio_disk_path} after Exception: {rm_err}")
+        discard_partial_output()
         return None, error_detail
     finally:
-        # --- Cleanup Temporary Chunk Files ---
-        if temp_files:
-            logger.info(f"Cleaning up {len(temp_files)} temporary audio chunk files for NewsDigest {news_digest_id}...")
-            # Give a slight delay for file handles to release, especially on Windows
-            await asyncio.sleep(0.2)
-            for temp_path in temp_files:
-                if os.path.exists(temp_path):
-                    try:
-                        os.remove(temp_path)
-                        logger.debug(f"Removed temp file: {temp_path}")
-                    except OSError as e:
-                        # Log and continue if a temp file can't be removed.
-                        logger.warning(f"Failed to remove temp file {temp_path}: {e}. Manual cleanup might be needed.")
+        # --- Release Chunk Buffers ---
+        for buffer in chunk_buffers:
+            buffer.close()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import update
+
+from app.db.database import SessionLocal
+from app.models.news_models import NewsDigest
+
+logger = logging.getLogger(__name__)
+
+# Progress of a digest's generation, for the status stream (GET /podcasts/podcast-status/{id}/events).
+# Each event replaces NewsDigest.progress, which streams in any process read back; streams in the process
+# that published it are also woken right away. Publishing never fails the generation.
+# Chunk events come from inside the TTS loop, so only every CHUNK_PERSIST_INTERVAL-th one (and the last)
+# is written to the database; local streams still get every one.
+CHUNK_PERSIST_INTERVAL = 5
+
+class ProgressEvent:
+    QUEUED = "queued"
+    FETCHING = "fetching"
+    ARTICLES_FETCHED = "articles_fetched" # articles
+    SCRIPT_STARTED = "script_started"
+    SCRIPT_READY = "script_ready"
+    AUDIO_STARTED = "audio_started" # chunks_total
+    CHUNK_READY = "chunk_ready" # chunks_done, chunks_total
+    AUDIO_READY = "audio_ready"
+    FAILED = "failed" # message
+    CANCELLED = "cancelled" # message
+    TIMED_OUT = "timed_out" # message
+
+class _LocalSubscribers:
+    """Queues of the streams open in this process, per digest."""
+
+    def __init__(self):
+        self._queues: Dict[int, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, news_digest_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._queues.setdefault(news_digest_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, news_digest_id: int, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(news_digest_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[news_digest_id]
+
+    def notify(self, news_digest_id: int, progress: Dict[str, Any]) -> None:
+        for queue in self._queues.get(news_digest_id, ()):
+            if queue.full(): # A stalled stream only needs the latest state
+                queue.get_nowait()
+            queue.put_nowait(progress)
+
+subscribers = _LocalSubscribers()
+
+def _should_persist(event: str, data: Dict[str, Any]) -> bool:
+    if event != ProgressEvent.CHUNK_READY:
+        return True # Stage changes and end events
+    chunks_done, chunks_total = data.get("chunks_done"), data.get("chunks_total")
+    if not chunks_done or not chunks_total:
+        return True
+    return chunks_done >= chunks_total or chunks_done % CHUNK_PERSIST_INTERVAL == 0
+
+def publish(news_digest_id: Optional[int], event: str, **data: Any) -> None:
+    """
+    Records the digest's latest progress event (in a session of its own, so the caller's transaction is
+    untouched; chunk events are throttled, see CHUNK_PERSIST_INTERVAL) and wakes local streams of it.
+    """
+    if not news_digest_id:
+        return
+    progress = {"event": event, **data, "at": datetime.utcnow().isoformat()}
+    if not _should_persist(event, data):
+        subscribers.notify(news_digest_id, progress)
+        return
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(NewsDigest)
+            .where(NewsDigest.id == news_digest_id)
+            .values(progress=progress)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"NewsDigest {news_digest_id}: could not record progress '{event}': {e}")
+    finally:
+        db.close()
+    subscribers.notify(news_digest_id, progress)
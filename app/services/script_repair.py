@@ -0,0 +1,109 @@
+import logging
+import re
+from typing import Callable, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Scripts shorter than this after repair are treated as unusable and trigger an LLM retry.
+MIN_SCRIPT_CHARS = 20
+
+class ScriptValidationError(ValueError):
+    """Raised when a generated script cannot be repaired into something fit for TTS."""
+    pass
+
+# --- Repair Rules (prompt rule 8: only the verbatim spoken text) ---
+# Words a stage/sound direction starts with, in en/es/fr.
+_DIRECTION_WORDS = (
+    r"pause|music|sound|sfx|jingle|fades?|intro|outro|theme|beat|chime|applause|laughs?|sighs?|upbeat|transition|"
+    r"pausa|m[uú]sica|sonido|efecto|cortinilla|se desvanece|"
+    r"musique|son d[eu]|bruit|g[ée]n[ée]rique|fondu|s'estompe"
+)
+# Words that may come before the direction word, e.g. "(soft music)".
+_DIRECTION_MODIFIERS = r"soft|gentle|light|short|brief|background|dramatic|suave|breve|corta|de fondo|douce|l[ée]g[èe]re|br[èe]ve"
+# A whole stage direction: optional modifiers, a direction word first, then at most a few more words
+# ("music fades out"). Clauses merely containing such a word ("who beat France") are spoken content.
+_DIRECTION_CUE = rf"[ \t]*(?:(?:{_DIRECTION_MODIFIERS})[ \t]+){{0,2}}(?:{_DIRECTION_WORDS})\b[^()\[\]*_\n]{{0,30}}?[ \t]*"
+_SPEAKER_LABELS = (
+    r"news anchor|anchor|host|narrator|presenter|reporter|announcer|"
+    r"presentador(?:a)?|anfitri[oó]n(?:a)?|locutor(?:a)?|narrador(?:a)?|"
+    r"pr[ée]sentat(?:eur|rice)|animat(?:eur|rice)|narrat(?:eur|rice)|journaliste"
+)
+_SECTION_TITLES = (
+    r"intro(?:duction)?|outro|conclusion|closing|opening|headlines?|story \d+|segment \d+|"
+    r"introducci[oó]n|conclusi[oó]n|cierre|titulares|noticia \d+|"
+    r"g[ée]n[ée]rique|titres|sujet \d+"
+)
+_PREAMBLE_START = r"(?:sure|certainly|okay|ok|of course|absolutely|here(?:'s| is| are)|below is|claro|por supuesto|aqu[ií] (?:est[aá]|tienes)|a continuaci[oó]n|bien s[uû]r|voici|voil[aà])"
+_PREAMBLE_SUBJECT = r"(?:script|podcast|briefing|guion|gui[oó]n|texte|bulletin)"
+
+# A numbered line only counts as a list item in a run of two or more lines numbered 1., 2., ... (a spoken
+# sentence may well start with a number, e.g. a year).
+_NUMBERED_ITEM = re.compile(r"^[ \t]*(\d+)[.)][ \t]+", re.MULTILINE)
+
+def _strip_numbered_list(match: "re.Match") -> str:
+    block = match.group(0)
+    numbers = [int(number) for number in _NUMBERED_ITEM.findall(block)]
+    if numbers != list(range(1, len(numbers) + 1)):
+        return block
+    return _NUMBERED_ITEM.sub("", block)
+
+# Each rule: (name, compiled pattern, replacement). Applied in order.
+_REPAIR_RULES: List[Tuple[str, "re.Pattern", Union[str, Callable[["re.Match"], str]]]] = [
+    # Only a first line of its own that announces what follows (ends in ":") or says nothing else
+    ("preamble", re.compile(rf"\A\s*{_PREAMBLE_START}\b[^\n]{{0,120}}?{_PREAMBLE_SUBJECT}(?:[^\n]{{0,80}}:|[ \t]*[.!]?)[ \t]*\n+", re.IGNORECASE), ""),
+    ("closing_remark", re.compile(r"\n+\s*(?:i hope (?:this|that)|let me know|feel free to|espero que (?:esto|este)|n'h[ée]sitez pas)[^\n]*\s*\Z", re.IGNORECASE), ""),
+    ("horizontal_rule", re.compile(r"^[ \t]*(?:-{3,}|\*{3,}|_{3,}|={3,})[ \t]*$", re.MULTILINE), ""),
+    ("markdown_heading", re.compile(r"^[ \t]{0,3}#{1,6}[ \t]+[^\n]*$", re.MULTILINE), ""),
+    ("markdown_bold", re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1", re.DOTALL), r"\2"),
+    ("italic_direction", re.compile(rf"(?<![\w*])\*{_DIRECTION_CUE}\*(?![\w*])|(?<![\w_])_{_DIRECTION_CUE}_(?![\w_])", re.IGNORECASE), ""),
+    ("markdown_italic", re.compile(r"(?<![\w*])\*(?=\S)([^*\n]+?)(?<=\S)\*(?![\w*])|(?<![\w_])_(?=\S)([^_\n]+?)(?<=\S)_(?![\w_])"), lambda m: m.group(1) or m.group(2)),
+    ("markdown_code", re.compile(r"`+([^`\n]*)`+"), r"\1"),
+    ("markdown_bullet", re.compile(r"^[ \t]*[-*•+][ \t]+", re.MULTILINE), ""),
+    ("numbered_list", re.compile(r"(?:^[ \t]*\d+[.)][ \t]+[^\n]*(?:\n(?:[ \t]*\n)*|\Z)){2,}", re.MULTILINE), _strip_numbered_list),
+    ("section_title_line", re.compile(rf"^[ \t]*(?:{_SECTION_TITLES})[ \t]*:[ \t]*$", re.MULTILINE | re.IGNORECASE), ""),
+    ("speaker_label", re.compile(rf"^[ \t]*(?:{_SPEAKER_LABELS})(?:[ \t]*\([^)\n]*\))?[ \t]*:[ \t]*", re.MULTILINE | re.IGNORECASE), ""),
+    ("section_title_prefix", re.compile(rf"^[ \t]*(?:{_SECTION_TITLES})[ \t]*:[ \t]+", re.MULTILINE | re.IGNORECASE), ""),
+    ("bracketed_direction", re.compile(rf"\[{_DIRECTION_CUE}\]", re.IGNORECASE), ""),
+    ("parenthetical_direction", re.compile(rf"\({_DIRECTION_CUE}\)", re.IGNORECASE), ""),
+]
+
+_WHITESPACE_RULES = [
+    (re.compile(r"[ \t]{2,}"), " "),
+    (re.compile(r"[ \t]+([,.;:!?])"), r"\1"),
+    (re.compile(r"^[ \t]+|[ \t]+$", re.MULTILINE), ""),
+    (re.compile(r"\n{3,}"), "\n\n"),
+]
+
+def repair_script(script: str) -> Tuple[str, List[str]]:
+    """
+    Strips the things prompt rule 8 forbids (preambles, markdown, speaker labels, section titles,
+    bracketed and parenthetical stage directions) from an LLM script.
+    Returns:
+        Tuple (repaired script, names of the rules that changed something).
+    """
+    applied: List[str] = []
+    repaired = script.replace("\r\n", "\n")
+    for name, pattern, replacement in _REPAIR_RULES:
+        updated = pattern.sub(replacement, repaired)
+        if updated != repaired:
+            applied.append(name)
+            repaired = updated
+    for pattern, replacement in _WHITESPACE_RULES:
+        repaired = pattern.sub(replacement, repaired)
+    return repaired.strip(), applied
+
+def validate_and_repair_script(script: str) -> str:
+    """
+    Repairs a generated script locally and checks it is usable for TTS.
+    Meant as the post-processing step of run_llm_chain, so an LLM retry only happens when this raises.
+    Raises:
+        ScriptValidationError: If the script is empty or too short even after repair.
+    """
+    if not isinstance(script, str) or not script.strip():
+        raise ScriptValidationError("Generated script was empty.")
+    repaired, applied = repair_script(script)
+    if applied:
+        logger.info(f"Repaired generated script locally (rules: {', '.join(applied)}). Length {len(script)} -> {len(repaired)} chars.")
+    if len(repaired) < MIN_SCRIPT_CHARS:
+        raise ScriptValidationError(f"Generated script was too short after local repair ({len(repaired)} chars).")
+    return repaired
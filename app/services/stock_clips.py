@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+import weakref
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.prompts import NEWS_STOCK_CLIP_TEXTS, NEWS_AUDIO_STYLE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Spliced before and after the TTS body, in this order.
+LEADING_CLIP_KINDS = ("intro",)
+TRAILING_CLIP_KINDS = ("outro",)
+
+# One lock per clip path being rendered; an entry goes away once no render holds or waits on its lock.
+_render_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def clip_path(kind: str, language: str, audio_style: str, tts_model: str, tts_voice: str, instruction_text: str) -> Optional[str]:
+    """
+    Library path of a pre-rendered clip, or None if there is no clip text for (kind, language).
+    The file name hashes the text, model and TTS instructions, so editing any of them renders a new clip.
+    """
+    text = NEWS_STOCK_CLIP_TEXTS.get(language, {}).get(kind)
+    if not text:
+        return None
+    style = audio_style if audio_style in NEWS_AUDIO_STYLE_CONFIG else "standard" # Request values never become path parts
+    digest = hashlib.sha256("\x00".join((text, tts_model, instruction_text)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(settings.STOCK_CLIPS_DIR, language, style, tts_voice, f"{kind}_{digest}.mp3")
+
+async def ensure_clip(
+    kind: str,
+    language: str,
+    audio_style: str,
+    tts_model: str,
+    tts_voice: str,
+    instruction_text: str,
+    render: Callable[[str, str], Awaitable[None]]
+) -> Optional[str]:
+    """
+    Returns the clip's library path, rendering it first if it does not exist yet.
+    Args:
+        render: Coroutine function (text, output_path) that synthesizes text into output_path.
+    """
+    path = clip_path(kind, language, audio_style, tts_model, tts_voice, instruction_text)
+    if path is None or os.path.exists(path):
+        return path
+    lock = _render_locks.setdefault(path, asyncio.Lock()) # Concurrent episodes render a missing clip only once
+    async with lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            await render(NEWS_STOCK_CLIP_TEXTS[language][kind], partial_path)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    logger.info(f"Rendered stock {kind} clip for language={language}, style={audio_style}, voice={tts_voice}: {path}")
+    return path
+
+def available_clip_kinds(language: str) -> List[str]:
+    return [kind for kind in LEADING_CLIP_KINDS + TRAILING_CLIP_KINDS if NEWS_STOCK_CLIP_TEXTS.get(language, {}).get(kind)]
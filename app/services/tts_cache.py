@@ -0,0 +1,320 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError: # Windows: processes are not locked out from each other (threads still are)
+    fcntl = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CACHE_FILE_SUFFIX = ".audio"
+_PARTIAL_FILE_SUFFIX = ".part"
+_SIZE_FILE = "size" # Running total of the entries' bytes, shared by every process using the directory
+_LOCK_FILE = "lock"
+_PINS_DIR = "pins" # pins/<owner>/<key>: entries an unfinished generation will need again, kept from eviction
+# Eviction goes this far below the bound, so the directory is scanned once per this much new audio
+# rather than on every store once the cache is full.
+_EVICT_TO_FRACTION = 0.9
+# Partial writes older than this are leftovers of a crashed process (younger ones may still be in progress).
+_STALE_PARTIAL_SECONDS = 3600
+
+class TTSChunkCache:
+    """
+    Content-addressed on-disk cache of synthesized TTS audio.
+    Entries are keyed by a hash of everything that determines the audio (text, model, voice, instructions,
+    format) and evicted least-recently-used (by file mtime, refreshed on every hit) once the directory grows
+    beyond max_bytes. All API and worker processes share the directory, so the directory itself is the
+    index: the size bound holds for all of them together, through a running total kept next to the entries
+    under a file lock, and any process sees the entries the others stored. Entries can be pinned by an owner
+    (e.g. a digest's generation that may be resumed), which keeps them from eviction until it unpins them.
+    Safe to call from worker threads (e.g. via asyncio.to_thread).
+
+    Args:
+        directory: Cache directory, created on first use.
+        max_bytes: Size bound for all cached entries together.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        # Counters of this process
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, model: str, voice: str, instructions: str, audio_format: str) -> str:
+        digest = hashlib.sha256()
+        for part in (text, model, voice, instructions, audio_format):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00") # Separator so ("ab", "c") and ("a", "bc") differ
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        # Two-level fan-out keeps directory listings small on large caches.
+        return os.path.join(self.directory, key[:2], key + _CACHE_FILE_SUFFIX)
+
+    # --- Shared size accounting ---
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """Excludes other threads, and other processes using the directory, from the size accounting."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, _LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_total(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.directory, _SIZE_FILE)) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_total(self, total: int) -> None:
+        path = os.path.join(self.directory, _SIZE_FILE)
+        partial_path = f"{path}.{uuid.uuid4().hex}{_PARTIAL_FILE_SUFFIX}"
+        try:
+            with open(partial_path, "w") as f:
+                f.write(str(max(0, total)))
+            os.replace(partial_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache: could not record its size: {e}")
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """(mtime, key, size) of every entry on disk, least recently used first. Removes stale partial writes."""
+        found = []
+        now = time.time()
+        for root, dirs, files in os.walk(self.directory):
+            if root == self.directory: # Size and lock files
+                dirs[:] = [name for name in dirs if name != _PINS_DIR]
+                continue
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(_CACHE_FILE_SUFFIX):
+                    found.append((stat.st_mtime, name[:-len(_CACHE_FILE_SUFFIX)], stat.st_size))
+                elif name.endswith(_PARTIAL_FILE_SUFFIX) and now - stat.st_mtime > _STALE_PARTIAL_SECONDS:
+                    try: os.remove(path)
+                    except OSError: pass
+        found.sort()
+        return found
+
+    def _evict(self) -> int:
+        """Removes least recently used entries until the directory is below the bound. Returns its size."""
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * _EVICT_TO_FRACTION)
+        pinned = self._pinned_keys()
+        evicted = 0
+        for _, key, size in entries:
+            if total <= target:
+                break
+            if key in pinned:
+                continue
+            try:
+                os.remove(self._path_for(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"TTS cache: failed to evict {key[:12]}: {e}")
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            logger.info(f"TTS cache: evicted {evicted} entries; {total / 1_048_576:.1f} MB left.")
+        if total > self.max_bytes:
+            logger.warning(f"TTS cache: {total / 1_048_576:.1f} MB of pinned entries exceed its bound.")
+        return total
+
+    def _add_to_total(self, size: int) -> None:
+        with self._directory_lock():
+            total = self._read_total()
+            if total is None: # First use of the directory, or its size record was lost: count it
+                total = sum(entry_size for _, _, entry_size in self._scan())
+            else:
+                total += size
+            if total > self.max_bytes:
+                total = self._evict()
+            self._write_total(total)
+
+    # --- Pins ---
+    def _pin_dir(self, owner: str) -> str:
+        return os.path.join(self.directory, _PINS_DIR, owner)
+
+    def _pinned_keys(self) -> Set[str]:
+        keys = set()
+        try:
+            owners = os.listdir(os.path.join(self.directory, _PINS_DIR))
+        except OSError:
+            return keys
+        for owner in owners:
+            try:
+                keys.update(os.listdir(self._pin_dir(owner)))
+            except OSError:
+                continue
+        return keys
+
+    def pin(self, owner: str, key: str) -> bool:
+        """
+        Keeps the entry for key (stored already or still to be stored) from eviction until owner unpins it.
+        Returns:
+            Whether the entry is stored already.
+        """
+        with self._directory_lock(): # So an eviction in progress sees the pin before the entry is looked up
+            try:
+                os.makedirs(self._pin_dir(owner), exist_ok=True)
+                with open(os.path.join(self._pin_dir(owner), key), "w"):
+                    pass
+                os.utime(self._pin_dir(owner), None) # Marks the owner as active, for prune_pins
+            except OSError as e:
+                logger.warning(f"TTS cache: could not pin {key[:12]} for {owner}: {e}")
+            return os.path.exists(self._path_for(key))
+
+    def unpin_all(self, owner: str) -> None:
+        """Drops all of owner's pins; its entries are evicted like any other from then on."""
+        with self._directory_lock():
+            shutil.rmtree(self._pin_dir(owner), ignore_errors=True)
+
+    def prune_pins(self, max_age_seconds: float) -> int:
+        """
+        Drops the pins of owners that pinned nothing for max_age_seconds.
+        Returns:
+            The number of owners whose pins were dropped.
+        """
+        try:
+            owners = os.listdir(os.path.join(self.directory, _PINS_DIR))
+        except OSError:
+            return 0
+        cutoff = time.time() - max_age_seconds
+        pruned = 0
+        for owner in owners:
+            try:
+                if os.path.getmtime(self._pin_dir(owner)) >= cutoff:
+                    continue
+            except OSError:
+                continue
+            self.unpin_all(owner)
+            pruned += 1
+        return pruned
+
+    # --- Entries ---
+    def get(self, key: str) -> Optional[str]:
+        """Returns the path of the cached audio for key (marking it recently used), or None on a miss."""
+        path = self._path_for(key)
+        try:
+            os.utime(path, None)
+        except OSError: # Not cached, or just evicted
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Returns the cached audio for key (marking it recently used), or None on a miss or if it was just evicted."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            logger.warning(f"TTS cache: entry {key[:12]} could not be read ({e}).")
+            return None
+
+    def put(self, key: str, source_path: str) -> None:
+        """Copies source_path into the cache under key, then evicts down to the size bound."""
+        def copy(partial_path: str) -> None:
+            with open(source_path, "rb") as source, open(partial_path, "wb") as f:
+                while True:
+                    block = source.read(1 << 20)
+                    if not block:
+                        break
+                    f.write(block)
+        self._store(key, copy)
+
+    def put_data(self, key: str, data: bytes) -> None:
+        """Stores data in the cache under key, then evicts down to the size bound."""
+        def write(partial_path: str) -> None:
+            with open(partial_path, "wb") as f:
+                f.write(data)
+        self._store(key, write)
+
+    def _store(self, key: str, write: Callable[[str], None]) -> None:
+        path = self._path_for(key)
+        try:
+            os.utime(path, None) # Already cached (possibly by another process)
+            return
+        except OSError:
+            pass
+        partial_path = f"{path}.{uuid.uuid4().hex}{_PARTIAL_FILE_SUFFIX}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write(partial_path)
+            size = os.path.getsize(partial_path)
+            os.replace(partial_path, path) # Atomic, so readers never see a half-written entry
+        except OSError as e:
+            logger.warning(f"TTS cache: could not store entry {key[:12]}: {e}")
+            try: os.remove(partial_path)
+            except OSError: pass
+            return
+        self._add_to_total(size)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries and size of the shared directory; hits, misses and evictions of this process."""
+        with self._directory_lock():
+            entries = self._scan()
+            size_bytes = sum(size for _, _, size in entries)
+            self._write_total(size_bytes)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "directory": self.directory,
+            "entries": len(entries),
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+_tts_cache: Optional[TTSChunkCache] = None
+
+def get_tts_cache() -> Optional[TTSChunkCache]:
+    """Process-wide TTS chunk cache, or None when TTS_CACHE_ENABLED is off."""
+    global _tts_cache
+    if not settings.TTS_CACHE_ENABLED:
+        return None
+    if _tts_cache is None:
+        _tts_cache = TTSChunkCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_MB * 1_048_576)
+    return _tts_cache
+
+def get_tts_cache_stats() -> Dict[str, Any]:
+    cache = get_tts_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
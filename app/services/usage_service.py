@@ -0,0 +1,159 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.news_models import NewsDigest
+from app.models.usage_models import UsageRecord, UsageKind
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English/Spanish/French text; only used when a provider reports no token usage.
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+def estimate_tokens(text_length: int) -> int:
+    return max(0, (text_length + CHARS_PER_TOKEN_ESTIMATE - 1) // CHARS_PER_TOKEN_ESTIMATE)
+
+class TTSUsageCounter:
+    """Accumulates characters and requests actually sent to the TTS provider for one digest."""
+
+    def __init__(self):
+        self.characters = 0
+        self.requests = 0
+
+    def add(self, text: str) -> None:
+        self.characters += len(text)
+        self.requests += 1
+
+def _predefined_category_id(news_digest: NewsDigest) -> Optional[int]:
+    info = news_digest.original_articles_info or {}
+    if isinstance(info, dict) and info.get("source_type") == "predefined_category_resolved":
+        return info.get("predefined_category_id")
+    return None
+
+def record_llm_usage(
+    db: Session,
+    news_digest: NewsDigest,
+    provider: Optional[str],
+    model: Optional[str],
+    input_tokens: int,
+    output_tokens: int,
+    tokens_estimated: bool = False,
+    latency_ms: Optional[int] = None,
+    failed: bool = False,
+) -> UsageRecord:
+    """Adds an LLM usage row for the digest to the session (failed: of an attempt that produced no script). The caller commits."""
+    record = UsageRecord(
+        user_id=news_digest.user_id,
+        news_digest_id=news_digest.id,
+        predefined_category_id=_predefined_category_id(news_digest),
+        kind=UsageKind.LLM_SCRIPT,
+        provider=provider,
+        model=model,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        tokens_estimated=tokens_estimated,
+        latency_ms=latency_ms,
+        failed=failed,
+    )
+    db.add(record)
+    logger.info(f"NewsDigest {news_digest.id}: LLM usage {provider}/{model} in={input_tokens} out={output_tokens}{' (estimated)' if tokens_estimated else ''}{' (failed attempt)' if failed else ''}")
+    return record
+
+def record_tts_usage(
+    db: Session,
+    news_digest: NewsDigest,
+    model: str,
+    counter: TTSUsageCounter,
+    latency_ms: Optional[int] = None,
+) -> Optional[UsageRecord]:
+    """Adds a TTS usage row for the digest to the session (nothing if no request was made). The caller commits."""
+    if not counter.requests:
+        return None
+    record = UsageRecord(
+        user_id=news_digest.user_id,
+        news_digest_id=news_digest.id,
+        predefined_category_id=_predefined_category_id(news_digest),
+        kind=UsageKind.TTS,
+        provider="openai",
+        model=model,
+        characters=counter.characters,
+        chunks=counter.requests,
+        latency_ms=latency_ms,
+    )
+    db.add(record)
+    logger.info(f"NewsDigest {news_digest.id}: TTS usage {counter.characters} chars in {counter.requests} request(s)")
+    return record
+
+_GROUP_COLUMNS = {
+    "user": UsageRecord.user_id,
+    "category": UsageRecord.predefined_category_id,
+}
+
+def aggregate_usage(
+    db: Session,
+    group_by: Optional[str] = None,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Sums usage per kind, optionally also per user or per predefined category.
+    Args:
+        group_by: None, "user" or "category".
+        user_id: Restrict to one user's records.
+        since / until: Optional created_at bounds (inclusive / exclusive).
+    Returns:
+        One dict per (group, kind) with summed tokens, characters and chunks.
+    """
+    group_column = _GROUP_COLUMNS.get(group_by) if group_by else None
+    if group_by and group_column is None:
+        raise ValueError(f"Unsupported usage grouping: {group_by}")
+
+    columns = [
+        UsageRecord.kind,
+        func.count(UsageRecord.id),
+        func.count(func.distinct(UsageRecord.news_digest_id)),
+        func.coalesce(func.sum(UsageRecord.input_tokens), 0),
+        func.coalesce(func.sum(UsageRecord.output_tokens), 0),
+        func.coalesce(func.sum(UsageRecord.characters), 0),
+        func.coalesce(func.sum(UsageRecord.chunks), 0),
+        func.coalesce(func.sum(UsageRecord.latency_ms), 0),
+        func.coalesce(func.sum(case((UsageRecord.failed == True, 1), else_=0)), 0),
+    ]
+    if group_column is not None:
+        columns.insert(0, group_column)
+    query = db.query(*columns)
+    if user_id is not None:
+        query = query.filter(UsageRecord.user_id == user_id)
+    if since is not None:
+        query = query.filter(UsageRecord.created_at >= since)
+    if until is not None:
+        query = query.filter(UsageRecord.created_at < until)
+    group_columns = [group_column, UsageRecord.kind] if group_column is not None else [UsageRecord.kind]
+    rows = query.group_by(*group_columns).order_by(*group_columns).all()
+
+    results = []
+    for row in rows:
+        values = list(row)
+        group_value = values.pop(0) if group_column is not None else None
+        kind, records, digests, input_tokens, output_tokens, characters, chunks, latency_ms, failed_records = values
+        item = {
+            "kind": kind,
+            "records": records,
+            "digests": digests,
+            "input_tokens": int(input_tokens),
+            "output_tokens": int(output_tokens),
+            "characters": int(characters),
+            "chunks": int(chunks),
+            "total_latency_ms": int(latency_ms),
+            "failed_records": int(failed_records),
+        }
+        if group_by == "user":
+            item["user_id"] = group_value
+        elif group_by == "category":
+            item["predefined_category_id"] = group_value
+        results.append(item)
+    return results
@@ -0,0 +1,108 @@
+import logging
+import mimetypes
+import struct
+from typing import List, Optional
+
+import numpy as np
+
+from app.services import mp3_frames
+
+logger = logging.getLogger(__name__)
+
+# --- Peaks sidecar format: 8-byte header, then one int8 (0..127) per bucket ---
+PEAKS_MAGIC = b"PEAK"
+PEAKS_VERSION = 1
+PEAKS_FILE_EXTENSION = "peaks"
+PEAKS_MEDIA_TYPE = "application/octet-stream"
+# File names carry the episode's UUID and are never rewritten, so clients may cache them for good.
+PEAKS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Levels this far below the episode's loudest frame are drawn as zero.
+_DYNAMIC_RANGE_DB = 48.0
+_GAIN_STEP_DB = 1.5 # One global_gain step scales the quantizer by 2^(1/4)
+_SILENT = -1
+
+mimetypes.add_type(PEAKS_MEDIA_TYPE, f".{PEAKS_FILE_EXTENSION}") # For StaticFiles content types
+
+def frame_gains(data: bytes, stream: mp3_frames.Mp3Stream) -> np.ndarray:
+    """
+    Loudest global_gain of each frame's granules, read from the side information without decoding.
+    The encoder picks global_gain (the quantizer step) to fit the signal into the frame, so it follows
+    loudness closely enough for a waveform. Frames without coded data (e.g. inserted silence) are _SILENT.
+    """
+    if not stream.frames:
+        return np.zeros(0, dtype=np.int16)
+    header = stream.first_header
+    first_bit, block_bits, blocks = header.side_info_blocks
+    raw = np.frombuffer(data, dtype=np.uint8)
+    offsets = np.fromiter((offset for offset, _ in stream.frames), dtype=np.int64, count=len(stream.frames))
+    has_crc = (raw[offsets + 1] & 0x01) == 0
+    starts = offsets + 4 + np.where(has_crc, 2, 0)
+    side = raw[starts[:, None] + np.arange(header.side_info_length)]
+    bits = np.unpackbits(side, axis=1)
+
+    def field(bit_offset: int, width: int) -> np.ndarray:
+        weights = 1 << np.arange(width - 1, -1, -1)
+        return bits[:, bit_offset:bit_offset + width].astype(np.int32) @ weights
+
+    gains = np.full(len(offsets), _SILENT, dtype=np.int16)
+    for block in range(blocks):
+        block_start = first_bit + block * block_bits
+        coded = field(block_start, 12) > 0 # part2_3_length
+        gain = field(block_start + 21, 8)
+        gains = np.maximum(gains, np.where(coded, gain, _SILENT).astype(np.int16))
+    return gains
+
+class WaveformAccumulator:
+    """
+    Collects per-frame levels while MP3 parts are appended to an episode (see Mp3StreamWriter),
+    so the peaks come from the frames already in memory instead of a second pass over the file.
+    """
+
+    def __init__(self):
+        self._gains: List[np.ndarray] = []
+        self.frame_seconds: Optional[float] = None
+
+    def add_stream(self, data: bytes, stream: mp3_frames.Mp3Stream) -> None:
+        if self.frame_seconds is None:
+            self.frame_seconds = stream.first_header.samples_per_frame / stream.first_header.sample_rate
+        self._gains.append(frame_gains(data, stream))
+
+    def add_silence(self, frame_count: int) -> None:
+        self._gains.append(np.full(frame_count, _SILENT, dtype=np.int16))
+
+    def peaks(self, buckets_per_second: int) -> np.ndarray:
+        """One int8 level (0 = silent, 127 = loudest) per 1/buckets_per_second of audio."""
+        if not self._gains or self.frame_seconds is None:
+            return np.zeros(0, dtype=np.int8)
+        gains = np.concatenate(self._gains)
+        if not len(gains):
+            return np.zeros(0, dtype=np.int8)
+        levels_db = np.where(gains >= 0, gains.astype(np.float64) * _GAIN_STEP_DB, -np.inf)
+        loudest = levels_db.max()
+        if not np.isfinite(loudest):
+            levels = np.zeros(len(gains))
+        else:
+            levels = np.clip((levels_db - (loudest - _DYNAMIC_RANGE_DB)) / _DYNAMIC_RANGE_DB, 0.0, 1.0)
+        buckets = np.floor(np.arange(len(gains)) * self.frame_seconds * buckets_per_second).astype(np.int64)
+        peaks = np.zeros(buckets[-1] + 1)
+        np.maximum.at(peaks, buckets, levels)
+        return np.round(peaks * 127).astype(np.int8)
+
+def mp3_peaks(data: bytes, buckets_per_second: int) -> Optional[np.ndarray]:
+    """Peaks of a whole MP3 file (for audio that was not assembled through a WaveformAccumulator)."""
+    stream = mp3_frames.parse_mp3(data)
+    if stream is None:
+        return None
+    accumulator = WaveformAccumulator()
+    accumulator.add_stream(data, stream)
+    return accumulator.peaks(buckets_per_second)
+
+def mp3_file_peaks(path: str, buckets_per_second: int) -> Optional[np.ndarray]:
+    with open(path, "rb") as f:
+        return mp3_peaks(f.read(), buckets_per_second)
+
+def write_peaks_file(path: str, peaks: np.ndarray, buckets_per_second: int) -> None:
+    """Writes the sidecar: b"PEAK", version (uint8), reserved (uint8), buckets per second (uint16 LE), int8 peaks."""
+    with open(path, "wb") as f:
+        f.write(PEAKS_MAGIC + struct.pack("<BBH", PEAKS_VERSION, 0, buckets_per_second))
+        f.write(peaks.astype(np.int8).tobytes())
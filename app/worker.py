@@ -0,0 +1,426 @@
+"""
+Worker process running queued generation jobs (see app/services/job_queue.py).
+
+Each pipeline stage (fetch, script, audio) has its own pool of slots, sized by WORKER_<STAGE>_CONCURRENCY,
+so a slow stage does not hold capacity of the others: while TTS for some digests saturates the audio pool,
+news for the next ones is fetched and scripted. CPU-bound steps run in a process pool (WORKER_CPU_PROCESSES).
+Run as many workers as needed, next to or on other machines than the API; they only share the database.
+Each attempt of a stage is cancelled after its stage timeout (JOB_<STAGE>_TIMEOUT_SECONDS) or the job's
+deadline, and workers periodically time out jobs and digests nothing is finishing anymore (the reaper).
+Workers also queue the podcasts users scheduled (app/services/podcast_scheduler.py) as their run time comes.
+
+Usage (from the project root):
+    python -m app.worker                       # all stages, until SIGTERM/SIGINT
+    python -m app.worker --stages audio        # only the audio stage (scale stages separately)
+    python -m app.worker --burst               # exit once no job is due (e.g. from cron)
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models import user_models # noqa: F401 - registers the ORM models
+from app.models import news_models # noqa: F401
+from app.models import preference_models # noqa: F401
+from app.models import predefined_category_models # noqa: F401
+from app.models import usage_models # noqa: F401
+from app.models import schedule_models # noqa: F401
+from app.models.job_models import GenerationJob, JobKind, JobStage, JobStatus, StageRunOutcome, STAGE_ORDER
+from app.models.news_models import NewsDigestStatus
+from app.services import job_queue, podcast_pipeline, podcast_service, cpu_pool, coalescing, generation_checkpoints, podcast_scheduler, audio_formats
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# --- Stage handlers: return payload updates for later stages on success, None for a final (non-retryable)
+# failure, raise to retry ---
+async def _run_fetch(db: Session, job: GenerationJob, secrets: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    news_content = await podcast_pipeline.fetch_news(
+        db=db,
+        news_digest_id=job.news_digest_id,
+        user_id=job.user_id,
+        generation_criteria=job.payload.get("generation_criteria") or {},
+    )
+    return {} if news_content else None # The news content is on the digest now
+
+async def _run_script(db: Session, job: GenerationJob, secrets: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    written = await podcast_pipeline.write_script(
+        db=db,
+        news_digest_id=job.news_digest_id,
+        generation_criteria=job.payload.get("generation_criteria") or {},
+        news_content=job.payload.get("news_content"), # Jobs fetched before news content was kept on the digest
+        user_openai_api_key=secrets.get("openai"),
+        user_google_api_key=secrets.get("google"),
+    )
+    return {"news_content": None} if written else None # The script is on the digest now
+
+async def _run_audio(db: Session, job: GenerationJob, secrets: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    produced = await podcast_pipeline.produce_audio(
+        db=db,
+        news_digest_id=job.news_digest_id,
+        generation_criteria=job.payload.get("generation_criteria") or {},
+        force_regenerate=bool(job.payload.get("force_regenerate")),
+        user_openai_api_key=secrets.get("openai"),
+        output_formats=job.payload.get("output_formats"),
+    )
+    return {} if produced else None
+
+JOB_HANDLERS: Dict[Tuple[str, str], Callable[[Session, GenerationJob, Dict[str, str]], Awaitable[Optional[Dict[str, Any]]]]] = {
+    (JobKind.GENERATE_PODCAST, JobStage.FETCH): _run_fetch,
+    (JobKind.GENERATE_PODCAST, JobStage.SCRIPT): _run_script,
+    (JobKind.GENERATE_PODCAST, JobStage.AUDIO): _run_audio,
+}
+
+def default_stage_concurrency() -> Dict[str, int]:
+    return {
+        JobStage.FETCH: settings.WORKER_FETCH_CONCURRENCY,
+        JobStage.SCRIPT: settings.WORKER_SCRIPT_CONCURRENCY,
+        JobStage.AUDIO: settings.WORKER_AUDIO_CONCURRENCY,
+    }
+
+def default_stage_timeouts() -> Dict[str, int]:
+    return {
+        JobStage.FETCH: settings.JOB_FETCH_TIMEOUT_SECONDS,
+        JobStage.SCRIPT: settings.JOB_SCRIPT_TIMEOUT_SECONDS,
+        JobStage.AUDIO: settings.JOB_AUDIO_TIMEOUT_SECONDS,
+    }
+
+# Jobs ended while a worker ran them, and the outcome of that worker's attempt
+_ENDED_OUTCOMES = {
+    JobStatus.CANCELLED: (StageRunOutcome.CANCELLED, NewsDigestStatus.CANCELLED),
+    JobStatus.TIMED_OUT: (StageRunOutcome.TIMED_OUT, NewsDigestStatus.TIMED_OUT),
+}
+
+class Worker:
+    """
+    Polls the job table with a pool of slots per stage; each slot runs one job of its stage at a time
+    under a renewed lease.
+    """
+
+    def __init__(self, stage_concurrency: Dict[str, int], poll_interval: float, worker_id: Optional[str] = None):
+        self.stage_concurrency = {stage: count for stage, count in stage_concurrency.items() if count > 0}
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+        self._live_slots: Dict[str, int] = {} # Slots that have not returned yet, per stage
+
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            logger.info(f"Worker {self.worker_id} stopping after its running jobs finish.")
+            self._stopping.set()
+
+    async def run(self, burst: bool = False) -> None:
+        logger.info(f"Worker {self.worker_id} started with slots per stage: {self.stage_concurrency}.")
+        self._live_slots = dict(self.stage_concurrency) # Counted down as slots return
+        slots = [
+            self._slot(stage, slot, burst)
+            for stage, count in self.stage_concurrency.items()
+            for slot in range(count)
+        ]
+        if burst:
+            await asyncio.to_thread(self.reap)
+            await asyncio.to_thread(self.schedule)
+            await asyncio.gather(*slots)
+        else:
+            await asyncio.gather(self._reaper(), self._scheduler(), *slots)
+        logger.info(f"Worker {self.worker_id} stopped.")
+
+    async def _slot(self, stage: str, slot: int, burst: bool) -> None:
+        try:
+            while not self._stopping.is_set():
+                # Checked before claiming: once the earlier stages' slots are gone, they handed over all their
+                # jobs before this claim started, so an empty claim means nothing more will come in burst mode.
+                earlier_live = self._earlier_stages_live(stage)
+                try:
+                    job_id = await asyncio.to_thread(self._claim, stage)
+                except Exception as e:
+                    logger.error(f"Worker {self.worker_id} {stage} slot {slot}: claiming failed: {e}", exc_info=True)
+                    job_id = None
+                if job_id is not None:
+                    try:
+                        await self._run_job(job_id, started_at=datetime.utcnow())
+                    except Exception as e:
+                        # Bookkeeping failed (e.g. the database); the lease expires and the job is claimed again
+                        logger.error(f"Worker {self.worker_id} {stage} slot {slot}: job {job_id} failed outside its stage: {e}", exc_info=True)
+                    continue
+                if burst and not earlier_live:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._live_slots[stage] -= 1
+
+    def _claim(self, stage: str) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            job = job_queue.claim_job(db, self.worker_id, stages=[stage])
+            return job.id if job else None
+        finally:
+            db.close()
+
+    def _earlier_stages_live(self, stage: str) -> bool:
+        """In burst mode, a stage keeps polling while this worker may still hand it jobs from earlier stages."""
+        earlier = STAGE_ORDER[:STAGE_ORDER.index(stage)]
+        return any(self._live_slots.get(other) for other in earlier if other in self.stage_concurrency)
+
+    async def _run_job(self, job_id: int, started_at: datetime) -> None:
+        # Job bookkeeping is blocking DB work, run in threads so a slow round-trip does not stall the
+        # heartbeats and the other slots on this loop. The session is never used by two of them at once.
+        db = SessionLocal()
+        job = await asyncio.to_thread(db.get, GenerationJob, job_id)
+        if job is None: # Deleted with its digest right after being claimed
+            db.close()
+            return
+        stage = job.stage
+        try:
+            handler = JOB_HANDLERS.get((job.kind, stage))
+            if handler is None:
+                await asyncio.to_thread(job_queue.fail_job, db, job_id, self.worker_id, f"No handler for job kind '{job.kind}' at stage '{stage}'.", retry=False)
+                return
+            secrets = job_queue.decrypt_secrets(job.encrypted_secrets)
+
+            work = asyncio.create_task(handler(db, job, secrets))
+            timed_out = False
+            def time_out() -> None:
+                nonlocal timed_out
+                timed_out = True
+                work.cancel()
+            timeout = self._stage_timeout(job)
+            timer = asyncio.get_running_loop().call_later(timeout, time_out) if timeout is not None else None
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, work))
+            try:
+                payload_updates = await work
+            except asyncio.CancelledError:
+                if timed_out:
+                    await asyncio.to_thread(self._time_out_attempt, db, job, timeout, started_at)
+                    return
+                if not heartbeat.done():
+                    raise # This worker is being torn down; the lease expires and another worker retries the job
+                await asyncio.to_thread(self._lose_attempt, db, job, started_at)
+                return
+            except Exception as e:
+                await asyncio.to_thread(self._fail_attempt, db, job, e, started_at)
+                return
+            finally:
+                heartbeat.cancel()
+                if timer is not None:
+                    timer.cancel()
+            await asyncio.to_thread(self._finish_attempt, db, job, payload_updates, started_at)
+        finally:
+            db.close()
+
+    def _finish_attempt(self, db: Session, job: GenerationJob, payload_updates: Optional[Dict[str, Any]], started_at: datetime) -> None:
+        """Hands a finished stage's job to its next stage, or ends it if the stage reported a final failure."""
+        ended = self._ended_elsewhere(db, job)
+        if ended: # Cancelled or timed out just before the stage returned
+            self._abandon_ended_job(db, job, ended, started_at, discard_episode=payload_updates is not None and job.stage == STAGE_ORDER[-1])
+        elif payload_updates is not None:
+            job_queue.record_stage_run(db, job, self.worker_id, StageRunOutcome.SUCCEEDED, started_at)
+            next_step = job_queue.advance_job(db, job, self.worker_id, payload_updates)
+            if next_step == JobStatus.SUCCEEDED:
+                self._settle_followers(db, job, coalescing.share_result_with_followers)
+            else:
+                self._settle_followers(db, job, coalescing.mirror_status)
+        else:
+            job_queue.record_stage_run(db, job, self.worker_id, StageRunOutcome.FAILED, started_at)
+            job_queue.fail_job(db, job.id, self.worker_id, f"Stage {job.stage} reported a failure (see the digest's error_message).", retry=False)
+            self._settle_followers(db, job, coalescing.fail_followers)
+
+    def _fail_attempt(self, db: Session, job: GenerationJob, error: Exception, started_at: datetime) -> None:
+        """A stage that raised is retried with backoff until max_attempts; then the job and digest fail."""
+        ended = self._ended_elsewhere(db, job)
+        if ended:
+            self._abandon_ended_job(db, job, ended, started_at)
+            return
+        retrying = job.attempts < job.max_attempts
+        job_queue.record_stage_run(db, job, self.worker_id, StageRunOutcome.RETRYING if retrying else StageRunOutcome.FAILED, started_at)
+        status = job_queue.fail_job(db, job.id, self.worker_id, f"{error.__class__.__name__}: {error}")
+        if status == JobStatus.FAILED:
+            if job.news_digest_id:
+                podcast_pipeline.mark_digest_failed(db, job.news_digest_id, f"Generation failed: {str(error)[:200]}")
+            self._settle_followers(db, job, coalescing.promote_follower)
+
+    def _lose_attempt(self, db: Session, job: GenerationJob, started_at: datetime) -> None:
+        """The heartbeat found the lease gone: the job was ended meanwhile, or another worker took it over."""
+        ended = self._ended_elsewhere(db, job)
+        if ended:
+            self._abandon_ended_job(db, job, ended, started_at)
+            return
+        logger.warning(f"Job {job.id}: lease lost at stage {job.stage}, another worker may be running it. Abandoning this attempt.")
+        job_queue.record_stage_run(db, job, self.worker_id, StageRunOutcome.LEASE_LOST, started_at)
+
+    def _stage_timeout(self, job: GenerationJob) -> Optional[float]:
+        """Seconds this attempt may run: the stage timeout, cut short by the job's deadline. None: no limit."""
+        limits = [float(default_stage_timeouts().get(job.stage) or 0)] # 0: no stage timeout
+        if job.deadline_at is not None:
+            limits.append(max(0.001, (job.deadline_at - datetime.utcnow()).total_seconds()))
+        limits = [limit for limit in limits if limit > 0]
+        return min(limits) if limits else None
+
+    def _time_out_attempt(self, db: Session, job: GenerationJob, timeout: float, started_at: datetime) -> None:
+        """A stage timeout is retried like any failed attempt; the job (and digest) time out when that ends it."""
+        db.rollback()
+        past_deadline = job.deadline_at is not None and datetime.utcnow() >= job.deadline_at
+        error = "Job passed its deadline." if past_deadline else f"Stage {job.stage} timed out after {timeout:.1f}s."
+        retrying = not past_deadline and job.attempts < job.max_attempts
+        logger.warning(f"Job {job.id}: {error}")
+        job_queue.record_stage_run(db, job, self.worker_id, StageRunOutcome.RETRYING if retrying else StageRunOutcome.TIMED_OUT, started_at)
+        status = job_queue.fail_job(db, job.id, self.worker_id, error, retry=not past_deadline, final_status=JobStatus.TIMED_OUT)
+        if status == JobStatus.TIMED_OUT:
+            if job.news_digest_id:
+                podcast_pipeline.mark_digest_failed(db, job.news_digest_id, f"Generation timed out: {error}", status=NewsDigestStatus.TIMED_OUT)
+            self._settle_followers(db, job, coalescing.promote_follower)
+
+    def _ended_elsewhere(self, db: Session, job: GenerationJob) -> Optional[str]:
+        """CANCELLED or TIMED_OUT if the job was ended (by its owner or the reaper) while this attempt ran."""
+        db.rollback()
+        db.refresh(job)
+        return job.status if job.status in _ENDED_OUTCOMES else None
+
+    def _abandon_ended_job(self, db: Session, job: GenerationJob, status: str, started_at: datetime, discard_episode: bool = False) -> None:
+        """
+        Records the attempt of a job that was ended meanwhile. Whoever ended it already updated its digest,
+        but the stage may have written over that before it stopped, so the digest is ended again. With
+        discard_episode, the episode this attempt just produced is deleted too.
+        """
+        outcome, digest_status = _ENDED_OUTCOMES[status]
+        logger.info(f"Job {job.id}: {status.lower()} while running stage {job.stage}; abandoning this attempt.")
+        job_queue.record_stage_run(db, job, self.worker_id, outcome, started_at)
+        if job.news_digest_id and discard_episode:
+            podcast_service.discard_episode(db, job.news_digest_id)
+            db.commit()
+        if job.news_digest_id:
+            podcast_pipeline.mark_digest_failed(db, job.news_digest_id, job.last_error or f"Generation {status.lower()}.", status=digest_status)
+
+    def _settle_followers(self, db: Session, job: GenerationJob, action: Callable[[Session, GenerationJob], Any]) -> None:
+        """Passes the job's progress or outcome on to identical jobs waiting on it (app/services/coalescing.py)."""
+        try:
+            action(db, job)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Job {job.id}: updating the jobs waiting on it failed: {e}", exc_info=True)
+
+    async def _reaper(self) -> None:
+        """Runs reap() every JOB_REAPER_INTERVAL_SECONDS until the worker stops."""
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self.reap)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(1, settings.JOB_REAPER_INTERVAL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    def reap(self) -> None:
+        """
+        Times out jobs past their deadline, with their digests (their followers get to run on their own),
+        and digests in progress that no job will finish anymore. A worker still running a timed-out job loses
+        its lease on the next renewal, which stops the attempt and frees its slot. Also unpins the cached chunks
+        of generations nobody resumed within GENERATION_CHECKPOINT_MAX_AGE_HOURS, and deletes the segments of
+        episodes stored over TTS_SEGMENTS_GRACE_MINUTES ago.
+        """
+        db = SessionLocal()
+        try:
+            for job in job_queue.time_out_overdue_jobs(db):
+                if job.news_digest_id:
+                    podcast_pipeline.mark_digest_failed(db, job.news_digest_id, "Generation timed out: job passed its deadline.", status=NewsDigestStatus.TIMED_OUT)
+                self._settle_followers(db, job, coalescing.promote_follower)
+            if settings.JOB_DEADLINE_SECONDS > 0:
+                stale_ids = job_queue.stale_digest_ids(db, idle_seconds=settings.JOB_DEADLINE_SECONDS)
+                for news_digest_id in stale_ids:
+                    podcast_pipeline.mark_digest_failed(db, news_digest_id, "Generation timed out: nothing is generating this podcast anymore.", status=NewsDigestStatus.TIMED_OUT)
+                if stale_ids:
+                    logger.warning(f"Reaper: timed out {len(stale_ids)} digest(s) without a running generation.")
+            pruned = generation_checkpoints.prune(settings.GENERATION_CHECKPOINT_MAX_AGE_HOURS * 3600)
+            if pruned:
+                logger.info(f"Reaper: unpinned the cached chunks of {pruned} generation(s) never resumed.")
+            removed = podcast_service.remove_expired_playlists(db, settings.TTS_SEGMENTS_GRACE_MINUTES * 60)
+            if removed:
+                logger.info(f"Reaper: removed the segments of {removed} stored episode(s).")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Worker {self.worker_id}: reaping stale jobs failed: {e}", exc_info=True)
+        finally:
+            db.close()
+
+    async def _scheduler(self) -> None:
+        """Runs schedule() every SCHEDULE_POLL_SECONDS until the worker stops."""
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self.schedule)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(1, settings.SCHEDULE_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    def schedule(self) -> None:
+        """Queues the podcasts of schedules whose run time has come, at SCHEDULE_JOB_PRIORITY."""
+        db = SessionLocal()
+        try:
+            queued = podcast_scheduler.queue_due_schedules(db)
+            if queued:
+                logger.info(f"Worker {self.worker_id}: queued {queued} scheduled podcast(s).")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Worker {self.worker_id}: queueing scheduled podcasts failed: {e}", exc_info=True)
+        finally:
+            db.close()
+
+    def _renew_lease(self, job_id: int) -> bool:
+        db = SessionLocal()
+        try:
+            return job_queue.renew_lease(db, job_id, self.worker_id)
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int, work: asyncio.Task) -> None:
+        """Renews the lease every third of its length; cancels the work if the lease was lost."""
+        interval = max(1.0, settings.JOB_LEASE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                held = await asyncio.to_thread(self._renew_lease, job_id)
+            except Exception as e:
+                logger.warning(f"Job {job_id}: lease renewal failed ({e}); retrying on the next beat.")
+                continue
+            if not held:
+                work.cancel()
+                return
+
+async def main(stages: List[str], poll_interval: float, cpu_processes: int, burst: bool) -> None:
+    concurrency = {stage: count for stage, count in default_stage_concurrency().items() if stage in stages}
+    if JobStage.AUDIO in concurrency:
+        audio_formats.check_formats_producible(audio_formats.default_formats()) # Fails startup on an unusable AUDIO_OUTPUT_FORMATS
+    worker = Worker(stage_concurrency=concurrency, poll_interval=poll_interval)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError: # Windows
+            pass
+    cpu_pool.start(cpu_processes)
+    try:
+        await worker.run(burst=burst)
+    finally:
+        cpu_pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued podcast generation jobs.")
+    parser.add_argument("--stages", default=",".join(stage.lower() for stage in STAGE_ORDER), help="Comma-separated stages this worker serves (default: all).")
+    parser.add_argument("--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL_SECONDS, help="Seconds between polls when the queue is empty.")
+    parser.add_argument("--cpu-processes", type=int, default=settings.WORKER_CPU_PROCESSES, help="Processes for CPU-bound steps (0: use threads).")
+    parser.add_argument("--burst", action="store_true", help="Exit once no job is due instead of polling forever.")
+    args = parser.parse_args()
+    stages = [stage.strip().upper() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGE_ORDER]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}. Choose from: {', '.join(stage.lower() for stage in STAGE_ORDER)}.")
+    asyncio.run(main(stages, args.poll_interval, args.cpu_processes, args.burst))
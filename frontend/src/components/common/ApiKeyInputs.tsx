@@ -24,7 +24,7 @@ const ApiKeyInputs: React.FC<ApiKeyInputsProps> = ({
   return (
     <>
       <p className="text-xs sm:text-sm text-gray-400 mb-3">
-        If you provide your own API keys, they will be used for this generation request only and will not be stored.
+        If you provide your own API keys, they will be used for this generation request only and are deleted once it finishes.
         This will override any system-configured keys for this request.
       </p>
       <div className="space-y-4">
@@ -576,7 +576,7 @@ const PodcastGeneratorForm: React.FC<PodcastGeneratorFormProps> = ({ onGeneratio
           {/* Advanced Settings (Collapsible, Common for all modes) */}
           <CollapsibleAdvancedSettings>
             <p className="text-xs sm:text-sm text-gray-400 mb-3">
-              If you provide your own API keys, they will be used for this generation request only and will not be stored.
+              If you provide your own API keys, they will be used for this generation request only and are deleted once it finishes.
               This will override any system-configured keys for this request.
             </p>
             <div>
@@ -1,11 +1,12 @@
-import React, { useEffect } from 'react';
-import { useQuery } from '@tanstack/react-query';
-import { getPodcastStatus } from '../../services/podcastService';
-import type { PodcastEpisodeStatusResponse } from '../../types/api';
+import React, { useEffect, useRef, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { cancelPodcastGeneration, getPodcastStatus, resumePodcastGeneration, streamPodcastStatus } from '../../services/podcastService';
+import type { GenerationProgress, PodcastEpisodeStatusResponse } from '../../types/api';
 import { NewsDigestStatus } from '../../types/api'; // Enum for status comparison
 import AudioPlayer from './AudioPlayer';
-import { Loader2, AlertTriangle, CheckCircle2, FileText, XCircle, Hourglass, ArchiveIcon } from 'lucide-react';
+import { Loader2, AlertTriangle, CheckCircle2, FileText, XCircle, Hourglass, ArchiveIcon, Ban, TimerOff } from 'lucide-react';
 import { config } from '../../config'; // Import config
+import { endedUnsuccessfully, isFinalStatus } from '../../lib/podcastStatus';
 
 interface PodcastStatusCardProps {
   newsDigestId: number;
@@ -13,17 +14,68 @@ interface PodcastStatusCardProps {
   initialMessage?: string;   // Added new prop
   isCached?: boolean;        // New prop
   onPodcastCompleted?: (statusResponse: PodcastEpisodeStatusResponse, isCachedOnStart: boolean) => void; // Modified prop
+  onStreamUnavailable?: (newsDigestId: number) => void; // The caller polls the status instead (usePodcastStatusBatch)
 }
 
-const POLLING_INTERVAL_MS = 5000; // 5 seconds
+const STREAM_RECONNECT_DELAY_MS = 1000;
+
+const describeProgress = (progress: GenerationProgress): string | null => {
+  switch (progress.event) {
+    case 'fetching': return 'Fetching news...';
+    case 'articles_fetched': return `Fetched ${progress.articles ?? 0} article${progress.articles === 1 ? '' : 's'}, writing script...`;
+    case 'script_started': return 'Writing script...';
+    case 'script_ready': return 'Script written, waiting for audio...';
+    case 'audio_started': return `Synthesizing audio (0/${progress.chunks_total ?? '?'} parts)...`;
+    case 'chunk_ready': return `Synthesizing audio (${progress.chunks_done}/${progress.chunks_total} parts)...`;
+    default: return null;
+  }
+};
 
 const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({ 
   newsDigestId, 
   initialStatus,
   initialMessage, // Destructure new prop
   isCached, 
-  onPodcastCompleted // Destructure new prop
+  onPodcastCompleted, // Destructure new prop
+  onStreamUnavailable
 }) => {
+  const queryClient = useQueryClient();
+  const [progress, setProgress] = useState<GenerationProgress | null>(null);
+  const [isCancelling, setIsCancelling] = useState(false);
+  const [isResuming, setIsResuming] = useState(false);
+  const [followRound, setFollowRound] = useState(0); // Bumped to follow a resumed generation
+  const latestStatus = useRef<PodcastEpisodeStatusResponse | undefined>(undefined);
+
+  // Status pushed by the server replaces polling; reconnects while the generation is still running
+  // (the server closes streams after a while).
+  useEffect(() => {
+    const controller = new AbortController();
+    const follow = async () => {
+      while (!controller.signal.aborted && !isFinalStatus(latestStatus.current)) {
+        let received = false;
+        await streamPodcastStatus(newsDigestId, {
+          onStatus: (statusResponse) => {
+            received = true;
+            latestStatus.current = statusResponse;
+            queryClient.setQueryData(['podcastStatus', newsDigestId], statusResponse);
+          },
+          onProgress: setProgress,
+        }, controller.signal);
+        if (!received) throw new Error('Status stream closed without a status');
+        if (!isFinalStatus(latestStatus.current)) {
+          await new Promise((resolve) => setTimeout(resolve, STREAM_RECONNECT_DELAY_MS));
+        }
+      }
+    };
+    follow().catch((streamError) => {
+      if (!controller.signal.aborted) {
+        console.warn(`Status stream for digest ${newsDigestId} unavailable, polling instead:`, streamError);
+        onStreamUnavailable?.(newsDigestId);
+      }
+    });
+    return () => controller.abort();
+  }, [newsDigestId, queryClient, followRound, onStreamUnavailable]);
+
   const { // Note: data is renamed to statusDataFromHook to avoid conflict with statusData used below
     data: statusDataFromHook,
     isLoading: isLoadingHook,
@@ -46,30 +98,15 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
         updated_at: new Date().toISOString(), // Placeholder, will be updated by poll
       } as PodcastEpisodeStatusResponse) 
       : undefined,
-    refetchInterval: (query) => {
-      const currentQueryData = query.state.data as PodcastEpisodeStatusResponse | undefined;
-      if (currentQueryData) {
-        if (currentQueryData.status === NewsDigestStatus.FAILED) {
-          return false; // Stop on failure
-        }
-        if (currentQueryData.status === NewsDigestStatus.COMPLETED) {
-          // If it's completed, also check if critical data like audio_url is present.
-          // If audio_url is still undefined, it means we are likely looking at the initialData
-          // or a partial fetch, so we should allow fetching/polling to continue.
-          if (currentQueryData.audio_url) {
-            return false; // Stop if completed AND audio_url is present
-          }
-        }
-      }
-      return POLLING_INTERVAL_MS; // Continue polling otherwise
-    },
-    refetchOnWindowFocus: true,
+    // No polling here: the status stream pushes updates, or the caller polls all cards in one batch
+    // request once the stream is unavailable (onStreamUnavailable).
+    refetchOnWindowFocus: false,
   });
 
   // Effect to call onPodcastCompleted when status is final
   useEffect(() => {
     if (statusDataFromHook && onPodcastCompleted) {
-      if (statusDataFromHook.status === NewsDigestStatus.FAILED || 
+      if (endedUnsuccessfully(statusDataFromHook.status) ||
           (statusDataFromHook.status === NewsDigestStatus.COMPLETED && statusDataFromHook.audio_url)) {
         onPodcastCompleted(statusDataFromHook, isCached || false); // Pass isCached prop
       }
@@ -90,6 +127,35 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
   const isError = isCached && initialStatus && !statusDataFromHook ? false : isErrorHook;
   const error = isCached && initialStatus && !statusDataFromHook ? null : errorFromHook;
 
+  const handleCancel = async () => {
+    setIsCancelling(true);
+    try {
+      const statusResponse = await cancelPodcastGeneration(newsDigestId);
+      latestStatus.current = statusResponse;
+      queryClient.setQueryData(['podcastStatus', newsDigestId], statusResponse);
+    } catch {
+      // Generation ended meanwhile (409); the next status update shows how
+    } finally {
+      setIsCancelling(false);
+    }
+  };
+
+  const handleResume = async () => {
+    setIsResuming(true);
+    try {
+      await resumePodcastGeneration(newsDigestId);
+      const statusResponse = await getPodcastStatus(newsDigestId);
+      latestStatus.current = statusResponse;
+      setProgress(null);
+      queryClient.setQueryData(['podcastStatus', newsDigestId], statusResponse);
+      setFollowRound((round) => round + 1);
+    } catch (resumeError) {
+      console.warn(`Could not resume generation of digest ${newsDigestId}:`, resumeError);
+    } finally {
+      setIsResuming(false);
+    }
+  };
+
   const renderStatusContent = () => {
     if (isLoading && !statusData) { // Initial load
       return (
@@ -117,6 +183,10 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
     }
 
     const { status, audio_url, script_preview, error_message, updated_at } = statusData;
+    const currentProgress = progress ?? statusData.progress ?? null;
+    const inProgress = status !== NewsDigestStatus.COMPLETED && !endedUnsuccessfully(status);
+    const progressText = currentProgress && inProgress ? describeProgress(currentProgress) : null;
+    const chunkShare = currentProgress?.chunks_total ? (currentProgress.chunks_done ?? 0) / currentProgress.chunks_total : null;
     const lastUpdated = new Date(updated_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
 
     // Construct full audio URL
@@ -155,6 +225,16 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
                 statusColor = 'text-red-400';
                 statusText = 'Generation Failed';
                 break;
+            case NewsDigestStatus.CANCELLED:
+                statusIcon = <Ban size={18} className="flex-shrink-0" />;
+                statusColor = 'text-gray-400';
+                statusText = 'Generation Cancelled';
+                break;
+            case NewsDigestStatus.TIMED_OUT:
+                statusIcon = <TimerOff size={18} className="flex-shrink-0" />;
+                statusColor = 'text-red-400';
+                statusText = 'Generation Timed Out';
+                break;
             default:
                 statusIcon = <AlertTriangle size={18} className="flex-shrink-0" />;
                 statusColor = 'text-gray-400';
@@ -163,12 +243,35 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
     }
 
     return (
-      <div className={`p-3 sm:p-4 border rounded-lg shadow-md ${status === NewsDigestStatus.COMPLETED ? (isCached ? 'border-teal-600 bg-teal-900/20' : 'border-green-600 bg-green-900/20') : status === NewsDigestStatus.FAILED ? 'border-red-600 bg-red-900/20' : 'border-gray-700 bg-gray-800/50'}`}>
+      <div className={`p-3 sm:p-4 border rounded-lg shadow-md ${status === NewsDigestStatus.COMPLETED ? (isCached ? 'border-teal-600 bg-teal-900/20' : 'border-green-600 bg-green-900/20') : status === NewsDigestStatus.FAILED || status === NewsDigestStatus.TIMED_OUT ? 'border-red-600 bg-red-900/20' : 'border-gray-700 bg-gray-800/50'}`}>
         <div className="flex flex-col sm:flex-row items-start sm:items-center justify-between mb-2 sm:mb-3">
           <h3 className={`text-base sm:text-lg font-semibold ${statusColor} flex items-center mb-1 sm:mb-0`}>
             {statusIcon} <span className="ml-2 leading-tight">{statusText}</span>
           </h3>
-          <span className="text-xs text-gray-500 self-end sm:self-center">ID: {newsDigestId}</span>
+          <div className="flex items-center gap-2 self-end sm:self-center">
+            {inProgress && (
+              <button
+                type="button"
+                onClick={handleCancel}
+                disabled={isCancelling}
+                className="text-xs px-2 py-0.5 rounded border border-gray-600 text-gray-300 hover:bg-gray-700 disabled:opacity-50"
+              >
+                {isCancelling ? 'Cancelling...' : 'Cancel'}
+              </button>
+            )}
+            {endedUnsuccessfully(status) && (
+              <button
+                type="button"
+                onClick={handleResume}
+                disabled={isResuming}
+                title="Continue from where it stopped"
+                className="text-xs px-2 py-0.5 rounded border border-gray-600 text-gray-300 hover:bg-gray-700 disabled:opacity-50"
+              >
+                {isResuming ? 'Resuming...' : 'Resume'}
+              </button>
+            )}
+            <span className="text-xs text-gray-500">ID: {newsDigestId}</span>
+          </div>
         </div>
         
         {/* Display a specific badge if the item was retrieved from cache and polling hasn't updated it yet, or if it completed from cache */} 
@@ -179,6 +282,17 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
             </div>
         )}
 
+        {progressText && (
+          <div className="mb-2">
+            <p className="text-xs sm:text-sm text-gray-300">{progressText}</p>
+            {chunkShare !== null && (
+              <div className="mt-1 h-1.5 w-full bg-gray-700 rounded-full overflow-hidden">
+                <div className="h-full bg-blue-500 transition-all" style={{ width: `${Math.round(chunkShare * 100)}%` }} />
+              </div>
+            )}
+          </div>
+        )}
+
         {script_preview && (
           <div className="mb-2 p-2 bg-gray-700/50 rounded-md">
             <p className="text-xs sm:text-sm text-gray-400 font-medium mb-1 flex items-center"><FileText size={14} className="mr-1.5 flex-shrink-0" /> Script Preview:</p>
@@ -192,7 +306,7 @@ const PodcastStatusCard: React.FC<PodcastStatusCardProps> = ({
           <AudioPlayer src={fullAudioUrl} title={`Podcast ID ${newsDigestId}`} />
         )}
 
-        {error_message && status === NewsDigestStatus.FAILED && (
+        {error_message && (status === NewsDigestStatus.FAILED || status === NewsDigestStatus.TIMED_OUT) && (
           <div className="mt-2 p-2 bg-red-800/40 rounded-md">
             <p className="text-xs sm:text-sm text-red-300 font-semibold">Error Details:</p>
             <p className="text-xs sm:text-sm text-red-300 break-words">{error_message}</p>
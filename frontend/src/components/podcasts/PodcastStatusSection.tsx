@@ -1,5 +1,6 @@
-import React from 'react';
+import React, { useCallback, useState } from 'react';
 import PodcastStatusCard from './PodcastStatusCard';
+import { usePodcastStatusBatch } from '../../hooks/usePodcastStatusBatch';
 import type { ActivePodcastInfo } from '../../pages/HomePage';
 import type { PodcastEpisodeStatusResponse } from '../../types/api';
 
@@ -9,6 +10,13 @@ interface PodcastStatusSectionProps {
 }
 
 const PodcastStatusSection: React.FC<PodcastStatusSectionProps> = ({ activePodcasts, onPodcastCompleted }) => {
+  // Digests whose status stream is unavailable; their statuses are polled together in one request
+  const [polledIds, setPolledIds] = useState<number[]>([]);
+  const handleStreamUnavailable = useCallback((newsDigestId: number) => {
+    setPolledIds((ids) => (ids.includes(newsDigestId) ? ids : [...ids, newsDigestId]));
+  }, []);
+  usePodcastStatusBatch(polledIds.filter((id) => activePodcasts.some((podcast) => podcast.id === id)));
+
   if (activePodcasts.length === 0) {
     return (
       <div className="mt-8 sm:mt-10 p-4 sm:p-6 bg-gray-800 rounded-xl shadow-xl">
@@ -34,6 +42,7 @@ const PodcastStatusSection: React.FC<PodcastStatusSectionProps> = ({ activePodca
             initialMessage={podcast.initialMessage}
             isCached={podcast.isCached}
             onPodcastCompleted={onPodcastCompleted}
+            onStreamUnavailable={handleStreamUnavailable}
           />
         ))}
       </div>
@@ -0,0 +1,46 @@
+import { useEffect, useRef } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { getPodcastStatuses } from '../services/podcastService';
+import type { PodcastEpisodeStatusResponse } from '../types/api';
+import { isFinalStatus } from '../lib/podcastStatus';
+
+const POLLING_INTERVAL_MS = 5000;
+
+// Polls the statuses of all given digests with one batch request per interval (instead of one request
+// per digest), skipping those that reached a final status. Results land in the ['podcastStatus', id] queries.
+// The ETag of the last batch is sent back, so unchanged statuses cost an empty 304 response.
+export const usePodcastStatusBatch = (newsDigestIds: number[]) => {
+  const queryClient = useQueryClient();
+  const etag = useRef<string | null>(null);
+  const idsKey = newsDigestIds.join(',');
+
+  useEffect(() => {
+    if (!idsKey) return;
+    const ids = idsKey.split(',').map(Number);
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    let stopped = false;
+
+    const poll = async () => {
+      const pending = ids.filter((id) =>
+        !isFinalStatus(queryClient.getQueryData<PodcastEpisodeStatusResponse>(['podcastStatus', id])));
+      if (pending.length > 0) { // Without a request otherwise, but still checking: a digest may be resumed
+        try {
+          const batch = await getPodcastStatuses(pending, etag.current);
+          if (batch && !stopped) {
+            etag.current = batch.etag;
+            batch.items.forEach((statusResponse) =>
+              queryClient.setQueryData(['podcastStatus', statusResponse.news_digest_id], statusResponse));
+          }
+        } catch {
+          // Tried again on the next round
+        }
+      }
+      if (!stopped) timer = setTimeout(poll, POLLING_INTERVAL_MS);
+    };
+    timer = setTimeout(poll, POLLING_INTERVAL_MS);
+    return () => {
+      stopped = true;
+      clearTimeout(timer);
+    };
+  }, [idsKey, queryClient]);
+};
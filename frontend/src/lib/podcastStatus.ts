@@ -0,0 +1,11 @@
+import type { PodcastEpisodeStatusResponse } from '../types/api';
+import { NewsDigestStatus } from '../types/api';
+
+// Generation ended without a podcast
+export const endedUnsuccessfully = (status?: string) =>
+  status === NewsDigestStatus.FAILED || status === NewsDigestStatus.CANCELLED || status === NewsDigestStatus.TIMED_OUT;
+
+// Nothing about the digest will change anymore
+export const isFinalStatus = (statusResponse?: PodcastEpisodeStatusResponse) =>
+  !!statusResponse && (endedUnsuccessfully(statusResponse.status) ||
+    (statusResponse.status === NewsDigestStatus.COMPLETED && !!statusResponse.audio_url));
@@ -1,8 +1,12 @@
 import apiClient from '@/lib/apiClient';
+import { useAuthStore } from '@/store/authStore';
 import type {
+  GenerationProgress,
   PodcastGenerationRequest,
   PodcastGenerationResponse,
+  PodcastResumeRequest,
   PodcastEpisodeStatusResponse,
+  PodcastStatusBatchResponse,
   UserPodcastsListResponse,
   PodcastEpisodeUpdateNameRequest,
   PodcastEpisodeDetail
@@ -37,6 +41,116 @@ export const getPodcastStatus = async (
   }
 };
 
+export interface PodcastStatusBatch {
+  items: PodcastEpisodeStatusResponse[];
+  etag: string | null;
+}
+
+// Statuses of several digests in one request. Given the ETag of the previous batch, resolves to null
+// (HTTP 304) while none of them changed.
+export const getPodcastStatuses = async (
+  newsDigestIds: number[],
+  etag?: string | null
+): Promise<PodcastStatusBatch | null> => {
+  try {
+    const response = await apiClient.post<PodcastStatusBatchResponse>(
+      '/podcasts/status:batch',
+      { news_digest_ids: newsDigestIds },
+      {
+        headers: etag ? { 'If-None-Match': etag } : undefined,
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      }
+    );
+    if (response.status === 304) return null;
+    const etag = response.headers['etag'];
+    return { items: response.data.items, etag: typeof etag === 'string' ? etag : null };
+  } catch (error) {
+    console.error(`Error fetching statuses for digests ${newsDigestIds.join(', ')}:`, error);
+    throw error;
+  }
+};
+
+export const cancelPodcastGeneration = async (
+  newsDigestId: number
+): Promise<PodcastEpisodeStatusResponse> => {
+  try {
+    const { data } = await apiClient.post<PodcastEpisodeStatusResponse>(
+      `/podcasts/${newsDigestId}/cancel`
+    );
+    return data;
+  } catch (error) {
+    console.error(`Error cancelling generation of digest ${newsDigestId}:`, error);
+    throw error;
+  }
+};
+
+// Queues a failed, cancelled or timed-out generation again from its first incomplete stage
+export const resumePodcastGeneration = async (
+  newsDigestId: number,
+  payload: PodcastResumeRequest = {}
+): Promise<PodcastGenerationResponse> => {
+  try {
+    const { data } = await apiClient.post<PodcastGenerationResponse>(
+      `/podcasts/${newsDigestId}/resume`,
+      payload
+    );
+    return data;
+  } catch (error) {
+    console.error(`Error resuming generation of digest ${newsDigestId}:`, error);
+    throw error;
+  }
+};
+
+export interface PodcastStatusStreamHandlers {
+  onStatus: (statusResponse: PodcastEpisodeStatusResponse) => void;
+  onProgress: (progress: GenerationProgress) => void;
+}
+
+// Follows a digest's generation over Server-Sent Events until it ends (completes, fails, is cancelled or times out), or the server closes
+// the stream. Uses fetch rather than EventSource, which cannot send the Authorization header.
+export const streamPodcastStatus = async (
+  newsDigestId: number,
+  handlers: PodcastStatusStreamHandlers,
+  signal: AbortSignal
+): Promise<void> => {
+  const token = useAuthStore.getState().token;
+  const response = await fetch(`${apiClient.defaults.baseURL}/podcasts/podcast-status/${newsDigestId}/events`, {
+    headers: {
+      Accept: 'text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Status stream for digest ${newsDigestId} failed with HTTP ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary >= 0) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let eventName = 'message';
+      const dataLines: string[] = [];
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) eventName = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+      }
+      if (dataLines.length === 0) continue; // Keep-alive comment
+      const data = JSON.parse(dataLines.join('\n'));
+      if (eventName === 'status') handlers.onStatus(data as PodcastEpisodeStatusResponse);
+      else if (eventName === 'progress') handlers.onProgress(data as GenerationProgress);
+    }
+  }
+};
+
 export const listUserPodcasts = async (
   page = 1,
   size = 10
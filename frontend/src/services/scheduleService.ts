@@ -0,0 +1,46 @@
+import apiClient from '@/lib/apiClient';
+import type { PodcastSchedule, PodcastScheduleCreate, PodcastScheduleUpdate } from '../types/api';
+
+export const fetchPodcastSchedules = async (): Promise<PodcastSchedule[]> => {
+  try {
+    const { data } = await apiClient.get<PodcastSchedule[]>('/schedules/');
+    return data;
+  } catch (error) {
+    console.error("Error fetching podcast schedules:", error);
+    throw error;
+  }
+};
+
+export const createPodcastSchedule = async (
+  payload: PodcastScheduleCreate
+): Promise<PodcastSchedule> => {
+  try {
+    const { data } = await apiClient.post<PodcastSchedule>('/schedules/', payload);
+    return data;
+  } catch (error) {
+    console.error("Error creating podcast schedule:", error);
+    throw error;
+  }
+};
+
+export const updatePodcastSchedule = async (
+  scheduleId: number,
+  payload: PodcastScheduleUpdate
+): Promise<PodcastSchedule> => {
+  try {
+    const { data } = await apiClient.put<PodcastSchedule>(`/schedules/${scheduleId}`, payload);
+    return data;
+  } catch (error) {
+    console.error(`Error updating podcast schedule ${scheduleId}:`, error);
+    throw error;
+  }
+};
+
+export const deletePodcastSchedule = async (scheduleId: number): Promise<void> => {
+  try {
+    await apiClient.delete(`/schedules/${scheduleId}`);
+  } catch (error) {
+    console.error(`Error deleting podcast schedule ${scheduleId}:`, error);
+    throw error;
+  }
+};
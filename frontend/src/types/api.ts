@@ -70,12 +70,32 @@ export interface PodcastGenerationResponse {
   podcast_episode_id?: number | null;
 }
 
+export interface PodcastResumeRequest {
+  force_regenerate?: boolean;
+  output_formats?: string[] | null;
+  user_openai_api_key?: string | null;
+  user_google_api_key?: string | null;
+}
+
 export enum NewsDigestStatus {
   PENDING_SCRIPT = "PENDING_SCRIPT",
   PENDING_AUDIO = "PENDING_AUDIO",
   PROCESSING_AUDIO = "PROCESSING_AUDIO",
   COMPLETED = "COMPLETED",
   FAILED = "FAILED",
+  CANCELLED = "CANCELLED",
+  TIMED_OUT = "TIMED_OUT",
+}
+
+// Latest generation step of a digest, pushed by the status stream (see streamPodcastStatus)
+export interface GenerationProgress {
+  event: 'queued' | 'fetching' | 'articles_fetched' | 'script_started' | 'script_ready' | 'audio_started' | 'chunk_ready' | 'audio_ready' | 'failed' | 'cancelled' | 'timed_out';
+  at: string;
+  articles?: number;
+  chunks_done?: number;
+  chunks_total?: number;
+  audio_url?: string;
+  message?: string;
 }
 
 export interface PodcastEpisodeStatusResponse {
@@ -84,6 +104,7 @@ export interface PodcastEpisodeStatusResponse {
   audio_url?: string | null;
   script_preview?: string | null;
   error_message?: string | null;
+  progress?: GenerationProgress | null;
   created_at: string;
   updated_at: string;
 
@@ -96,6 +117,10 @@ export interface PodcastEpisodeStatusResponse {
   episode_expires_at?: string | null;
 }
 
+export interface PodcastStatusBatchResponse {
+  items: PodcastEpisodeStatusResponse[]; // In request order; unknown digests are left out
+}
+
 // --- New Types for User Podcast Listing and Renaming ---
 export interface PodcastEpisodeUpdateNameRequest {
   user_given_name: string;
@@ -135,4 +160,35 @@ export interface UserPodcastsListResponse {
   size: number;
 }
 
+// From app/schemas/schedule_schemas.py
+export interface PodcastSchedule {
+  id: number;
+  user_id: number;
+  name?: string | null;
+  time_of_day: string; // HH:MM in the schedule's time zone
+  timezone: string; // IANA name, e.g. "Europe/Madrid"
+  predefined_category_id?: number | null; // The user's preferences if null
+  language?: string | null;
+  audio_style?: string | null;
+  is_active: boolean;
+  next_delivery_at?: string | null; // UTC ISO datetime string
+  next_run_at?: string | null; // UTC ISO datetime string
+  last_run_at?: string | null;
+  last_news_digest_id?: number | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface PodcastScheduleCreate {
+  name?: string | null;
+  time_of_day: string;
+  timezone?: string;
+  predefined_category_id?: number | null;
+  language?: string | null;
+  audio_style?: string | null;
+  is_active?: boolean;
+}
+
+export type PodcastScheduleUpdate = Partial<PodcastScheduleCreate>;
+
 // Add other necessary types as identified, e.g., for User if auth is expanded. 
\ No newline at end of file
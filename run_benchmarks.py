@@ -0,0 +1,224 @@
+"""
+Micro-benchmarks for the podcast generation pipeline.
+
+Run from the project root:
+    python run_benchmarks.py            # all benchmarks
+    python run_benchmarks.py prompt     # only benchmarks whose name contains "prompt"
+
+These do not call any external API; LLM and TTS calls are replaced by local stubs or skipped,
+so results only reflect our own overhead.
+"""
+import asyncio
+import heapq
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.prompts import NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG, NEWS_AUDIO_STYLE_CONFIG
+from app.core.config import settings
+from app.services import llm_service, mp3_frames
+from app.services.chunk_planner import plan_tts_chunks
+
+def _timeit(func, repeat: int = 30) -> float:
+    """Median wall-clock milliseconds of func() over `repeat` runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def _print_result(name: str, baseline_ms: float, current_ms: float) -> None:
+    speedup = baseline_ms / current_ms if current_ms else float("inf")
+    print(f"{name:<48} baseline {baseline_ms:9.3f} ms   current {current_ms:9.3f} ms   x{speedup:6.1f}")
+
+# --- Prompt preparation overhead (LLM call excluded) ---
+def bench_prompt_preparation() -> None:
+    print("--- Prompt preparation per script request (300 KB news context) ---")
+    news_context = ("Markets rallied on {Tuesday} as investors weighed new data. " * 5000)[:300000]
+    llm = FakeListChatModel(responses=["stub"])
+    parser = llm_service._str_output_parser
+
+    def baseline():
+        # Previous behaviour: parse the template, escape every parameter, rebuild the chain on each call.
+        prompt = ChatPromptTemplate.from_template(NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG["en"])
+        params = {
+            "news_context": news_context,
+            "audio_style_script_instruction": NEWS_AUDIO_STYLE_CONFIG["standard"]["llm_script_instruction"],
+            "language_name": "en",
+            "intro_outro_instruction": llm_service.get_intro_outro_instruction("en"),
+        }
+        escaped = {key: llm_service.escape_curly_braces(value) for key, value in params.items()}
+        chain = prompt | llm | parser
+        prompt.format_messages(**escaped)
+        return chain
+
+    def current():
+        prompt = llm_service.get_news_script_prompt("en", "standard")
+        chain = llm_service._get_chain(prompt, llm, parser)
+        prompt.format_messages(news_context=news_context)
+        return chain
+
+    current() # Warm the template and chain caches, as a long-running worker would be
+    _print_result("prompt+chain preparation", _timeit(baseline), _timeit(current))
+
+# --- End-to-end chain invocation against a stub LLM ---
+def bench_stub_chain_invocation() -> None:
+    print("--- Full run_llm_chain invocation against a stub LLM ---")
+    news_context = ("Markets rallied on {Tuesday} as investors weighed new data. " * 5000)[:300000]
+    llm = FakeListChatModel(responses=["Welcome to today's briefing. " * 20])
+    prompt = llm_service.get_news_script_prompt("en", "standard")
+
+    def current():
+        asyncio.run(llm_service.run_llm_chain(prompt, llm, llm_service._str_output_parser, {"news_context": news_context}))
+
+    def baseline():
+        escaped = llm_service.escape_curly_braces(news_context)
+        fresh_prompt = ChatPromptTemplate.from_template(NEWS_PODCAST_SCRIPT_PROMPTS_BY_LANG["en"])
+        chain = fresh_prompt | llm | llm_service._str_output_parser
+        asyncio.run(chain.ainvoke({
+            "news_context": escaped,
+            "audio_style_script_instruction": NEWS_AUDIO_STYLE_CONFIG["standard"]["llm_script_instruction"],
+            "intro_outro_instruction": llm_service.get_intro_outro_instruction("en"),
+        }))
+
+    current()
+    _print_result("run_llm_chain (stub LLM)", _timeit(baseline, repeat=10), _timeit(current, repeat=10))
+
+# --- Audio assembly of TTS chunks ---
+def bench_mp3_concatenation() -> None:
+    print("--- Concatenating 12 x 60 s MP3 chunks (24 kHz mono, 64 kbps) ---")
+    template = mp3_frames.parse_frame_header(b"\xff\xf3\x84\xc0", 0)
+    chunk_bytes = mp3_frames.silence_frames(template, 60_000) # Valid frames; content does not affect frame joining
+    work_dir = tempfile.mkdtemp()
+    try:
+        paths = []
+        for i in range(12):
+            path = os.path.join(work_dir, f"chunk_{i}.mp3")
+            with open(path, "wb") as f:
+                f.write(chunk_bytes)
+            paths.append(path)
+        output_path = os.path.join(work_dir, "episode.mp3")
+
+        def current():
+            # What the audio stage does: append each chunk frame by frame to the open episode file.
+            with open(output_path, "wb") as output:
+                writer = mp3_frames.Mp3StreamWriter(output, pause_ms=200)
+                for path in paths:
+                    with open(path, "rb") as f:
+                        writer.append(f.read(), source=path)
+
+        if shutil.which("ffmpeg") is None:
+            print(f"{'frame-level concatenation':<48} current {_timeit(current, repeat=10):9.3f} ms   (baseline skipped: ffmpeg not installed)")
+            return
+
+        from pydub import AudioSegment
+
+        def baseline():
+            # Previous behaviour: decode every chunk, join with += and re-encode the whole episode.
+            combined = AudioSegment.empty()
+            pause = AudioSegment.silent(duration=200)
+            for path in paths:
+                combined += pause + AudioSegment.from_mp3(path)
+            combined.export(output_path, format="mp3")
+
+        _print_result("chunk concatenation", _timeit(baseline, repeat=3), _timeit(current, repeat=10))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# --- TTS chunk planning: modelled wall-clock time of concurrent chunk synthesis ---
+# Assumed per-request latency model for the TTS API: fixed overhead plus time per character. Adjust to measured values.
+TTS_REQUEST_OVERHEAD_SECONDS = 1.2
+TTS_SECONDS_PER_CHAR = 0.012
+
+def _legacy_split_script(script: str, limit: int) -> list:
+    """The pre-planner splitter (one chunk per paragraph, long paragraphs cut near the limit)."""
+    chunks = []
+    paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
+    for paragraph in paragraphs:
+        if len(paragraph) <= limit:
+            chunks.append(paragraph)
+            continue
+        current_pos = 0
+        while current_pos < len(paragraph):
+            end_pos = current_pos + limit
+            if end_pos >= len(paragraph):
+                if paragraph[current_pos:].strip(): chunks.append(paragraph[current_pos:].strip())
+                break
+            split_point = -1
+            for char in reversed(['.', '!', '?', '\n']):
+                found = paragraph.rfind(char, current_pos, end_pos)
+                if found != -1:
+                    split_point = found + 1
+                    break
+            if split_point == -1:
+                found = paragraph.rfind(' ', current_pos, end_pos)
+                split_point = found + 1 if found != -1 else end_pos
+            if paragraph[current_pos:split_point].strip(): chunks.append(paragraph[current_pos:split_point].strip())
+            current_pos = split_point
+            while current_pos < len(paragraph) and paragraph[current_pos].isspace():
+                current_pos += 1
+    return chunks
+
+def _sample_scripts(count: int = 20, seed: int = 7) -> list:
+    """Scripts shaped like the ones we generate: 6-14 stories, short intro/outro, uneven paragraph lengths."""
+    rng = random.Random(seed)
+    words = "markets officials reported growth policy climate energy election research company announced".split()
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 28))).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+    scripts = []
+    for _ in range(count):
+        paragraphs = [" ".join(sentence() for _ in range(2))]
+        for _ in range(rng.randint(6, 14)):
+            paragraphs.append(" ".join(sentence() for _ in range(rng.choice([2, 3, 5, 8, 14, 22]))))
+        paragraphs.append(" ".join(sentence() for _ in range(2)))
+        scripts.append("\n\n".join(paragraphs))
+    return scripts
+
+def _makespan_seconds(chunks: list, concurrency: int) -> float:
+    """Wall-clock time to synthesize chunks with at most `concurrency` requests in flight, started in order."""
+    workers = [0.0] * max(1, min(concurrency, len(chunks)))
+    for chunk in chunks:
+        start = heapq.heappop(workers)
+        heapq.heappush(workers, start + TTS_REQUEST_OVERHEAD_SECONDS + len(chunk) * TTS_SECONDS_PER_CHAR)
+    return max(workers)
+
+def bench_chunk_planner() -> None:
+    limit = settings.TTS_CHUNK_CHAR_LIMIT
+    parallelism = settings.TTS_CHUNK_TARGET_PARALLELISM
+    scripts = _sample_scripts()
+    print(f"--- TTS chunk planning on {len(scripts)} sample scripts (limit {limit} chars, parallelism {parallelism}) ---")
+    for concurrency, label in ((1000, "unbounded gather"), (parallelism, f"{parallelism} in flight")):
+        legacy = [_legacy_split_script(script, limit) for script in scripts]
+        planned = [plan_tts_chunks(script, limit, parallelism, settings.TTS_CHUNK_MIN_CHARS) for script in scripts]
+        legacy_makespan = statistics.mean(_makespan_seconds(chunks, concurrency) for chunks in legacy)
+        planned_makespan = statistics.mean(_makespan_seconds(chunks, concurrency) for chunks in planned)
+        print(
+            f"{'makespan, ' + label:<48} baseline {legacy_makespan:9.2f} s    current {planned_makespan:9.2f} s    x{legacy_makespan / planned_makespan:6.2f}"
+        )
+    print(f"{'chunks per script (mean)':<48} baseline {statistics.mean(len(c) for c in legacy):9.1f}      current {statistics.mean(len(c) for c in planned):9.1f}")
+    print(f"{'largest chunk chars (mean)':<48} baseline {statistics.mean(max(map(len, c)) for c in legacy):9.0f}      current {statistics.mean(max(map(len, c)) for c in planned):9.0f}")
+    print(f"{'planning time per script':<48} current {_timeit(lambda: [plan_tts_chunks(s, limit, parallelism, settings.TTS_CHUNK_MIN_CHARS) for s in scripts]) / len(scripts):9.3f} ms")
+
+BENCHMARKS = {
+    "prompt_preparation": bench_prompt_preparation,
+    "stub_chain_invocation": bench_stub_chain_invocation,
+    "mp3_concatenation": bench_mp3_concatenation,
+    "chunk_planner": bench_chunk_planner,
+}
+
+if __name__ == "__main__":
+    name_filter = sys.argv[1] if len(sys.argv) > 1 else ""
+    for bench_name, bench_func in BENCHMARKS.items():
+        if name_filter in bench_name:
+            bench_func()
+            print()
@@ -0,0 +1,48 @@
+import pytest
+
+from app.services import audio_formats
+
+
+def test_parse_formats_keeps_request_order_without_repeats():
+    assert audio_formats.parse_formats(["AAC", "mp3", " aac ", ""]) == ["aac", "mp3"]
+
+def test_parse_formats_rejects_unknown_formats():
+    with pytest.raises(ValueError, match="Unsupported audio format 'flac'"):
+        audio_formats.parse_formats(["flac"])
+
+def test_mp3_needs_no_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: None)
+    audio_formats.check_formats_producible(["mp3"])
+
+def test_transcoded_formats_are_refused_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: None)
+    with pytest.raises(ValueError, match="aac need ffmpeg"):
+        audio_formats.check_formats_producible(["mp3", "aac"])
+    with pytest.raises(RuntimeError, match="ffmpeg is not installed"):
+        audio_formats.transcode_file("in.mp3", "out.aac", "aac")
+
+def test_transcode_streams_through_ffmpeg(monkeypatch):
+    calls = []
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(audio_formats.subprocess, "run", lambda command, **kwargs: calls.append(command) or audio_formats.subprocess.CompletedProcess(command, 0, b"", b""))
+    audio_formats.transcode_file("in.mp3", "out.opus", "opus")
+    command = calls[0]
+    assert command[0] == "/usr/bin/ffmpeg" and command[-1] == "out.opus"
+    assert command[command.index("-i") + 1] == "in.mp3"
+    assert command[command.index("-c:a") + 1] == "libopus"
+    assert command[command.index("-f") + 1] == "opus"
+
+def test_unset_default_is_opus_or_mp3_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_formats.settings, "AUDIO_OUTPUT_FORMATS", "")
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: "/usr/bin/ffmpeg")
+    assert audio_formats.default_formats() == ["opus"]
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: None)
+    assert audio_formats.default_formats() == ["mp3"]
+    audio_formats.check_formats_producible(audio_formats.default_formats())
+
+def test_explicit_formats_are_kept_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_formats.settings, "AUDIO_OUTPUT_FORMATS", "aac,mp3")
+    monkeypatch.setattr(audio_formats, "_ffmpeg_path", lambda: None)
+    assert audio_formats.default_formats() == ["aac", "mp3"]
+    with pytest.raises(ValueError, match="aac need ffmpeg"):
+        audio_formats.check_formats_producible(audio_formats.default_formats())
@@ -0,0 +1,269 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import worker as worker_module
+from app.core.config import settings
+from app.db import database
+from app.db.database import Base, SessionLocal
+from app.models.job_models import GenerationJob, GenerationStageRun, JobKind, JobStage, JobStatus, StageRunOutcome
+from app.models.news_models import NewsDigest, NewsDigestStatus
+from app.models.user_models import User
+from app.services import job_queue
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A session on a fresh SQLite file; SessionLocal (used by the worker and services) is bound to it too."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 30)
+    monkeypatch.setattr(settings, "JOB_DEADLINE_SECONDS", 3600)
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", False)
+    session = SessionLocal()
+    yield session
+    session.close()
+    SessionLocal.configure(bind=database.engine)
+    engine.dispose()
+
+def enqueue(db, **kwargs) -> GenerationJob:
+    user = db.query(User).first()
+    if user is None:
+        user = User(email="listener@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+    news_digest = NewsDigest(user_id=user.id, status=NewsDigestStatus.PENDING_SCRIPT)
+    db.add(news_digest)
+    db.flush()
+    job = job_queue.enqueue_generation_job(db, news_digest, {"source_type": "topics", "topics": ["news"]}, **kwargs)
+    db.commit()
+    return job
+
+def make_due(db, job: GenerationJob) -> None:
+    db.refresh(job)
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+# --- Claiming ---
+def test_jobs_are_claimed_by_priority_then_age(db):
+    later = enqueue(db)
+    urgent = enqueue(db, priority=10)
+    claimed = job_queue.claim_job(db, "worker-a")
+    assert claimed.id == urgent.id
+    assert (claimed.status, claimed.lease_owner, claimed.attempts) == (JobStatus.RUNNING, "worker-a", 1)
+    assert job_queue.claim_job(db, "worker-a").id == later.id
+    assert job_queue.claim_job(db, "worker-a") is None
+
+def test_worker_losing_the_claim_race_takes_the_next_job(db, monkeypatch):
+    first, second = enqueue(db), enqueue(db)
+    other = SessionLocal()
+    real_update = job_queue.update
+    raced = {}
+
+    def update_after_other_worker_claims(*args, **kwargs):
+        # Between worker-b's candidate query and its conditional UPDATE, worker-a claims the first job
+        if "worker-a" not in raced:
+            raced["worker-a"] = None
+            raced["worker-a"] = job_queue.claim_job(other, "worker-a")
+        return real_update(*args, **kwargs)
+
+    monkeypatch.setattr(job_queue, "update", update_after_other_worker_claims)
+    claimed = job_queue.claim_job(db, "worker-b")
+    other.close()
+    assert raced["worker-a"].id == first.id
+    assert claimed.id == second.id
+    db.refresh(first)
+    assert (first.lease_owner, first.attempts) == ("worker-a", 1)
+
+def test_expired_lease_is_reclaimed_by_another_worker(db):
+    job = enqueue(db)
+    job_queue.claim_job(db, "worker-a", lease_seconds=60)
+    assert job_queue.claim_job(db, "worker-b") is None # Lease still held
+
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1) # worker-a died
+    db.commit()
+    reclaimed = job_queue.claim_job(db, "worker-b")
+    assert (reclaimed.id, reclaimed.lease_owner, reclaimed.attempts) == (job.id, "worker-b", 2)
+    assert job_queue.renew_lease(db, job.id, "worker-a") is False
+    assert job_queue.complete_job(db, job.id, "worker-a") is False # A late result of the dead worker is dropped
+    assert job_queue.complete_job(db, job.id, "worker-b") is True
+
+
+# --- Retries ---
+def test_failed_attempts_back_off_exponentially_until_max_attempts(db):
+    job = enqueue(db)
+    for attempt, delay in ((1, 30), (2, 60)):
+        job_queue.claim_job(db, "worker-a")
+        assert job_queue.fail_job(db, job.id, "worker-a", "boom") == JobStatus.QUEUED
+        db.refresh(job)
+        assert job.attempts == attempt
+        assert abs((job.run_after - datetime.utcnow()).total_seconds() - delay) < 5
+        assert job_queue.claim_job(db, "worker-a") is None # Backing off
+        make_due(db, job)
+
+    job_queue.claim_job(db, "worker-a")
+    assert job_queue.fail_job(db, job.id, "worker-a", "boom") == JobStatus.FAILED
+    db.refresh(job)
+    assert (job.status, job.last_error, job.encrypted_secrets) == (JobStatus.FAILED, "boom", None)
+    assert job.finished_at is not None
+
+def test_failure_without_retry_ends_the_job(db):
+    job = enqueue(db)
+    job_queue.claim_job(db, "worker-a")
+    assert job_queue.fail_job(db, job.id, "worker-a", "bad input", retry=False) == JobStatus.FAILED
+
+
+# --- Stages ---
+def test_advance_hands_the_job_to_each_stage_queue_in_turn(db):
+    job = enqueue(db)
+    assert job_queue.claim_job(db, "worker-a", stages=[JobStage.SCRIPT]) is None
+    claimed = job_queue.claim_job(db, "worker-a", stages=[JobStage.FETCH])
+    assert job_queue.advance_job(db, claimed, "worker-a", {"fetched": True}) == JobStage.SCRIPT
+
+    db.refresh(job)
+    assert (job.status, job.stage, job.attempts, job.lease_owner) == (JobStatus.QUEUED, JobStage.SCRIPT, 0, None)
+    assert job.payload["fetched"] is True and job.payload["generation_criteria"]
+    assert job_queue.claim_job(db, "worker-a", stages=[JobStage.FETCH]) is None
+    claimed = job_queue.claim_job(db, "worker-a", stages=[JobStage.SCRIPT])
+    assert job_queue.advance_job(db, claimed, "worker-a") == JobStage.AUDIO
+    claimed = job_queue.claim_job(db, "worker-a", stages=[JobStage.AUDIO])
+    assert job_queue.advance_job(db, claimed, "worker-a") == JobStatus.SUCCEEDED
+    db.refresh(job)
+    assert job.status == JobStatus.SUCCEEDED
+
+
+# --- Identical requests (WAITING followers) ---
+def test_identical_job_waits_on_the_one_in_flight(db):
+    leader = enqueue(db, coalesce_key="same")
+    follower = enqueue(db, coalesce_key="same")
+    assert (follower.status, follower.leader_job_id) == (JobStatus.WAITING, leader.id)
+    assert job_queue.claim_job(db, "worker-a").id == leader.id
+    assert job_queue.claim_job(db, "worker-b") is None # Followers are not run while their leader is
+    assert [job.id for job in job_queue.get_followers(db, leader.id)] == [follower.id]
+
+def test_identical_jobs_committed_together_are_coalesced_afterwards(db):
+    first = enqueue(db, coalesce_key="same")
+    first.status = JobStatus.WAITING # Not in flight when the second was enqueued...
+    db.commit()
+    second = enqueue(db, coalesce_key="same")
+    first.status = JobStatus.QUEUED # ... as if both were enqueued at the same moment
+    db.commit()
+    assert second.status == JobStatus.QUEUED
+    assert job_queue.coalesce_with_earlier_leader(db, second) is True
+    assert (second.status, second.leader_job_id) == (JobStatus.WAITING, first.id)
+    assert job_queue.coalesce_with_earlier_leader(db, first) is False
+
+def test_follower_takes_over_when_its_leader_ends_without_a_result(db):
+    leader = enqueue(db, coalesce_key="same")
+    followers = [enqueue(db, coalesce_key="same") for _ in range(2)]
+    job_queue.claim_job(db, "worker-a")
+    job_queue.fail_job(db, leader.id, "worker-a", "down", retry=False)
+    new_leader = job_queue.promote_follower(db, leader.id)
+    db.commit()
+    assert new_leader.id == followers[0].id
+    db.refresh(followers[1])
+    assert followers[1].leader_job_id == new_leader.id
+    assert job_queue.claim_job(db, "worker-b").id == new_leader.id
+
+def test_follower_of_a_finished_leader_runs_on_its_own(db):
+    leader = enqueue(db, coalesce_key="same")
+    follower = enqueue(db, coalesce_key="same")
+    job_queue.claim_job(db, "worker-a")
+    job_queue.complete_job(db, leader.id, "worker-a") # Its followers were never settled (e.g. the worker died)
+    claimed = job_queue.claim_job(db, "worker-b")
+    assert (claimed.id, claimed.leader_job_id) == (follower.id, None)
+
+
+# --- Cancellation and deadlines ---
+def test_cancelled_job_is_not_claimed_and_its_worker_loses_it(db):
+    queued, running = enqueue(db), enqueue(db, priority=10)
+    job_queue.claim_job(db, "worker-a")
+    assert job_queue.cancel_job(db, running.id) is True
+    assert job_queue.cancel_job(db, queued.id) is True
+    assert job_queue.cancel_job(db, queued.id) is False # Already ended
+    assert job_queue.claim_job(db, "worker-b") is None
+    assert job_queue.renew_lease(db, running.id, "worker-a") is False
+    assert job_queue.complete_job(db, running.id, "worker-a") is False
+    db.refresh(running)
+    assert (running.status, running.encrypted_secrets) == (JobStatus.CANCELLED, None)
+
+def test_reaper_times_out_overdue_jobs_and_promotes_their_followers(db):
+    leader = enqueue(db, coalesce_key="same", run_after=datetime.utcnow() - timedelta(hours=2))
+    follower = enqueue(db, coalesce_key="same")
+    on_time = enqueue(db)
+    job_queue.claim_job(db, "worker-a", lease_seconds=3600) # Overdue jobs are left to the reaper...
+    assert db.get(GenerationJob, on_time.id).status == JobStatus.RUNNING
+
+    worker_module.Worker({JobStage.FETCH: 1}, poll_interval=0.05).reap()
+    for job in (leader, follower, on_time):
+        db.refresh(job)
+    assert (leader.status, leader.last_error) == (JobStatus.TIMED_OUT, "Job passed its deadline.")
+    assert db.get(NewsDigest, leader.news_digest_id).status == NewsDigestStatus.TIMED_OUT
+    assert (follower.status, follower.leader_job_id) == (JobStatus.QUEUED, None)
+    assert on_time.status == JobStatus.RUNNING
+
+
+# --- Worker ---
+@pytest.mark.asyncio
+async def test_worker_runs_a_job_through_all_stages(db, monkeypatch):
+    async def succeed(db, job, secrets):
+        return {f"{job.stage.lower()}_done": True}
+    for stage in (JobStage.FETCH, JobStage.SCRIPT, JobStage.AUDIO):
+        monkeypatch.setitem(worker_module.JOB_HANDLERS, (JobKind.GENERATE_PODCAST, stage), succeed)
+    job = enqueue(db)
+
+    await worker_module.Worker({JobStage.FETCH: 1, JobStage.SCRIPT: 1, JobStage.AUDIO: 1}, poll_interval=0.05).run(burst=True)
+    db.refresh(job)
+    assert job.status == JobStatus.SUCCEEDED
+    assert {"fetch_done", "script_done"} <= set(job.payload)
+    runs = db.query(GenerationStageRun).filter_by(job_id=job.id).order_by(GenerationStageRun.id).all()
+    assert [(run.stage, run.outcome) for run in runs] == [
+        (JobStage.FETCH, StageRunOutcome.SUCCEEDED), (JobStage.SCRIPT, StageRunOutcome.SUCCEEDED), (JobStage.AUDIO, StageRunOutcome.SUCCEEDED),
+    ]
+
+@pytest.mark.asyncio
+async def test_worker_abandons_a_job_cancelled_while_it_runs(db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 3) # Renewed every second
+    started = asyncio.Event()
+    async def run_until_cancelled(db, job, secrets):
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+    monkeypatch.setitem(worker_module.JOB_HANDLERS, (JobKind.GENERATE_PODCAST, JobStage.FETCH), run_until_cancelled)
+    job = enqueue(db)
+
+    async def cancel_once_started():
+        await started.wait()
+        cancel_db = SessionLocal()
+        try:
+            assert job_queue.cancel_job(cancel_db, job.id)
+        finally:
+            cancel_db.close()
+    await asyncio.wait_for(asyncio.gather(
+        worker_module.Worker({JobStage.FETCH: 1}, poll_interval=0.05).run(burst=True),
+        cancel_once_started(),
+    ), timeout=10)
+
+    db.refresh(job)
+    assert job.status == JobStatus.CANCELLED
+    assert db.get(NewsDigest, job.news_digest_id).status == NewsDigestStatus.CANCELLED
+    assert [run.outcome for run in db.query(GenerationStageRun).filter_by(job_id=job.id)] == [StageRunOutcome.CANCELLED]
+
+@pytest.mark.asyncio
+async def test_worker_survives_a_bookkeeping_failure(db, monkeypatch):
+    async def succeed(db, job, secrets):
+        return {}
+    def lose_connection(self, *args):
+        raise RuntimeError("database connection lost")
+    monkeypatch.setitem(worker_module.JOB_HANDLERS, (JobKind.GENERATE_PODCAST, JobStage.FETCH), succeed)
+    monkeypatch.setattr(worker_module.Worker, "_finish_attempt", lose_connection)
+    job = enqueue(db)
+
+    await asyncio.wait_for(worker_module.Worker({JobStage.FETCH: 1}, poll_interval=0.05).run(burst=True), timeout=10)
+    db.refresh(job)
+    assert (job.status, job.stage) == (JobStatus.RUNNING, JobStage.FETCH) # Claimed again once its lease expires
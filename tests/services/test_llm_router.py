@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_router import LLMBackend, LLMProviderRouter
+
+PROMPT = ChatPromptTemplate.from_messages([("human", "Write about {topic}.")])
+PARSER = StrOutputParser()
+PARAMS = {"topic": "the news"}
+
+# --- Stub chat models ---
+class SlowChatModel(FakeListChatModel):
+    """Answers after a delay, like a provider under load."""
+    delay: float = 0.0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+class FailingChatModel(FakeListChatModel):
+    """Fails every call, like a provider that is down."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RuntimeError(f"{self.responses[0]} is down")
+
+def stub_backend(name: str, model: FakeListChatModel) -> LLMBackend:
+    return LLMBackend(name, lambda api_key: model)
+
+@pytest.fixture(autouse=True)
+def no_retries_per_backend(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTER_RETRIES_PER_BACKEND", 0)
+
+
+# --- Failover ---
+@pytest.mark.asyncio
+async def test_primary_answers():
+    router = LLMProviderRouter([
+        stub_backend("primary", FakeListChatModel(responses=["from primary"])),
+        stub_backend("secondary", FakeListChatModel(responses=["from secondary"])),
+    ])
+    assert await router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0) == ("from primary", "primary")
+
+@pytest.mark.asyncio
+async def test_primary_failure_fails_over_to_secondary():
+    primary = stub_backend("primary", FailingChatModel(responses=["primary"]))
+    router = LLMProviderRouter([primary, stub_backend("secondary", FakeListChatModel(responses=["from secondary"]))])
+    assert await router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0) == ("from secondary", "secondary")
+    assert primary.error_rate() == 1.0
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises_the_last_error():
+    router = LLMProviderRouter([
+        stub_backend("primary", FailingChatModel(responses=["primary"])),
+        stub_backend("secondary", FailingChatModel(responses=["secondary"])),
+    ])
+    with pytest.raises(RuntimeError, match="secondary is down"):
+        await router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0)
+
+@pytest.mark.asyncio
+async def test_backend_without_a_key_counts_as_failing():
+    class NoKeyProvider:
+        async def get_key(self, user_provided_key=None):
+            raise ValueError("No API key configured")
+
+    keyless = LLMBackend("keyless", lambda api_key: FakeListChatModel(responses=["unreachable"]), NoKeyProvider())
+    router = LLMProviderRouter([keyless, stub_backend("secondary", FakeListChatModel(responses=["from secondary"]))])
+    assert await router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0) == ("from secondary", "secondary")
+    assert keyless.error_rate() == 1.0
+    assert router.ranked_backends()[0].name == "secondary"
+
+def test_failing_backend_is_ranked_last():
+    primary = stub_backend("primary", FakeListChatModel(responses=["x"]))
+    secondary = stub_backend("secondary", FakeListChatModel(responses=["x"]))
+    for _ in range(4):
+        primary.record(0.1, success=False)
+        secondary.record(2.0, success=True)
+    assert LLMProviderRouter([primary, secondary]).ranked_backends() == [secondary, primary]
+
+
+# --- Deadline re-issue ---
+@pytest.mark.asyncio
+async def test_deadline_reissues_and_faster_alternate_wins():
+    primary = stub_backend("primary", SlowChatModel(responses=["from primary"], delay=5))
+    router = LLMProviderRouter([primary, stub_backend("secondary", FakeListChatModel(responses=["from secondary"]))])
+    assert await asyncio.wait_for(router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0.05), timeout=2) == ("from secondary", "secondary")
+    assert primary.error_rate() == 1.0 # The cancelled call counts against the slow backend
+
+@pytest.mark.asyncio
+async def test_deadline_reissue_keeps_the_first_finished_result():
+    secondary = stub_backend("secondary", SlowChatModel(responses=["from secondary"], delay=5))
+    router = LLMProviderRouter([stub_backend("primary", SlowChatModel(responses=["from primary"], delay=0.2)), secondary])
+    assert await asyncio.wait_for(router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0.05), timeout=2) == ("from primary", "primary")
+    assert list(secondary.outcomes) == [False] # Still running when the primary answered, so cancelled
+
+@pytest.mark.asyncio
+async def test_no_reissue_without_deadline():
+    router = LLMProviderRouter([
+        stub_backend("primary", SlowChatModel(responses=["from primary"], delay=0.1)),
+        stub_backend("secondary", FakeListChatModel(responses=["from secondary"])),
+    ])
+    assert await router.invoke(PROMPT, PARSER, PARAMS, deadline_seconds=0) == ("from primary", "primary")
+
+
+# --- User keys ---
+@pytest.mark.asyncio
+async def test_chains_on_a_user_key_are_not_cached():
+    user_model = FakeListChatModel(responses=["from user key"])
+    router = LLMProviderRouter([stub_backend("primary", user_model)])
+    assert await router.invoke(PROMPT, PARSER, PARAMS, user_api_keys={"primary": "user-key"}, deadline_seconds=0) == ("from user key", "primary")
+    assert not any(cached[1] is user_model for cached in llm_service._chain_cache.values())
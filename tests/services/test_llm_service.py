@@ -0,0 +1,42 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_router import LLMBackend, LLMProviderRouter
+from app.services.script_repair import ScriptValidationError
+
+SCRIPT = "Good morning. " * 10
+
+def stub_router(*contents: str) -> LLMProviderRouter:
+    """A router on one backend answering contents in turn, reporting 100 input and 10 output tokens each."""
+    messages = iter([
+        AIMessage(content=content, usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110}, response_metadata={"model_name": "stub-model"})
+        for content in contents
+    ])
+    return LLMProviderRouter([LLMBackend("stub", lambda api_key: GenericFakeChatModel(messages=messages), model_name="stub-model")])
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ROUTER_RETRIES_PER_BACKEND", 1)
+    monkeypatch.setattr(llm_service.asyncio, "sleep", _no_sleep)
+
+async def _no_sleep(delay):
+    return None
+
+@pytest.mark.asyncio
+async def test_usage_includes_retried_attempts():
+    usage = {}
+    script = await llm_service.generate_news_podcast_script("news", "en", "standard", router=stub_router("Hi.", SCRIPT), usage_out=usage)
+    assert script == SCRIPT.strip()
+    assert usage["provider"] == "stub"
+    assert (usage["input_tokens"], usage["output_tokens"], usage["tokens_estimated"]) == (200, 20, False)
+
+@pytest.mark.asyncio
+async def test_usage_is_filled_when_generation_fails():
+    usage = {}
+    with pytest.raises(ScriptValidationError):
+        await llm_service.generate_news_podcast_script("news", "en", "standard", router=stub_router("Hi.", "Bye."), usage_out=usage)
+    assert usage["provider"] == "stub"
+    assert (usage["model"], usage["input_tokens"], usage["output_tokens"]) == ("stub-model", 200, 20)
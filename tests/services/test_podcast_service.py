@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.db import database
+from app.db.database import Base, SessionLocal
+from app.models.news_models import NewsDigest, NewsDigestStatus
+from app.models.user_models import User
+from app.services import podcast_service
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A session on a fresh SQLite file; SessionLocal (used by progress events) is bound to it too."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'podcasts.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    monkeypatch.setattr(settings, "STATIC_AUDIO_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "TTS_STOCK_CLIPS_ENABLED", False)
+    monkeypatch.setattr(settings, "TTS_SEGMENTED_OUTPUT", False)
+    monkeypatch.setattr(settings, "AUDIO_OUTPUT_FORMATS", "mp3")
+    session = SessionLocal()
+    yield session
+    session.close()
+    SessionLocal.configure(bind=database.engine)
+    engine.dispose()
+
+@pytest.fixture
+def digest(db, monkeypatch) -> NewsDigest:
+    """A scripted digest whose audio is planned as two chunks of stubbed TTS."""
+    async def key_available(self, user_provided_key=None):
+        return None
+
+    async def synthesize(*args, **kwargs) -> bytes:
+        return b"audio"
+
+    monkeypatch.setattr(podcast_service.OpenAIKeyProvider, "ensure_available", key_available)
+    monkeypatch.setattr(podcast_service, "plan_tts_chunks", lambda script, *args, **kwargs: ["First part.", "Second part."])
+    monkeypatch.setattr(podcast_service, "_synthesize_chunk", synthesize)
+    user = User(email="listener@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    news_digest = NewsDigest(user_id=user.id, status=NewsDigestStatus.PENDING_AUDIO, generated_script_text="First part. Second part.")
+    db.add(news_digest)
+    db.commit()
+    return news_digest
+
+def failing_assembly(error: Exception):
+    async def assemble(tasks, *args, **kwargs):
+        await asyncio.gather(*tasks)
+        raise error
+    return assemble
+
+def status_error(status_code: int) -> APIStatusError:
+    response = httpx.Response(status_code, request=httpx.Request("POST", "https://api.openai.com/v1/audio/speech"))
+    return APIStatusError("TTS failed", response=response, body=None)
+
+
+@pytest.mark.parametrize("error,retryable", [
+    (APIConnectionError(request=httpx.Request("POST", "https://api.openai.com")), True),
+    (status_error(408), True),
+    (status_error(429), True),
+    (status_error(503), True),
+    (status_error(400), False),
+    (status_error(401), False),
+    (ValueError("bad chunk"), False),
+    (OSError("disk full"), False),
+    (RuntimeError("ffmpeg failed"), False),
+])
+def test_only_transient_tts_errors_are_retryable(error, retryable):
+    assert podcast_service._is_retryable_audio_error(error) is retryable
+
+@pytest.mark.asyncio
+async def test_assembly_error_fails_the_digest_without_retry(db, digest, monkeypatch):
+    monkeypatch.setattr(podcast_service, "_assemble_chunks_streaming", failing_assembly(ValueError("frames do not line up")))
+    audio_url, error_message = await podcast_service.generate_podcast_audio_for_digest(db, digest.id, "en", "standard")
+    assert audio_url is None
+    assert "frames do not line up" in error_message
+    db.refresh(digest)
+    assert digest.status == NewsDigestStatus.FAILED
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_raised_for_a_retry(db, digest, monkeypatch):
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/audio/speech"))
+    monkeypatch.setattr(podcast_service, "_assemble_chunks_streaming", failing_assembly(RateLimitError("slow down", response=response, body=None)))
+    with pytest.raises(RateLimitError):
+        await podcast_service.generate_podcast_audio_for_digest(db, digest.id, "en", "standard")
+    db.refresh(digest)
+    assert digest.status == NewsDigestStatus.PROCESSING_AUDIO
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.db import database
+from app.db.database import Base, SessionLocal
+from app.models.news_models import NewsDigest, NewsDigestStatus
+from app.models.user_models import User
+from app.services import progress_events
+from app.services.progress_events import ProgressEvent
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A session on a fresh SQLite file; SessionLocal (used by publish) is bound to it too."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    SessionLocal.configure(bind=database.engine)
+    engine.dispose()
+
+@pytest.fixture
+def digest(db) -> NewsDigest:
+    user = User(email="listener@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    news_digest = NewsDigest(user_id=user.id, status=NewsDigestStatus.PROCESSING_AUDIO)
+    db.add(news_digest)
+    db.commit()
+    return news_digest
+
+def stored_progress(db, news_digest: NewsDigest) -> dict:
+    db.expire_all()
+    return db.get(NewsDigest, news_digest.id).progress
+
+
+def test_chunk_events_are_stored_every_interval_and_at_the_end(db, digest):
+    queue = progress_events.subscribers.subscribe(digest.id)
+    try:
+        total = progress_events.CHUNK_PERSIST_INTERVAL + 2
+        progress_events.publish(digest.id, ProgressEvent.AUDIO_STARTED, chunks_total=total)
+        progress_events.publish(digest.id, ProgressEvent.CHUNK_READY, chunks_done=1, chunks_total=total)
+        assert stored_progress(db, digest)["event"] == ProgressEvent.AUDIO_STARTED
+        for done in range(2, total):
+            progress_events.publish(digest.id, ProgressEvent.CHUNK_READY, chunks_done=done, chunks_total=total)
+        assert stored_progress(db, digest)["chunks_done"] == progress_events.CHUNK_PERSIST_INTERVAL
+        progress_events.publish(digest.id, ProgressEvent.CHUNK_READY, chunks_done=total, chunks_total=total)
+        assert stored_progress(db, digest)["chunks_done"] == total
+        assert queue.qsize() == total + 1 # Local streams see every event
+    finally:
+        progress_events.subscribers.unsubscribe(digest.id, queue)
+
+def test_stored_events_bump_the_row_version(db, digest):
+    progress_events.publish(digest.id, ProgressEvent.AUDIO_STARTED, chunks_total=2)
+    progress_events.publish(digest.id, ProgressEvent.AUDIO_STARTED, chunks_total=2) # Same second, same content
+    db.expire_all()
+    assert db.get(NewsDigest, digest.id).row_version == 2
@@ -0,0 +1,78 @@
+import pytest
+
+from app.services.script_repair import ScriptValidationError, repair_script, validate_and_repair_script
+
+
+# --- Preambles ---
+@pytest.mark.parametrize("preamble", [
+    "Sure! Here is your podcast script:",
+    "Here's the script for today's briefing:",
+    "Certainly, here is the podcast script.",
+    "Claro, aquí tienes el guion:",
+    "Voici le texte du bulletin :",
+])
+def test_standalone_preamble_line_is_removed(preamble):
+    repaired, applied = repair_script(f"{preamble}\nGood morning and welcome.\nMore news.")
+    assert repaired == "Good morning and welcome.\nMore news."
+    assert "preamble" in applied
+
+def test_first_line_with_content_after_colon_is_kept():
+    script = "Here is what happened in the podcast industry today: Spotify bought a company.\nMore news."
+    assert repair_script(script) == (script, [])
+
+def test_first_line_mentioning_script_in_a_sentence_is_kept():
+    script = "Certainly, the script of history changed.\nSecond line."
+    assert repair_script(script) == (script, [])
+
+
+# --- Numbered lists ---
+def test_year_starting_a_line_is_kept():
+    script = "2008. That was the year everything changed."
+    assert repair_script(script) == (script, [])
+
+def test_single_numbered_line_is_kept():
+    script = "Good morning.\n1. That is the number of stories today."
+    assert repair_script(script) == (script, [])
+
+def test_numbered_list_markers_are_removed():
+    repaired, applied = repair_script("Today:\n1. Markets rallied.\n2. Rain is coming.\n3) Elections are near.")
+    assert repaired == "Today:\nMarkets rallied.\nRain is coming.\nElections are near."
+    assert "numbered_list" in applied
+
+def test_numbered_list_separated_by_blank_lines_is_removed():
+    repaired, _ = repair_script("1. Markets rallied.\n\n2. Rain is coming.")
+    assert repaired == "Markets rallied.\n\nRain is coming."
+
+def test_numbers_not_counting_from_one_are_kept():
+    script = "2008. The crash.\n2009. The recovery."
+    assert repair_script(script) == (script, [])
+
+
+# --- Other rules ---
+def test_markdown_labels_and_directions_are_removed():
+    script = "## Headlines\n**Host:** Welcome *back*. [Music fades]\n- First story (pause) continues (in 2024)."
+    repaired, applied = repair_script(script)
+    assert repaired == "Welcome back.\nFirst story continues (in 2024)."
+    assert {"markdown_heading", "markdown_bold", "speaker_label", "bracketed_direction", "parenthetical_direction"} <= set(applied)
+
+@pytest.mark.parametrize("direction", [
+    "(pause)", "[MUSIC]", "(Soft music plays)", "[Sound of applause]", "(intro music fades out)",
+    "*music fades*", "_sfx: chime_", "(música de fondo)", "[Musique douce]",
+])
+def test_whole_stage_directions_are_removed(direction):
+    repaired, _ = repair_script(f"Good morning. {direction} Markets rallied today.")
+    assert repaired == "Good morning. Markets rallied today."
+
+@pytest.mark.parametrize("script", [
+    "Spain (who beat France two to one) advances to the final.",
+    "The summit (whose theme was climate) ended on Friday.",
+    "The minister said the plan was \"unworkable\" [sic] and left.",
+    "The band (known for its upbeat music and long tours) split up.",
+    "Exports [in millions of euros] fell sharply.",
+])
+def test_clauses_mentioning_direction_words_are_kept(script):
+    assert repair_script(script) == (script, [])
+
+def test_validate_rejects_scripts_too_short_after_repair():
+    with pytest.raises(ScriptValidationError):
+        validate_and_repair_script("[Music]\n**Host:** Hi.")
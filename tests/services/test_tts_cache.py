@@ -0,0 +1,80 @@
+import os
+
+from app.services.tts_cache import TTSChunkCache
+
+
+def key(n: int) -> str:
+    return TTSChunkCache.make_key(f"chunk {n}", "model", "voice", "", "mp3")
+
+def age(cache: TTSChunkCache, k: str, seconds_ago: float) -> None:
+    path = cache._path_for(k)
+    mtime = os.path.getmtime(path) - seconds_ago
+    os.utime(path, (mtime, mtime))
+
+
+def test_entry_stored_by_one_process_is_a_hit_in_another(tmp_path):
+    writer, reader = TTSChunkCache(str(tmp_path), 10_000), TTSChunkCache(str(tmp_path), 10_000)
+    writer.put_data(key(1), b"audio")
+    assert reader.read(key(1)) == b"audio"
+    assert (reader.hits, reader.misses) == (1, 0)
+    assert reader.read(key(2)) is None
+    assert reader.misses == 1
+
+def test_bound_holds_across_processes_sharing_the_directory(tmp_path):
+    caches = [TTSChunkCache(str(tmp_path), 1_000) for _ in range(3)]
+    for n in range(30):
+        caches[n % 3].put_data(key(n), b"x" * 100)
+    stats = caches[0].stats()
+    assert stats["size_bytes"] <= 1_000
+    assert stats["entries"] == stats["size_bytes"] // 100
+    assert sum(cache.evictions for cache in caches) == 30 - stats["entries"]
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache, other = TTSChunkCache(str(tmp_path), 1_000), TTSChunkCache(str(tmp_path), 1_000)
+    for n in range(10):
+        cache.put_data(key(n), b"x" * 100)
+        age(cache, key(n), 100 - n)
+    age(cache, key(0), -100) # Oldest entry ...
+    assert other.get(key(0)) is not None # ... read through another process is now the most recent
+    other.put_data(key(10), b"x" * 100)
+    assert cache.get(key(0)) is not None
+    assert cache.get(key(1)) is None
+    assert cache.get(key(10)) is not None
+
+def test_lost_size_record_is_recounted(tmp_path):
+    cache = TTSChunkCache(str(tmp_path), 1_000)
+    for n in range(9):
+        cache.put_data(key(n), b"x" * 100)
+    os.remove(os.path.join(str(tmp_path), "size"))
+    cache.put_data(key(9), b"x" * 100)
+    cache.put_data(key(10), b"x" * 100)
+    assert cache.stats()["size_bytes"] <= 1_000
+
+def test_storing_a_cached_key_again_does_not_count_twice(tmp_path):
+    cache = TTSChunkCache(str(tmp_path), 1_000)
+    for _ in range(20):
+        cache.put_data(key(1), b"x" * 100)
+    assert cache._read_total() == 100
+    assert cache.evictions == 0
+
+def test_pinned_entries_are_not_evicted_until_unpinned(tmp_path):
+    cache = TTSChunkCache(str(tmp_path), 1_000)
+    assert cache.pin("digest-1", key(0)) is False
+    cache.put_data(key(0), b"x" * 100)
+    assert cache.pin("digest-1", key(0)) is True
+    for n in range(1, 30):
+        cache.put_data(key(n), b"x" * 100)
+    assert cache.get(key(0)) is not None
+    cache.unpin_all("digest-1")
+    age(cache, key(0), 1_000)
+    cache.put_data(key(30), b"x" * 100)
+    assert cache.get(key(0)) is None
+
+def test_pins_of_inactive_owners_are_pruned(tmp_path):
+    cache = TTSChunkCache(str(tmp_path), 1_000)
+    cache.pin("digest-1", key(0))
+    cache.pin("digest-2", key(1))
+    old = os.path.getmtime(cache._pin_dir("digest-1")) - 3_600
+    os.utime(cache._pin_dir("digest-1"), (old, old))
+    assert cache.prune_pins(1_800) == 1
+    assert cache._pinned_keys() == {key(1)}